@@ -0,0 +1,142 @@
+"""
+Compare the thread and asyncio transfer backends on one SFTP directory.
+
+Point this at a test server and a scratch bucket, for example:
+
+    uv run python benchmarks/bench_backends.py --host localhost \
+        --username bench --key ~/.ssh/id_ed25519 --remote-path /bench \
+        --bucket move-it-bench --local-path /tmp/bench --in-flight 1,8,32
+
+Every matching file is downloaded and uploaded once per backend and
+in-flight count, under "<prefix>/<backend>-<n>/" in the bucket. Remote
+files are never deleted, so runs can be repeated. Point
+STORAGE_EMULATOR_HOST at a GCS emulator to leave real buckets alone.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fetcher import Fetcher, ThreadBackend, TransferBackend  # noqa: E402
+from fetcher.aio import AsyncBackend  # noqa: E402
+from models import SFTPConfig  # noqa: E402
+
+
+class ThreadCounter:
+    """Sample the process's thread count in the background."""
+
+    def __init__(self) -> None:
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "ThreadCounter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _config(args: argparse.Namespace, backend: str, in_flight: int) -> SFTPConfig:
+    return SFTPConfig(
+        hostname=args.host,
+        username=args.username,
+        port=args.port,
+        key_passphrase="",
+        path_to_key=args.key,
+        local_path=args.local_path,
+        bucket_name=args.bucket,
+        path_to_gcs_credentials=args.gcs_credentials,
+        target_file_type=args.file_type,
+        remote_path=args.remote_path,
+        recursive=True,
+        max_concurrent_transfers=in_flight,
+        transfer_pause_s=0,
+        blob_name_template=f"{args.prefix}/{backend}-{in_flight}/{{name}}",
+        transfer_backend=backend,
+    )
+
+
+def bench_backend(
+    args: argparse.Namespace, backend_name: str, in_flight: int
+) -> tuple[float, int, int, int]:
+    """Return seconds, bytes moved, failures, and peak threads for one run."""
+    fetcher = Fetcher(
+        config=_config(args, backend_name, in_flight),
+        email_sender=None,
+        bip_name="BENCH",
+        notify=False,
+    )
+    remote_files = fetcher.survey()
+    buckets = fetcher._get_buckets()
+
+    ssh_client = None
+    with ThreadCounter() as counter:
+        start = time.perf_counter()
+        if backend_name == "thread":
+            ssh_client = fetcher._connect()
+            backend: TransferBackend = ThreadBackend(
+                fetcher, lambda: fetcher._open_channel(ssh_client), in_flight
+            )
+        else:
+            backend = AsyncBackend(fetcher)
+        try:
+            in_progress: list[Future] = []
+            results = []
+            for remote_file in remote_files:
+                while len(in_progress) >= in_flight:
+                    results.append(in_progress.pop(0).result())
+                in_progress.append(backend.submit(buckets, remote_file))
+            results.extend(future.result() for future in in_progress)
+        finally:
+            backend.close()
+            if ssh_client is not None:
+                ssh_client.close()
+        elapsed = time.perf_counter() - start
+
+    moved = sum(f.size or 0 for f in remote_files)
+    failed = sum(not r.success for r in results)
+    return elapsed, moved, failed, counter.peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=22)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--key", required=True, help="Private key file")
+    parser.add_argument("--remote-path", required=True, help="Directory to read")
+    parser.add_argument("--file-type", default=".csv", help="Suffixes to move")
+    parser.add_argument("--bucket", required=True, help="Scratch GCS bucket")
+    parser.add_argument("--gcs-credentials", default="", help="Service account key")
+    parser.add_argument("--local-path", required=True, help="Staging directory")
+    parser.add_argument("--prefix", default="bench", help="Object name prefix")
+    parser.add_argument("--in-flight", default="1,8,32", help="Files in flight")
+    parser.add_argument("--backends", default="thread,asyncio")
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'in flight':>9} {'seconds':>9} {'MB/s':>8} {'failed':>7} {'threads':>8}")
+    for backend_name in args.backends.split(","):
+        for in_flight in (int(n) for n in args.in_flight.split(",")):
+            elapsed, moved, failed, threads = bench_backend(
+                args, backend_name.strip(), in_flight
+            )
+            print(
+                f"{backend_name:<10} {in_flight:>9} {elapsed:>9.2f} "
+                f"{moved / elapsed / 2**20:>8.1f} {failed:>7} {threads:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
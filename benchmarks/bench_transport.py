@@ -0,0 +1,123 @@
+"""
+Compare SFTP download throughput across TransportTuning profiles.
+
+Point this at a local SSH server and a test file, for example:
+
+    uv run python benchmarks/bench_transport.py --host localhost \
+        --username bench --key ~/.ssh/id_ed25519 --remote-file /tmp/bench.csv
+
+Each profile opens a fresh connection and downloads the file --repeats times.
+Loopback hides latency, so add delay with `tc qdisc add dev lo root netem
+delay 75ms` to see how window and prefetch settings behave on WAN-like links.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import paramiko
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from fetcher import make_transport_factory  # noqa: E402
+from models import TransportTuning  # noqa: E402
+
+PROFILES: dict[str, TransportTuning] = {
+    "default": TransportTuning(),
+    "window-16M": TransportTuning(window_size=16 * 2**20),
+    "window-16M+packet-256K": TransportTuning(
+        window_size=16 * 2**20, max_packet_size=256 * 2**10
+    ),
+    "prefetch-off": TransportTuning(prefetch=False),
+    "prefetch-64": TransportTuning(max_concurrent_prefetch_requests=64),
+    "compression": TransportTuning(compress=True),
+    "aes128-gcm": TransportTuning(ciphers=["aes128-gcm@openssh.com", "aes128-ctr"]),
+    "tuned": TransportTuning(
+        window_size=16 * 2**20,
+        max_packet_size=256 * 2**10,
+        compress=True,
+        max_concurrent_prefetch_requests=64,
+        ciphers=["aes128-gcm@openssh.com", "aes128-ctr"],
+    ),
+}
+
+
+def _connect(args: argparse.Namespace, tuning: TransportTuning) -> paramiko.SSHClient:
+    """Open an SSH connection to the benchmark server with tuning applied."""
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        hostname=args.host,
+        port=args.port,
+        username=args.username,
+        key_filename=os.path.expanduser(args.key),
+        look_for_keys=False,
+        allow_agent=False,
+        timeout=30,
+        compress=tuning.compress,
+        transport_factory=make_transport_factory(tuning),
+    )
+    return client
+
+
+def bench_profile(
+    args: argparse.Namespace, tuning: TransportTuning, local_dir: Path
+) -> list[float]:
+    """Return the download durations in seconds for one profile."""
+    durations: list[float] = []
+    client = _connect(args, tuning)
+    try:
+        sftp = client.open_sftp()
+        for i in range(args.repeats):
+            local_file = local_dir / f"bench_{i}"
+            start = time.perf_counter()
+            sftp.get(
+                args.remote_file,
+                str(local_file),
+                prefetch=tuning.prefetch,
+                max_concurrent_prefetch_requests=tuning.max_concurrent_prefetch_requests,
+            )
+            durations.append(time.perf_counter() - start)
+            local_file.unlink()
+    finally:
+        client.close()
+    return durations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=22)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--key", required=True, help="Private key file")
+    parser.add_argument("--remote-file", required=True, help="File to download")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--profiles",
+        default=",".join(PROFILES),
+        help="Comma-separated subset of: " + ", ".join(PROFILES),
+    )
+    args = parser.parse_args()
+
+    size = None
+    print(f"{'profile':<24} {'median s':>10} {'MB/s':>10}")
+    with tempfile.TemporaryDirectory(prefix="move-it-bench-") as tmp:
+        for name in args.profiles.split(","):
+            tuning = PROFILES[name.strip()]
+            durations = bench_profile(args, tuning, Path(tmp))
+            if size is None:
+                client = _connect(args, TransportTuning())
+                try:
+                    size = client.open_sftp().stat(args.remote_file).st_size or 0
+                finally:
+                    client.close()
+            median = statistics.median(durations)
+            print(f"{name:<24} {median:>10.3f} {size / median / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,24 @@
-from .fetcher import Fetcher
+from .backend import ThreadBackend, TransferBackend
+from .fetcher import PREFLIGHT_CHECKS, Fetcher
+from .lease import GCSLeaseStore, LeaseStore, LocalLeaseStore
+from .selector import FileSelector
+from .staging import StagingArea, clean_staging
+from .tuning import make_transport_factory
 
 __version__ = "1.0.0"
 __author__ = "Bryan Olandres"
 
 # Expose main classes/functions at package level
-__all__ = ["Fetcher"]
+__all__ = [
+    "Fetcher",
+    "FileSelector",
+    "GCSLeaseStore",
+    "LeaseStore",
+    "LocalLeaseStore",
+    "PREFLIGHT_CHECKS",
+    "StagingArea",
+    "ThreadBackend",
+    "TransferBackend",
+    "clean_staging",
+    "make_transport_factory",
+]
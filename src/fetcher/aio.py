@@ -0,0 +1,628 @@
+import asyncio
+import base64
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+
+import google.auth
+import google.auth.transport.requests
+import google_crc32c
+
+from models import CsvInspection, FileResult, RemoteFile
+
+from .backend import TransferBackend
+from .download import PartialDownload
+from .inspection import CsvInspector, inspection_metadata
+from .progress import TransferProgress, TransferStalled
+
+try:
+    import aiohttp
+    import asyncssh
+except ImportError:  # optional: uv sync --extra async
+    aiohttp = None
+    asyncssh = None
+
+if TYPE_CHECKING:
+    from .fetcher import Fetcher
+
+# Bytes requested per SFTP read; asyncssh splits each read into parallel
+# block requests, so one read keeps the link busy.
+READ_SIZE = 4 * 1024 * 1024
+
+# Bytes sent per request of a resumable upload; GCS needs a multiple of
+# 256 KiB for every chunk but the last.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Upload requests in a row that may fail with a retryable error, and the
+# first delay before retrying, doubled after each failure.
+UPLOAD_ATTEMPTS = 6
+UPLOAD_RETRY_DELAY_S = 1.0
+
+# HTTP statuses GCS documents as retryable.
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+GCS_SCOPES = ["https://www.googleapis.com/auth/devstorage.read_write"]
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the process-wide transfer event loop, starting it on first use.
+
+    Every asyncio backend in the process runs its files on this one loop, so
+    many BIPs and files share a single thread.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="transfer-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def available() -> bool:
+    """Return True when asyncssh and aiohttp are installed."""
+    return asyncssh is not None and aiohttp is not None
+
+
+def file_crc32c(path: Path) -> str:
+    """Return the base64 CRC32C of a file, as GCS reports it for an object."""
+    checksum = google_crc32c.Checksum()
+    with open(path, "rb") as fp:
+        while block := fp.read(UPLOAD_CHUNK_SIZE):
+            checksum.update(block)
+    return base64.b64encode(checksum.digest()).decode("ascii")
+
+
+def _read_chunk(path: Path, offset: int, size: int) -> bytes:
+    with open(path, "rb") as fp:
+        fp.seek(offset)
+        return fp.read(size)
+
+
+def _write_block(
+    local, partial: PartialDownload, index: int, done: int, data: bytes
+) -> None:
+    local.seek(done)
+    local.write(data)
+    partial.advance(index, done + len(data), len(data))
+
+
+def _persisted_bytes(range_header: str | None) -> int:
+    """Return the bytes a resumable upload session holds, from its Range header."""
+    if not range_header:
+        return 0
+    return int(range_header.rsplit("-", 1)[1]) + 1
+
+
+class UploadError(IOError):
+    """A GCS upload request failed; retryable when GCS may succeed on a retry."""
+
+    def __init__(self, message: str, retryable: bool) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class _GCSAuth:
+    """Bearer tokens for the GCS JSON API, refreshed off the event loop."""
+
+    def __init__(self) -> None:
+        self._credentials = None
+        self._lock = asyncio.Lock()
+
+    async def headers(self) -> dict[str, str]:
+        # The emulator, like the google-cloud-storage client, needs no token.
+        if os.environ.get("STORAGE_EMULATOR_HOST"):
+            return {}
+        async with self._lock:
+            if self._credentials is None or not self._credentials.valid:
+                await asyncio.get_running_loop().run_in_executor(None, self._refresh)
+            return {"Authorization": f"Bearer {self._credentials.token}"}
+
+    def _refresh(self) -> None:
+        if self._credentials is None:
+            self._credentials, _ = google.auth.default(scopes=GCS_SCOPES)
+        self._credentials.refresh(google.auth.transport.requests.Request())
+
+
+class AsyncBackend(TransferBackend):
+    """
+    asyncssh downloads and aiohttp uploads on the shared transfer loop.
+
+    A file in flight costs a coroutine rather than a thread, and all of a
+    BIP's files share one SFTP session, so many BIPs with several files each
+    run on the one loop thread. Each read requests READ_SIZE bytes, which
+    asyncssh fetches as parallel block requests; ranged downloads over
+    extra channels are not used. Downloads resume from .part files like the
+    thread backend's. Uploads use the GCS resumable upload API, authorized
+    with the same application default credentials as the GCS client. Like
+    the client library, they send the file's CRC32C, check the one GCS
+    stores, and retry 5xx responses and broken connections from the offset
+    the session already holds. Staging disk reads and writes run in the
+    loop's executor, so a slow disk never stalls the loop.
+    """
+
+    def __init__(self, fetcher: "Fetcher") -> None:
+        """
+        Connect to the BIP's SFTP server on the shared loop.
+
+        The key is loaded and checked by the Fetcher, so it must pass the same
+        Ed25519 or 4096-bit RSA check as the thread backend's connection.
+
+        Raises:
+            RuntimeError: If asyncssh or aiohttp is not installed.
+            ConnectionSetupError: If the key cannot be used or the connection
+                fails.
+        """
+        from .fetcher import ConnectionSetupError
+
+        if not available():
+            raise RuntimeError(
+                "The asyncio transfer backend needs asyncssh and aiohttp: uv sync --extra async"
+            )
+        fetcher._load_private_key()
+        try:
+            self._client_key = asyncssh.import_private_key(
+                Path(fetcher.path_to_key).read_bytes(), fetcher.key_passphrase or None
+            )
+        except (OSError, asyncssh.KeyImportError) as e:
+            raise ConnectionSetupError(
+                f"Failed to load private key from {fetcher.path_to_key}: {e}",
+                subject="Key load failed",
+            ) from e
+        self.fetcher = fetcher
+        self.loop = shared_loop()
+        self.gcs_url = (
+            os.environ.get("STORAGE_EMULATOR_HOST") or "https://storage.googleapis.com"
+        ).rstrip("/")
+        self._conn = None
+        self._sftp = None
+        self._session = None
+        self._auth = None
+        try:
+            self._run(self._open())
+        except Exception as e:
+            raise ConnectionSetupError(
+                f"Failed to connect to {fetcher.hostname}: {e}",
+                subject="Connection failed",
+            ) from e
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _open(self) -> None:
+        fetcher = self.fetcher
+        tuning = fetcher.tuning
+        options = {}
+        if tuning.window_size:
+            options["window"] = tuning.window_size
+        if tuning.max_packet_size:
+            options["max_pktsize"] = tuning.max_packet_size
+        if tuning.ciphers:
+            supported = {alg.decode() for alg in asyncssh.encryption.get_encryption_algs()}
+            preferred = [c for c in tuning.ciphers if c in supported]
+            unknown = [c for c in tuning.ciphers if c not in supported]
+            if unknown:
+                logging.warning(f"Ignoring unsupported SSH ciphers: {unknown}")
+            if preferred:
+                options["encryption_algs"] = preferred + sorted(supported - set(preferred))
+        options["compression_algs"] = (
+            ["zlib@openssh.com", "zlib", "none"] if tuning.compress else ["none"]
+        )
+        self._conn = await asyncssh.connect(
+            fetcher.hostname,
+            port=fetcher.port,
+            username=fetcher.username,
+            client_keys=[self._client_key],
+            known_hosts=None,
+            agent_path=None,
+            connect_timeout=30,
+            **options,
+        )
+        try:
+            self._sftp = await self._conn.start_sftp_client()
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    total=None, sock_connect=30, sock_read=fetcher.stall_timeout_s
+                )
+            )
+            self._auth = _GCSAuth()
+        except BaseException:
+            self._conn.close()
+            await self._conn.wait_closed()
+            self._conn = self._sftp = None
+            raise
+
+    def submit(self, buckets: list, remote_file: RemoteFile) -> "Future[FileResult]":
+        return asyncio.run_coroutine_threadsafe(
+            self._transfer(buckets, remote_file), self.loop
+        )
+
+    def close(self) -> None:
+        self._run(self._close())
+
+    async def _close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+        if self._sftp is not None:
+            self._sftp.exit()
+        if self._conn is not None:
+            self._conn.close()
+            await self._conn.wait_closed()
+
+    async def _blocking(self, fn, *args):
+        """Run a blocking step, such as disk I/O or a notification email, off the loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(fn, *args)
+        )
+
+    async def _transfer(self, buckets: list, remote_file: RemoteFile) -> FileResult:
+        """Download one file, upload it to every bucket, and remove the local copy."""
+        fetcher = self.fetcher
+        file_name = remote_file.relative_path
+        local_file_path = fetcher.staging.path_for(remote_file)
+        inspector = fetcher._inspector_for(remote_file)
+
+        try:
+            logging.info(f"Downloading file {file_name}")
+            await self._blocking(
+                functools.partial(os.makedirs, exist_ok=True),
+                os.path.dirname(local_file_path),
+            )
+            await self._download(remote_file, local_file_path, inspector)
+        except Exception as e:
+            return await self._blocking(
+                fetcher._download_failed, remote_file, local_file_path, e
+            )
+
+        inspection: CsvInspection | None = None
+        if inspector is not None:
+            if not inspector.in_order:
+                await self._blocking(inspector.scan_file, local_file_path)
+            inspection = inspector.result()
+        blob_name, quarantined = fetcher._inspected_blob(remote_file, inspection)
+
+        local_file = Path(local_file_path)
+        metadata = inspection_metadata(inspection) if inspection else None
+        stored = await asyncio.gather(
+            *(
+                self._upload(local_file, bucket.name, blob_name, metadata)
+                for bucket in buckets
+            )
+        )
+        failed = [bucket.name for bucket, ok in zip(buckets, stored) if not ok]
+        result = await self._blocking(
+            fetcher._stored_result,
+            remote_file,
+            local_file,
+            buckets,
+            failed,
+            inspection,
+            blob_name,
+            quarantined,
+        )
+        if fetcher.transfer_pause_s > 0:
+            await asyncio.sleep(fetcher.transfer_pause_s)
+        return result
+
+    async def _download(
+        self,
+        remote_file: RemoteFile,
+        local_file_path: str,
+        inspector: CsvInspector | None,
+    ) -> None:
+        """Download one file through a resumable .part file."""
+        fetcher = self.fetcher
+        size, mtime = remote_file.size, remote_file.mtime
+        if size is None or mtime is None:
+            attrs = await self._sftp.stat(remote_file.remote_path)
+            size, mtime = attrs.size, attrs.mtime
+
+        tuning = fetcher.tuning
+        max_requests = -1
+        if not tuning.prefetch:
+            max_requests = 1
+        elif tuning.max_concurrent_prefetch_requests:
+            max_requests = tuning.max_concurrent_prefetch_requests
+
+        with fetcher._span(
+            "download",
+            remote_file.relative_path,
+            size=size,
+            host=fetcher.hostname,
+            streams=1,
+            retries=0,
+            resumed_bytes=0,
+        ) as attributes:
+            partial = PartialDownload(local_file_path, size, mtime)
+            spans = await self._blocking(partial.prepare, 1)
+            attributes.update(
+                retries=partial.retries, resumed_bytes=partial.resumed_bytes
+            )
+            progress = fetcher.progress.start(
+                remote_file.relative_path, "download", size, fetcher.stall_timeout_s
+            )
+            try:
+                progress.update(sum(done - start for start, done, _ in spans))
+                async with self._sftp.open(
+                    remote_file.remote_path, "rb", max_requests=max_requests
+                ) as remote:
+                    local = await self._blocking(open, partial.part_path, "r+b")
+                    try:
+                        for index, (_, done, end) in enumerate(spans):
+                            await self._fetch_range(
+                                remote,
+                                local,
+                                partial,
+                                index,
+                                done,
+                                end,
+                                progress,
+                                inspector,
+                            )
+                    finally:
+                        await self._blocking(local.close)
+                await self._blocking(partial.save)
+                remote_size = (await self._sftp.stat(remote_file.remote_path)).size
+                local_size = await self._blocking(os.path.getsize, partial.part_path)
+                if local_size != size or remote_size != size:
+                    raise IOError(
+                        f"Size mismatch for '{remote_file.remote_path}': expected "
+                        f"{size} bytes, local copy has {local_size}, remote now has "
+                        f"{remote_size}"
+                    )
+                await self._blocking(partial.complete)
+            except asyncio.TimeoutError as e:
+                await self._blocking(partial.save)
+                raise TransferStalled(
+                    f"download of '{remote_file.relative_path}' stalled: no data for "
+                    f"{fetcher.stall_timeout_s}s after {progress.done}/{size} bytes"
+                ) from e
+            except BaseException:
+                await self._blocking(partial.save)
+                raise
+            finally:
+                fetcher.progress.finish(progress)
+
+    async def _fetch_range(
+        self,
+        remote,
+        local,
+        partial: PartialDownload,
+        index: int,
+        done: int,
+        end: int,
+        progress: TransferProgress,
+        inspector: CsvInspector | None,
+    ) -> None:
+        """Read bytes [done, end) into the .part file, recording progress."""
+        stall_s = self.fetcher.stall_timeout_s
+        while done < end:
+            data = await asyncio.wait_for(
+                remote.read(min(READ_SIZE, end - done), done), stall_s
+            )
+            if not data:
+                raise IOError(f"Unexpected end of file at offset {done} of {end}")
+            if inspector is not None:
+                inspector.feed(done, data)
+            wait_s = self.fetcher.limiter.reserve(len(data))
+            if wait_s > 0:
+                await asyncio.sleep(wait_s)
+            await self._blocking(_write_block, local, partial, index, done, data)
+            done += len(data)
+            progress.update(len(data))
+
+    async def _upload(
+        self,
+        file_path: Path,
+        bucket_name: str,
+        blob_name: str,
+        metadata: dict[str, str] | None,
+    ) -> bool:
+        """
+        Upload one local file to one bucket with a GCS resumable upload.
+
+        The file's CRC32C goes with the last chunk, and the stored object's
+        checksum is compared with it; a mismatched object is deleted.
+
+        Returns True when the upload succeeds. On failure, logs the error,
+        sends a notification, and returns False.
+        """
+        fetcher = self.fetcher
+        target = blob_name
+        if len(fetcher.bucket_names) > 1:
+            target = f"gs://{bucket_name}/{blob_name}"
+        progress = None
+        try:
+            logging.info(f"Uploading file {target}")
+            size = (await self._blocking(file_path.stat)).st_size
+            progress = fetcher.progress.start(target, "upload", size)
+            with fetcher._span(
+                "upload",
+                fetcher._staged_name(file_path),
+                size=size,
+                bucket=bucket_name,
+                blob=blob_name,
+                retries=0,
+            ) as attributes:
+                crc32c = await self._blocking(file_crc32c, file_path)
+                session_url = await self._retrying(
+                    attributes,
+                    self._start_session,
+                    bucket_name,
+                    blob_name,
+                    metadata,
+                    size,
+                )
+                stored = await self._send_chunks(
+                    attributes, session_url, file_path, size, crc32c, progress
+                )
+                if stored.get("crc32c") != crc32c:
+                    await self._delete_object(
+                        bucket_name, blob_name, stored.get("generation")
+                    )
+                    raise IOError(
+                        f"Checksum mismatch for gs://{bucket_name}/{blob_name}: "
+                        f"local crc32c {crc32c}, stored {stored.get('crc32c')}; "
+                        "the object was deleted"
+                    )
+            return True
+        except Exception as e:
+            await self._blocking(fetcher._upload_failed, bucket_name, blob_name, e)
+            return False
+        finally:
+            if progress is not None:
+                fetcher.progress.finish(progress)
+
+    async def _backoff(self, attributes: dict, error: Exception, attempt: int) -> None:
+        """
+        Wait before retrying a failed upload request, or raise if it cannot be.
+
+        The delay doubles with each failure in a row. Each retry is counted
+        in the span attributes.
+
+        Raises:
+            UploadError: If error is not retryable, or attempt was the last.
+        """
+        if isinstance(error, UploadError) and not error.retryable:
+            raise error
+        reason = str(error) or type(error).__name__
+        if attempt >= UPLOAD_ATTEMPTS:
+            raise UploadError(
+                f"gave up after {attempt} attempts: {reason}", retryable=False
+            ) from error
+        delay_s = UPLOAD_RETRY_DELAY_S * 2 ** (attempt - 1)
+        logging.warning(f"Retrying GCS upload request in {delay_s:g}s: {reason}")
+        attributes["retries"] += 1
+        await asyncio.sleep(delay_s)
+
+    async def _retrying(self, attributes: dict, request, *args):
+        """Await request(*args), retrying retryable failures with backoff."""
+        attempt = 0
+        while True:
+            try:
+                return await request(*args)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError, UploadError) as e:
+                attempt += 1
+                await self._backoff(attributes, e, attempt)
+
+    @staticmethod
+    def _check(response) -> None:
+        """Raise an UploadError for an error response."""
+        if response.status >= 400:
+            raise UploadError(
+                f"HTTP {response.status} {response.reason} from {response.url.path}",
+                retryable=response.status in RETRYABLE_STATUSES,
+            )
+
+    async def _start_session(
+        self,
+        bucket_name: str,
+        blob_name: str,
+        metadata: dict[str, str] | None,
+        size: int,
+    ) -> str:
+        """Open a resumable upload session and return its URL."""
+        headers = await self._auth.headers()
+        async with self._session.post(
+            f"{self.gcs_url}/upload/storage/v1/b/{quote(bucket_name, safe='')}/o",
+            params={"uploadType": "resumable"},
+            json={"name": blob_name, "metadata": metadata or {}},
+            headers={**headers, "X-Upload-Content-Length": str(size)},
+        ) as response:
+            self._check(response)
+            return response.headers["Location"]
+
+    async def _send_chunks(
+        self,
+        attributes: dict,
+        session_url: str,
+        file_path: Path,
+        size: int,
+        crc32c: str,
+        progress: TransferProgress,
+    ) -> dict:
+        """
+        Send the file through an open session, UPLOAD_CHUNK_SIZE at a time.
+
+        After a failed request the session is asked how many bytes it holds,
+        and the upload resumes from there.
+
+        Returns:
+            The stored object's resource.
+        """
+        offset = 0
+        query = False
+
+        async def send() -> tuple[int, dict | None]:
+            if query:
+                data, content_range = b"", f"bytes */{size}"
+            else:
+                data = await self._blocking(
+                    _read_chunk, file_path, offset, UPLOAD_CHUNK_SIZE
+                )
+                end = offset + len(data)
+                content_range = (
+                    f"bytes {offset}-{end - 1}/{size}" if data else f"bytes */{size}"
+                )
+            headers = {**await self._auth.headers(), "Content-Range": content_range}
+            if not query and offset + len(data) == size:
+                headers["X-Goog-Hash"] = f"crc32c={crc32c}"
+            async with self._session.put(
+                session_url, data=data, headers=headers
+            ) as response:
+                if response.status == 308:
+                    return _persisted_bytes(response.headers.get("Range")), None
+                self._check(response)
+                return size, await response.json(content_type=None)
+
+        # Failed requests in a row; reset once the session holds more bytes.
+        failures = 0
+        while True:
+            try:
+                persisted, stored = await send()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError, UploadError) as e:
+                failures += 1
+                await self._backoff(attributes, e, failures)
+                # A failed request may have stored part of its chunk; ask first.
+                query = True
+                continue
+            if persisted < offset:
+                raise UploadError(
+                    f"upload session lost data: holds {persisted} of {offset} bytes",
+                    retryable=False,
+                )
+            if persisted > offset:
+                failures = 0
+            progress.update(persisted - offset)
+            offset, query = persisted, False
+            if stored is not None:
+                return stored
+
+    async def _delete_object(
+        self, bucket_name: str, blob_name: str, generation: str | None
+    ) -> None:
+        """Delete one generation of an object, logging any failure."""
+        params = {"ifGenerationMatch": generation} if generation else {}
+        try:
+            headers = await self._auth.headers()
+            async with self._session.delete(
+                f"{self.gcs_url}/storage/v1/b/{quote(bucket_name, safe='')}"
+                f"/o/{quote(blob_name, safe='')}",
+                params=params,
+                headers=headers,
+            ) as response:
+                self._check(response)
+        except Exception as e:
+            logging.error(
+                f"Failed to delete corrupted object gs://{bucket_name}/{blob_name}: {e}"
+            )
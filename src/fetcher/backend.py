@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
+import paramiko
+
+from models import FileResult, RemoteFile
+
+if TYPE_CHECKING:
+    from .fetcher import Fetcher
+
+# Supported values for SFTPConfig.transfer_backend.
+TRANSFER_BACKENDS = ("thread", "asyncio")
+
+
+class TransferBackend:
+    """
+    Moves single files from SFTP to GCS for one Fetcher.fetch_files call.
+
+    Fetcher.fetch_files keeps the walk, leases, bundles, and remote deletion
+    and hands each file to its backend. transfer() moves one file and waits
+    for it; submit() starts one and returns a Future of its FileResult, so
+    the caller can keep several in flight.
+    """
+
+    def transfer(self, buckets: list, remote_file: RemoteFile) -> FileResult:
+        """Move one file and return its result."""
+        return self.submit(buckets, remote_file).result()
+
+    def submit(self, buckets: list, remote_file: RemoteFile) -> "Future[FileResult]":
+        """Start moving one file."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Wait for submitted files and release the backend's connections."""
+
+
+class ThreadBackend(TransferBackend):
+    """
+    Blocking paramiko downloads and google-cloud-storage uploads on threads.
+
+    Every file in flight holds a pool thread, which keeps its own SFTP
+    channel on the BIP's connection. channel() hands out the same per-thread
+    channels to the caller, for work done outside the pool.
+    """
+
+    def __init__(
+        self,
+        fetcher: "Fetcher",
+        open_channel: Callable[[], paramiko.SFTPClient],
+        max_workers: int,
+    ) -> None:
+        """
+        Args:
+            fetcher: Fetcher whose settings and transfer steps are used.
+            open_channel: Opens a new SFTP channel on the BIP's connection.
+            max_workers: Most files moved at the same time. Threads are
+                started only as needed.
+        """
+        self.fetcher = fetcher
+        self.open_channel = open_channel
+        self._local = threading.local()
+        self._channels: list[paramiko.SFTPClient] = []
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="transfer"
+        )
+
+    def channel(self) -> paramiko.SFTPClient:
+        """Return the calling thread's SFTP channel, opening it if needed."""
+        sftp = getattr(self._local, "sftp", None)
+        if sftp is None:
+            sftp = self._local.sftp = self.open_channel()
+            self._channels.append(sftp)
+        return sftp
+
+    def transfer(self, buckets: list, remote_file: RemoteFile) -> FileResult:
+        """Move one file on the calling thread."""
+        result = self.fetcher._transfer_file(
+            self.channel(), self.open_channel, buckets, remote_file
+        )
+        if not result.success and result.stage == "download":
+            # A failed or stalled read can leave the channel unusable;
+            # the next file on this thread gets a fresh one.
+            self._local.sftp.close()
+            self._local.sftp = None
+        if self.fetcher.transfer_pause_s > 0:
+            time.sleep(self.fetcher.transfer_pause_s)
+        return result
+
+    def submit(self, buckets: list, remote_file: RemoteFile) -> "Future[FileResult]":
+        return self._pool.submit(self.transfer, buckets, remote_file)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        for sftp in self._channels:
+            sftp.close()
+        self._channels.clear()
@@ -0,0 +1,416 @@
+import base64
+import hashlib
+import io
+import json
+import logging
+import tarfile
+import time
+import uuid
+import zipfile
+import zlib
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, ContextManager
+
+import paramiko
+
+from models import CsvInspection, FileResult, RemoteFile
+
+from .download import PART_SUFFIX
+from .inspection import inspection_metadata
+from .progress import ProgressReader, ProgressTracker
+from .staging import StagingArea
+
+# Archive formats a BIP can bundle small files into.
+BUNDLE_FORMATS = ("tar.gz", "zip")
+
+# Members are read in blocks of this size, so the per-file deadline and the
+# bandwidth limit apply while a file arrives.
+BUNDLE_READ_BLOCK_SIZE = 64 * 1024
+
+# GCS allows 8 KiB of custom metadata per object; the encoded manifest is
+# kept below this so the rest of the metadata still fits.
+MANIFEST_METADATA_MAX_BYTES = 7 * 1024
+
+# Full manifest written as the last member of every bundle.
+MANIFEST_MEMBER = "MANIFEST.json"
+
+
+def encode_manifest(members: list[list]) -> str:
+    """Encode [name, size, sha256] entries as base64 of zlib-compressed JSON."""
+    raw = json.dumps(members, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 9)).decode("ascii")
+
+
+def decode_manifest(encoded: str) -> list[list]:
+    """Invert encode_manifest, such as when auditing a bundle's metadata."""
+    return json.loads(zlib.decompress(base64.b64decode(encoded)))
+
+
+def _no_span(name: str, file_name: str, **attributes) -> ContextManager[dict]:
+    return nullcontext(attributes)
+
+
+class BundleWriter:
+    """
+    One archive of small files, written to a staging file.
+
+    Members are written as they are added, so only the archive being built
+    is held. The manifest lists every member's name, size, and SHA-256.
+    """
+
+    def __init__(self, fmt: str, path: Path) -> None:
+        self.fmt = fmt
+        self.path = path
+        self.members: list[list] = []
+        self.raw_bytes = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "wb")
+        if fmt == "zip":
+            self._archive = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(fileobj=self._file, mode="w:gz")
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def fits(self, name: str, data: bytes, max_bytes: int) -> bool:
+        """Return True if data can join this bundle without passing a cap."""
+        if not self.members:
+            return True
+        if self.raw_bytes + len(data) > max_bytes:
+            return False
+        candidate = self.members + [[name, len(data), hashlib.sha256(data).hexdigest()]]
+        return len(encode_manifest(candidate)) <= MANIFEST_METADATA_MAX_BYTES
+
+    def add(self, name: str, data: bytes, mtime: int | None) -> None:
+        """Append one member to the archive."""
+        self._write_member(name, data, mtime or int(time.time()))
+        self.members.append([name, len(data), hashlib.sha256(data).hexdigest()])
+        self.raw_bytes += len(data)
+
+    def finish(self) -> int:
+        """
+        Write the manifest member and close the archive.
+
+        Returns:
+            The size of the archive file in bytes.
+        """
+        manifest = json.dumps(
+            [{"name": n, "size": s, "sha256": h} for n, s, h in self.members]
+        ).encode("utf-8")
+        self._write_member(MANIFEST_MEMBER, manifest, int(time.time()))
+        self._archive.close()
+        self._file.close()
+        return self.path.stat().st_size
+
+    def _write_member(self, name: str, data: bytes, mtime: int) -> None:
+        if self.fmt == "zip":
+            info = zipfile.ZipInfo(name, datetime.fromtimestamp(mtime).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = mtime
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def metadata(self) -> dict[str, str]:
+        """Return the GCS object metadata describing this bundle."""
+        return {
+            "bundle-format": self.fmt,
+            "bundle-members": str(len(self.members)),
+            "bundle-bytes": str(self.raw_bytes),
+            "bundle-manifest-encoding": "base64+zlib+json:[name,size,sha256]",
+            "bundle-manifest": encode_manifest(self.members),
+        }
+
+    def close(self) -> None:
+        """Close and delete the archive file."""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class Bundler:
+    """
+    Pack one BIP's small files into archive objects instead of one object each.
+
+    Each bundle is written to a staging file whose max_bytes are reserved
+    before its first member is read, and is uploaded with
+    if_generation_match=0, so an existing object is never overwritten.
+    Members are reported as moved only once their bundle is stored in at
+    least min_uploads buckets; the caller deletes the remote files after that.
+    """
+
+    def __init__(
+        self,
+        fmt: str,
+        *,
+        bip_name: str,
+        blob_prefix: str,
+        max_bytes: int,
+        staging: StagingArea,
+        upload: Callable[..., list[str]],
+        min_uploads: int = 1,
+        progress: ProgressTracker | None = None,
+        span: Callable[..., ContextManager[dict]] | None = None,
+        inspect: Callable[[RemoteFile, bytes], CsvInspection | None] | None = None,
+        quarantine: Callable[[RemoteFile, CsvInspection | None], tuple[str, bool]] | None = None,
+        throttle: Callable[[int], None] | None = None,
+    ) -> None:
+        """
+        Args:
+            fmt: "tar.gz" or "zip".
+            bip_name: Used in bundle object names.
+            blob_prefix: Object name prefix for bundles.
+            max_bytes: Uncompressed bytes after which a bundle is uploaded;
+                also the staging space reserved for each bundle.
+            staging: Staging area the bundle files are reserved in.
+            upload: Uploads a local file to every bucket at the same time,
+                called as upload(path, buckets, blob_name, metadata) plus
+                if_generation_match for bundles; returns the names of the
+                buckets it failed for.
+            min_uploads: Buckets that must store a bundle before its members
+                count as moved.
+            progress: Tracks each member's read, with its per-file deadline.
+            span: Records each member's read as a "download" span, called
+                like Fetcher._span.
+            inspect: Optional check run on each file's data before it is
+                bundled; returns None for files it does not apply to.
+            quarantine: Maps a file that failed inspection to its blob name
+                and whether that name is a quarantine location. Quarantined
+                files are uploaded on their own instead of being bundled.
+            throttle: Called with the size of each block read; it may block
+                to slow reads down.
+        """
+        self.fmt = fmt
+        self.bip_name = bip_name
+        self.blob_prefix = blob_prefix
+        self.max_bytes = max_bytes
+        self.staging = staging
+        self.upload = upload
+        self.min_uploads = min_uploads
+        self.progress = progress or ProgressTracker()
+        self.span = span or _no_span
+        self.inspect = inspect
+        self.quarantine = quarantine
+        self.throttle = throttle
+        self._writer: BundleWriter | None = None
+        # Reservation held in staging for the bundle being built
+        self._staged: RemoteFile | None = None
+        self._pending: list[tuple[RemoteFile, CsvInspection | None]] = []
+
+    def add(
+        self, sftp_client: paramiko.SFTPClient, buckets: list, remote_file: RemoteFile
+    ) -> list[tuple[FileResult, RemoteFile]]:
+        """
+        Download remote_file into the current bundle.
+
+        Returns:
+            Results for a bundle that had to be uploaded to make room, plus a
+            result for remote_file if it could not be read, was quarantined,
+            or was deferred because staging had no room for a new bundle.
+        """
+        try:
+            data = self._read(sftp_client, remote_file)
+        except Exception as e:
+            logging.error(f"Failed to download {remote_file.relative_path} for bundling: {e}")
+            return [
+                (
+                    FileResult(
+                        name=remote_file.relative_path,
+                        success=False,
+                        stage="download",
+                        error_message=str(e),
+                    ),
+                    remote_file,
+                )
+            ]
+
+        inspection = self.inspect(remote_file, data) if self.inspect else None
+        if inspection is not None and not inspection.valid and self.quarantine:
+            blob_name, quarantined = self.quarantine(remote_file, inspection)
+            if quarantined:
+                result = self._upload_single(
+                    buckets, remote_file, blob_name, data, inspection
+                )
+                return [(result, remote_file)]
+
+        results: list[tuple[FileResult, RemoteFile]] = []
+        if self._writer is not None and not self._writer.fits(
+            remote_file.relative_path, data, self.max_bytes
+        ):
+            results = self.flush(buckets)
+        if self._writer is None and not self._open_writer():
+            results.append((self._deferred(remote_file), remote_file))
+            return results
+        self._writer.add(remote_file.relative_path, data, remote_file.mtime)
+        self._pending.append((remote_file, inspection))
+        return results
+
+    def _read(self, sftp_client: paramiko.SFTPClient, remote_file: RemoteFile) -> bytes:
+        """Read remote_file in blocks, tracking progress against its deadline."""
+        size = remote_file.size or 0
+        progress = self.progress.start(remote_file.relative_path, "download", size)
+        try:
+            with self.span(
+                "download", remote_file.relative_path, size=size, bundled=True
+            ), sftp_client.open(remote_file.remote_path, "rb") as fp:
+                reader = ProgressReader(fp, progress)
+                blocks = []
+                while block := reader.read(BUNDLE_READ_BLOCK_SIZE):
+                    if self.throttle:
+                        self.throttle(len(block))
+                    blocks.append(block)
+            return b"".join(blocks)
+        finally:
+            self.progress.finish(progress)
+
+    def _open_writer(self) -> bool:
+        """Reserve staging space for a new bundle and start writing it."""
+        name = (
+            f"{self.bip_name}_{datetime.now():%Y%m%dT%H%M%S}_"
+            f"{uuid.uuid4().hex[:8]}.{self.fmt}"
+        )
+        staged = RemoteFile(
+            name=name, remote_path="", relative_path=name, size=self.max_bytes
+        )
+        if not self.staging.reserve(staged):
+            logging.warning(
+                f"Not enough staging space for a {self.max_bytes}-byte bundle; "
+                "leaving small files for the next run."
+            )
+            return False
+        # The .part suffix lets clean_staging remove a bundle left by a crash.
+        path = Path(self.staging.path_for(staged) + PART_SUFFIX)
+        try:
+            self._writer = BundleWriter(self.fmt, path)
+        except Exception:
+            self.staging.release(staged)
+            raise
+        self._staged = staged
+        return True
+
+    @staticmethod
+    def _deferred(remote_file: RemoteFile) -> FileResult:
+        return FileResult(
+            name=remote_file.relative_path,
+            success=False,
+            stage="deferred",
+            error_message="Not enough staging space",
+        )
+
+    def _upload_single(
+        self,
+        buckets: list,
+        remote_file: RemoteFile,
+        blob_name: str,
+        data: bytes,
+        inspection: CsvInspection,
+    ) -> FileResult:
+        """Upload one quarantined file as its own object through staging."""
+        name = remote_file.relative_path
+        if not self.staging.reserve(remote_file):
+            return self._deferred(remote_file)
+        path = Path(self.staging.path_for(remote_file))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            failed = self.upload(
+                path, buckets, blob_name, inspection_metadata(inspection)
+            )
+        except Exception as e:
+            logging.error(f"Failed to stage {name} for upload: {e}")
+            failed = [bucket.name for bucket in buckets]
+        finally:
+            path.unlink(missing_ok=True)
+            self.staging.release(remote_file)
+        if len(buckets) - len(failed) < self.min_uploads:
+            return FileResult(
+                name=name,
+                success=False,
+                stage="upload",
+                error_message=f"Upload failed for bucket(s): {', '.join(failed)}",
+            )
+        return FileResult(
+            name=name,
+            success=True,
+            stage="download",
+            error_message=inspection.error,
+            row_count=inspection.row_count,
+            schema_hash=inspection.schema_hash,
+            quarantined=True,
+            blob_name=blob_name,
+        )
+
+    def flush(self, buckets: list) -> list[tuple[FileResult, RemoteFile]]:
+        """
+        Upload the current bundle, if any, to every bucket at the same time.
+
+        Returns:
+            One result per member: a successful "download" result when the
+            bundle is stored in at least min_uploads buckets, or a failed
+            "upload" result otherwise.
+        """
+        writer, self._writer = self._writer, None
+        staged, self._staged = self._staged, None
+        pending, self._pending = self._pending, []
+        if writer is None:
+            return []
+
+        blob_name = f"{self.blob_prefix}{staged.name}"
+        try:
+            size = writer.finish()
+            logging.info(
+                f"Uploading bundle {blob_name} ({len(writer)} files, "
+                f"{writer.raw_bytes} bytes -> {size} bytes)"
+            )
+            failed = self.upload(
+                writer.path,
+                buckets,
+                blob_name,
+                writer.metadata(),
+                if_generation_match=0,
+            )
+            error = f"failed for bucket(s): {', '.join(failed)}"
+        except Exception as e:
+            failed = [bucket.name for bucket in buckets]
+            error = f"failed: {e}"
+        finally:
+            writer.close()
+            self.staging.release(staged)
+
+        if len(buckets) - len(failed) < max(1, self.min_uploads):
+            error_msg = f"Bundle upload {blob_name} {error}"
+            logging.error(error_msg)
+            return [
+                (
+                    FileResult(
+                        name=f.relative_path,
+                        success=False,
+                        stage="upload",
+                        error_message=error_msg,
+                    ),
+                    f,
+                )
+                for f, _ in pending
+            ]
+        if failed:
+            logging.warning(f"Bundle {blob_name} is missing from {', '.join(failed)}")
+
+        return [
+            (
+                FileResult(
+                    name=f.relative_path,
+                    success=True,
+                    stage="download",
+                    error_message=inspection.error if inspection else "",
+                    row_count=inspection.row_count if inspection else None,
+                    schema_hash=inspection.schema_hash if inspection else "",
+                    blob_name=blob_name,
+                ),
+                f,
+            )
+            for f, inspection in pending
+        ]
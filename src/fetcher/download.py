@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import paramiko
+
+# Reads in a download are issued and written in blocks of this size.
+RANGE_BLOCK_SIZE = 1024 * 1024
+
+# Progress is written to the .part sidecar after this many new bytes.
+CHECKPOINT_BYTES = 8 * 1024 * 1024
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+
+def split_ranges(size: int, streams: int) -> list[tuple[int, int]]:
+    """Split [0, size) into at most streams contiguous (start, end) ranges."""
+    if size <= 0:
+        return []
+    streams = max(1, min(streams, size // RANGE_BLOCK_SIZE or 1))
+    step = -(-size // streams)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def preallocate(local_path: str, size: int) -> None:
+    """Create local_path at its final size so ranges can be written in place."""
+    with open(local_path, "wb") as fp:
+        if size and hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fp.fileno(), 0, size)
+        else:
+            fp.truncate(size)
+
+
+def verify_size(
+    sftp_client: paramiko.SFTPClient, remote_path: str, local_path: str, size: int
+) -> None:
+    """
+    Check that the local copy and the remote file both still have size bytes.
+
+    Raises:
+        IOError: If either size differs, such as when the remote file changed
+            during the transfer.
+    """
+    local_size = os.path.getsize(local_path)
+    remote_size = sftp_client.stat(remote_path).st_size
+    if local_size != size or remote_size != size:
+        raise IOError(
+            f"Size mismatch for '{remote_path}': expected {size} bytes, "
+            f"local copy has {local_size}, remote now has {remote_size}"
+        )
+
+
+class PartialDownload:
+    """
+    A download staged in <local_path>.part with its progress in a sidecar.
+
+    The sidecar (<local_path>.part.json) records the remote size and mtime,
+    how far each byte range has been written, and how many times the
+    download was retried. A later attempt resumes from those offsets only
+    when the remote size and mtime are unchanged; otherwise the partial data
+    is discarded and the download starts over.
+    """
+
+    def __init__(self, local_path: str, size: int, mtime: int | None) -> None:
+        self.local_path = local_path
+        self.part_path = local_path + PART_SUFFIX
+        self.state_path = local_path + STATE_SUFFIX
+        self.size = size
+        self.mtime = mtime
+        self.spans: list[list[int]] = []
+        # Earlier attempts at this download, and the bytes they left that
+        # this attempt keeps.
+        self.retries = 0
+        self.resumed_bytes = 0
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+    def prepare(self, streams: int) -> list[list[int]]:
+        """
+        Resume the sidecar's ranges or start a fresh pre-allocated .part file.
+
+        Returns:
+            [start, done, end] offsets for each byte range.
+        """
+        state = self._load_state()
+        self.retries = state.get("retries", 0) + 1 if state else 0
+        if (
+            state
+            and state.get("size") == self.size
+            and state.get("mtime") == self.mtime
+            and os.path.exists(self.part_path)
+            and os.path.getsize(self.part_path) == self.size
+        ):
+            self.spans = [list(span) for span in state["ranges"]]
+            self.resumed_bytes = sum(done - start for start, done, _ in self.spans)
+            logging.info(
+                f"Resuming {self.local_path} from partial download "
+                f"({self.resumed_bytes}/{self.size} bytes already written)"
+            )
+        else:
+            if state or os.path.exists(self.part_path):
+                logging.info(
+                    f"Discarding stale partial download for {self.local_path}; "
+                    "remote file changed or progress is missing."
+                )
+            preallocate(self.part_path, self.size)
+            self.spans = [
+                [start, start, end] for start, end in split_ranges(self.size, streams)
+            ]
+        self.save()
+        return self.spans
+
+    def advance(self, index: int, done: int, written: int) -> None:
+        """Record that range index is written up to done, checkpointing periodically."""
+        with self._lock:
+            self.spans[index][1] = done
+            self._unsaved += written
+            if self._unsaved < CHECKPOINT_BYTES:
+                return
+        self.save()
+
+    def save(self) -> None:
+        """Write the sidecar atomically so a crash never leaves it half-written."""
+        with self._lock:
+            state = {
+                "size": self.size,
+                "mtime": self.mtime,
+                "ranges": self.spans,
+                "retries": self.retries,
+            }
+            self._unsaved = 0
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fp:
+                json.dump(state, fp)
+            os.replace(tmp_path, self.state_path)
+
+    def complete(self) -> None:
+        """
+        Move the finished .part file into place and drop the sidecar.
+
+        Raises:
+            IOError: If any byte range is still incomplete.
+        """
+        missing = sum(end - done for _, done, end in self.spans)
+        if missing:
+            raise IOError(f"{missing} byte(s) of {self.local_path} were not written")
+        os.replace(self.part_path, self.local_path)
+        os.remove(self.state_path)
+
+    def _load_state(self) -> dict | None:
+        try:
+            with open(self.state_path, encoding="utf-8") as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable download state {self.state_path}: {e}")
+            return None
+
+
+def _fetch_range(
+    sftp_client: paramiko.SFTPClient,
+    remote_path: str,
+    partial: PartialDownload,
+    index: int,
+    stop: threading.Event,
+    prefetch: bool,
+    max_concurrent_prefetch_requests: int | None,
+    progress: Callable[[int], None] | None,
+    on_data: Callable[[int, bytes], None] | None,
+    throttle: Callable[[int], None] | None,
+) -> None:
+    """Read one byte range into the .part file, recording progress as it goes."""
+    _, done, end = partial.spans[index]
+    with sftp_client.open(remote_path, "rb") as remote, open(
+        partial.part_path, "r+b"
+    ) as local:
+        remote.seek(done)
+        local.seek(done)
+        if prefetch:
+            remote.prefetch(end, max_concurrent_prefetch_requests)
+        while done < end:
+            if stop.is_set():
+                return
+            data = remote.read(min(RANGE_BLOCK_SIZE, end - done))
+            if not data:
+                raise IOError(
+                    f"Unexpected end of '{remote_path}' at offset {done} of {end}"
+                )
+            if throttle:
+                throttle(len(data))
+            if on_data:
+                on_data(done, data)
+            local.write(data)
+            local.flush()
+            done += len(data)
+            partial.advance(index, done, len(data))
+            if progress:
+                progress(len(data))
+
+
+def download_file(
+    sftp_client: paramiko.SFTPClient,
+    open_channel: Callable[[], paramiko.SFTPClient],
+    remote_path: str,
+    local_path: str,
+    *,
+    size: int,
+    mtime: int | None,
+    streams: int = 1,
+    prefetch: bool = True,
+    max_concurrent_prefetch_requests: int | None = None,
+    progress: Callable[[int], None] | None = None,
+    on_data: Callable[[int, bytes], None] | None = None,
+    throttle: Callable[[int], None] | None = None,
+    on_start: Callable[[PartialDownload], None] | None = None,
+) -> None:
+    """
+    Download one remote file through a resumable .part file.
+
+    With streams above 1 the file is split into byte ranges that are read
+    concurrently, each over its own SFTP channel, and written at their offsets
+    in a pre-allocated .part file. Progress is kept in a sidecar so a failed
+    download resumes on the next attempt. The file is renamed into place only
+    after every range is written and the remote size is re-checked.
+
+    Args:
+        sftp_client: Channel used for single-range downloads and the size check.
+        open_channel: Opens extra SFTP channels for parallel ranges.
+        remote_path: File to download.
+        local_path: Final destination, replaced once the download completes.
+        size: Remote file size in bytes.
+        mtime: Remote modification time, used to detect a changed file.
+        streams: Number of byte ranges read at the same time.
+        prefetch: Whether reads are pipelined ahead of the writer.
+        max_concurrent_prefetch_requests: Outstanding reads per range.
+        progress: Called with the byte count of every written block, from
+            the range threads; exceptions it raises abort the download.
+        on_data: Called with the offset and bytes of every block before it
+            is written, from the range threads, so the data can be inspected
+            without reading the file again.
+        throttle: Called with the byte count of every block read, from the
+            range threads; it may block to slow the download down.
+        on_start: Called with the prepared partial download before any data
+            is read, so its retries and resumed_bytes can be recorded.
+    """
+    partial = PartialDownload(local_path, size, mtime)
+    spans = partial.prepare(streams)
+    if on_start:
+        on_start(partial)
+    if progress:
+        progress(sum(done - start for start, done, _ in spans))
+    pending = [i for i, (_, done, end) in enumerate(spans) if done < end]
+    stop = threading.Event()
+
+    def fetch(index: int, channel: paramiko.SFTPClient) -> None:
+        try:
+            _fetch_range(
+                channel,
+                remote_path,
+                partial,
+                index,
+                stop,
+                prefetch,
+                max_concurrent_prefetch_requests,
+                progress,
+                on_data,
+                throttle,
+            )
+        except Exception:
+            stop.set()
+            raise
+
+    def fetch_on_new_channel(index: int) -> None:
+        channel = open_channel()
+        try:
+            fetch(index, channel)
+        finally:
+            channel.close()
+
+    try:
+        if len(pending) == 1:
+            fetch(pending[0], sftp_client)
+        elif pending:
+            logging.info(
+                f"Downloading {remote_path} ({size} bytes) as {len(pending)} parallel ranges"
+            )
+            with ThreadPoolExecutor(
+                max_workers=len(pending), thread_name_prefix="sftp-range"
+            ) as pool:
+                futures = [pool.submit(fetch_on_new_channel, i) for i in pending]
+                for future in futures:
+                    future.result()
+    finally:
+        partial.save()
+
+    verify_size(sftp_client, remote_path, partial.part_path, size)
+    partial.complete()
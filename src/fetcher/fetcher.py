@@ -1,41 +1,261 @@
+import dataclasses
+import functools
 import logging
 import os
+import stat
 import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable
 
 import paramiko
 from google.cloud import storage
 
-from models import BIPSummary, FileResult, SFTPConfig
+from models import (
+    BIPSummary,
+    CsvInspection,
+    FileResult,
+    PreflightResult,
+    RemoteFile,
+    SFTPConfig,
+    TraceSpan,
+)
+from report import Tracer
+from runctl import JobFile, RunBudget, RunStatus
 from sender import Sender
 
+from . import aio
+from .backend import TRANSFER_BACKENDS, ThreadBackend, TransferBackend
+from .bundle import BUNDLE_FORMATS, Bundler
+from .download import download_file
+from .inspection import CsvInspector, inspection_metadata
+from .lease import LeaseKeeper, LeaseStore
+from .naming import BlobNamer
+from .progress import ProgressReader, ProgressTracker, TransferStalled
+from .remover import BatchRemover
+from .selector import FileSelector
+from .staging import StagingArea
+from .throttle import BandwidthLimiter
+from .tuning import make_transport_factory
+from .walker import RemoteWalker
+
+# Supported values for SFTPConfig.transfer_order.
+TRANSFER_ORDERS = ("listing", "largest_first", "smallest_first", "oldest_first")
+
+# Supported values for SFTPConfig.upload_success_policy.
+UPLOAD_SUCCESS_POLICIES = ("all", "quorum")
+
+# Most transfer threads a job file reload can raise max_concurrent_transfers to.
+MAX_TRANSFER_THREADS = 32
+
+# Pre-flight checks, in the order they run.
+PREFLIGHT_CHECKS = ("config", "key", "ssh", "remote_path", "buckets")
+
+
+class ConnectionSetupError(RuntimeError):
+    """
+    Raised when the SFTP connection for a BIP cannot be set up.
+
+    Attributes:
+        subject: Notification subject suffix, or None when no email is sent.
+    """
+
+    def __init__(self, message: str, subject: str | None = None) -> None:
+        super().__init__(message)
+        self.subject = subject
+
 
 class Fetcher:
     """Move matching files for one BIP from SFTP into a GCS bucket."""
 
     def __init__(
-        self, config: SFTPConfig, email_sender: Sender, bip_name: str = "UNKNOWN"
+        self,
+        config: SFTPConfig,
+        email_sender: Sender | None,
+        bip_name: str = "UNKNOWN",
+        notify: bool = True,
+        budget: RunBudget | None = None,
+        leases: LeaseStore | None = None,
+        status: RunStatus | None = None,
+        jobs: JobFile | None = None,
+        tracer: Tracer | None = None,
     ) -> None:
         """
         Initialize GCS access and validate the local download directory.
 
+        Args:
+            config: Connection, selection, and transfer settings for the BIP.
+            email_sender: Sender used for failure notifications; None sends
+                nothing, as for survey and pre-flight instances.
+            bip_name: Name used in logs, notifications, and summaries.
+            notify: Whether failures are emailed; survey-only instances pass
+                False so the real run is the one that reports problems.
+            budget: Run-wide time budget; once it runs low no new file is
+                started and the rest are reported as deferred.
+            leases: Store shared with other runners; when set, every file is
+                leased before it is transferred and files leased by another
+                runner are left to it.
+            status: Live run status; fetch_files attaches its counters to it
+                for the status endpoint.
+            jobs: Job file; the BIP's max_concurrent_transfers and bandwidth
+                limit are re-read from it before each file is started, so
+                edits take effect during the run.
+            tracer: Trace file writer; each file's download, uploads, and
+                remote deletion are recorded as spans.
+
         Raises:
-            RuntimeError: If the GCS client cannot be created or local_path is missing.
+            RuntimeError: If the GCS client cannot be created, a staging
+                directory is missing, or the file selection or transfer
+                order is invalid.
         """
         self.hostname = config.hostname
         self.email_sender = email_sender
         self.bip_name = bip_name
+        self.notify = notify
+        self.budget = budget
+        self.leases = leases
+        self.status = status
+        self.jobs = jobs
+        self.tracer = tracer
         self.port = config.port
         self.username = config.username
         self.key_passphrase = config.key_passphrase
         self.path_to_key = os.path.expanduser(config.path_to_key)
-        self.local_path = os.path.expanduser(config.local_path)
-        self.target_file_type = config.target_file_type
+        self.local_paths = [
+            os.path.expanduser(p.strip()) for p in config.local_path.split(",") if p.strip()
+        ] or [os.path.expanduser(config.local_path)]
+        self.local_path = self.local_paths[0]
         self.remote_path = config.remote_path
+        self.recursive = config.recursive
+        self.max_depth = config.max_depth
+        self.listing_concurrency = config.listing_concurrency
+        self.delete_batch_size = config.delete_batch_size
+        self.tuning = config.tuning
+        self.ranged_download_threshold = config.ranged_download_threshold
+        self.ranged_download_streams = config.ranged_download_streams
+        self.max_concurrent_transfers = max(1, config.max_concurrent_transfers)
+        self.configured_transfers = self.max_concurrent_transfers
+        self.limiter = BandwidthLimiter(config.bandwidth_limit_bytes_per_s)
+        self.transfer_pause_s = config.transfer_pause_s
+        self.transfer_order = config.transfer_order
+        self.bundle_format = config.bundle_format
+        self.bundle_max_file_size = config.bundle_max_file_size
+        self.bundle_max_bytes = config.bundle_max_bytes
+        self.bundle_prefix = config.bundle_prefix
+        self.csv_inspection = config.csv_inspection
+        self.csv_expected_header = [
+            c.strip() for c in config.csv_expected_header.split(",") if c.strip()
+        ] or None
+        self.csv_quarantine_prefix = config.csv_quarantine_prefix
+        # 0 disables stall detection for downloads and uploads alike
+        self.stall_timeout_s = config.stall_timeout_s or None
+        self.progress_log_interval_s = config.progress_log_interval_s
+        self.progress = ProgressTracker(
+            deadline_base_s=config.file_deadline_base_s,
+            deadline_min_bytes_per_s=config.file_deadline_min_bytes_per_s,
+        )
         self.bucket_name = config.bucket_name
+        self.bucket_names = [
+            b.strip() for b in config.bucket_name.split(",") if b.strip()
+        ] or [config.bucket_name]
+        self.upload_success_policy = config.upload_success_policy
+        self.blob_name_template = config.blob_name_template
+        self.transfer_backend = config.transfer_backend
         self.path_to_gcs_credentials = config.path_to_gcs_credentials
 
+        try:
+            self.selector = FileSelector.from_config(config)
+        except ValueError as e:
+            error_msg = f"Invalid file selection for {self.bip_name}: {e}"
+            logging.error(error_msg)
+            self._safe_notify(
+                kind="File selection invalid",
+                body=error_msg,
+            )
+            raise RuntimeError(error_msg)
+
+        if self.transfer_order not in TRANSFER_ORDERS:
+            error_msg = (
+                f"Invalid transfer order for {self.bip_name}: '{self.transfer_order}'. "
+                f"Expected one of {', '.join(TRANSFER_ORDERS)}."
+            )
+            logging.error(error_msg)
+            self._safe_notify(
+                kind="Transfer order invalid",
+                body=error_msg,
+            )
+            raise RuntimeError(error_msg)
+
+        if self.upload_success_policy not in UPLOAD_SUCCESS_POLICIES:
+            error_msg = (
+                f"Invalid upload success policy for {self.bip_name}: "
+                f"'{self.upload_success_policy}'. "
+                f"Expected one of {', '.join(UPLOAD_SUCCESS_POLICIES)}."
+            )
+            logging.error(error_msg)
+            self._safe_notify(
+                kind="Upload policy invalid",
+                body=error_msg,
+            )
+            raise RuntimeError(error_msg)
+        # Buckets that must hold a file before it is deleted from the server.
+        # A quorum is a strict majority, so with two buckets both must hold
+        # the file and a single copy is never the only one left.
+        if self.upload_success_policy == "all":
+            self.min_uploads = len(self.bucket_names)
+        else:
+            self.min_uploads = len(self.bucket_names) // 2 + 1
+
+        try:
+            self.namer = BlobNamer(self.blob_name_template, self.bip_name)
+        except ValueError as e:
+            error_msg = f"Invalid blob naming for {self.bip_name}: {e}"
+            logging.error(error_msg)
+            self._safe_notify(
+                kind="Blob naming invalid",
+                body=error_msg,
+            )
+            raise RuntimeError(error_msg)
+
+        if self.transfer_backend not in TRANSFER_BACKENDS or (
+            self.transfer_backend == "asyncio" and not aio.available()
+        ):
+            error_msg = (
+                f"Invalid transfer backend for {self.bip_name}: '{self.transfer_backend}'. "
+                f"Expected one of {', '.join(TRANSFER_BACKENDS)}."
+            )
+            if self.transfer_backend == "asyncio":
+                error_msg = (
+                    f"The asyncio transfer backend for {self.bip_name} needs asyncssh "
+                    "and aiohttp: uv sync --extra async"
+                )
+            logging.error(error_msg)
+            self._safe_notify(
+                kind="Transfer backend invalid",
+                body=error_msg,
+            )
+            raise RuntimeError(error_msg)
+
+        if self.bundle_format and self.bundle_format not in BUNDLE_FORMATS:
+            error_msg = (
+                f"Invalid bundle format for {self.bip_name}: '{self.bundle_format}'. "
+                f"Expected one of {', '.join(BUNDLE_FORMATS)}."
+            )
+            logging.error(error_msg)
+            self._safe_notify(
+                kind="Bundle format invalid",
+                body=error_msg,
+            )
+            raise RuntimeError(error_msg)
+
         # init google GCS credentials
         logging.info("Initializing Google Cloud Storage client.")
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.path_to_gcs_credentials
@@ -45,188 +265,386 @@ class Fetcher:
             error_msg = f"Failed to initialize Google Cloud Storage client: {e}"
             logging.error(error_msg)
             self._safe_notify(
-                    subject=f"[{self._now_str()}] [{self.bip_name}] GCS init failed",
-                    body=error_msg,
-                )
-            raise RuntimeError(error_msg)
-
-        logging.info(f"Checking if local_path exists: {self.local_path}")
-        if not os.path.exists(self.local_path):
-            error_msg = f"Required directory '{self.local_path}' does not exist."
-            logging.fatal(error_msg)
-            self._safe_notify(
-                subject=f"[{self._now_str()}] [{self.bip_name}] Local path not found",
+                kind="GCS init failed",
                 body=error_msg,
             )
             raise RuntimeError(error_msg)
 
-        logging.info(
-            "Fetcher initialized with the following parameters: "
-            f"hostname={self.hostname}, port={self.port}, username={self.username}, "
-            f"local_path={self.local_path}, path_to_key={self.path_to_key}, "
-            f"target_file_type={self.target_file_type}, remote_path={self.remote_path}"
-        )
+        for local_path in self.local_paths:
+            logging.info(f"Checking if local_path exists: {local_path}")
+            if not os.path.exists(local_path):
+                error_msg = f"Required directory '{local_path}' does not exist."
+                logging.fatal(error_msg)
+                self._safe_notify(
+                    kind="Local path not found",
+                    body=error_msg,
+                )
+                raise RuntimeError(error_msg)
+        self.staging = StagingArea(self.local_paths, config.staging_min_free_bytes)
+
+        settings = dataclasses.asdict(config)
+        settings["key_passphrase"] = "***" if config.key_passphrase else ""
+        logging.debug(f"Fetcher initialized for {self.bip_name}: {settings}")
 
     @staticmethod
     def _now_str() -> str:
         """Return the current local timestamp for logs and email subjects."""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def _safe_notify(self, *, subject: str, body: str) -> None:
-        """Send a notification email without propagating SMTP failures."""
+    def _safe_notify(self, *, kind: str, body: str) -> None:
+        """
+        Send a notification email without propagating SMTP failures.
+
+        The sender suppresses repeats of the same kind and error for this
+        BIP while they are within its cool-down.
+        """
+        if not self.notify or self.email_sender is None:
+            return
         try:
-            self.email_sender.send(subject=subject, body=body)
+            self.email_sender.notify(
+                bip_name=self.bip_name,
+                kind=kind,
+                subject=f"[{self._now_str()}] [{self.bip_name}] {kind}",
+                body=body,
+            )
         except Exception as notify_error:
             logging.error(f"Failed to send notification email: {notify_error}")
 
-    def _upload_file_to_gcs(self, file_path: Path, bucket) -> bool:
+    def _span(self, name: str, file_name: str, **attributes):
+        """
+        Return a context manager that records the enclosed step as a span.
+
+        It yields the span's attributes for the step to add to; without a
+        tracer it records nothing.
+        """
+        if self.tracer is None:
+            return nullcontext(attributes)
+        return self.tracer.span(
+            name, bip_name=self.bip_name, file_name=file_name, **attributes
+        )
+
+    def _staged_name(self, local_file: Path) -> str:
+        """Return local_file's path relative to its staging directory."""
+        root = self.staging.root_of(local_file)
+        if root is None:
+            return local_file.name
+        return local_file.resolve().relative_to(root).as_posix()
+
+    def _trace_deletion(
+        self, result: FileResult, start: float, duration_s: float, batch: int
+    ) -> None:
+        """Record one remote deletion from a batch as a span."""
+        if self.tracer is None:
+            return
+        self.tracer.record(
+            TraceSpan(
+                run_id=self.tracer.run_id,
+                bip_name=self.bip_name,
+                file_name=result.name,
+                name="delete",
+                start=start,
+                duration_s=duration_s,
+                success=result.success,
+                error=result.error_message,
+                attributes={"host": self.hostname, "batch": batch},
+            )
+        )
+
+    def _upload_to_bucket(
+        self,
+        file_path: Path,
+        bucket,
+        blob_name: str,
+        metadata: dict[str, str] | None = None,
+        if_generation_match: int | None = None,
+    ) -> bool:
         """
-        Upload one local file to an existing GCS bucket.
+        Upload one local file to an existing GCS bucket as blob_name.
+
+        metadata, when given, is stored as the object's custom metadata.
+        if_generation_match is passed to GCS as a precondition; 0 never
+        overwrites an existing object.
 
         Returns True when the upload succeeds. On failure, logs the error,
-        sends a notification, and returns False so the caller can retain the
-        local file and skip remote deletion.
+        sends a notification, and returns False.
         """
 
-        # Upload the file.
+        # Upload the file, streaming it through the progress tracker so the
+        # per-file deadline applies; stalled HTTP requests hit the timeout.
+        progress = None
         try:
-            logging.info(f"Uploading file {file_path.name}")
-            blob = bucket.blob(file_path.name)
-            blob.upload_from_filename(filename=str(file_path))
+            target = blob_name
+            if len(self.bucket_names) > 1:
+                target = f"gs://{bucket.name}/{blob_name}"
+            logging.info(f"Uploading file {target}")
+            blob = bucket.blob(blob_name)
+            if metadata:
+                blob.metadata = metadata
+            size = file_path.stat().st_size
+            progress = self.progress.start(target, "upload", size)
+            with self._span(
+                "upload",
+                self._staged_name(file_path),
+                size=size,
+                bucket=bucket.name,
+                blob=blob_name,
+            ), open(file_path, "rb") as fp:
+                blob.upload_from_file(
+                    ProgressReader(fp, progress),
+                    size=size,
+                    timeout=self.stall_timeout_s,
+                    if_generation_match=if_generation_match,
+                )
             return True
 
         except Exception as e:
-            error_msg = f"Failed to upload file {file_path.name}: {e}"
-            logging.error(error_msg)
-            self._safe_notify(
-                subject=f"[{self._now_str()}] [{self.bip_name}] Upload failed",
-                body=error_msg,
-            )
+            self._upload_failed(bucket.name, blob_name, e)
             return False
+        finally:
+            if progress is not None:
+                self.progress.finish(progress)
+
+    def _upload_failed(self, bucket_name: str, blob_name: str, error: Exception) -> None:
+        """Log and notify a failed upload of blob_name to one bucket."""
+        error_msg = f"Failed to upload file {blob_name} to bucket '{bucket_name}': {error}"
+        logging.error(error_msg)
+        self._safe_notify(
+            kind="Upload failed",
+            body=error_msg,
+        )
 
-    def fetch_files(self) -> BIPSummary:
+    def _upload_file_to_gcs(
+        self,
+        file_path: Path,
+        buckets: list,
+        blob_name: str,
+        metadata: dict[str, str] | None = None,
+        if_generation_match: int | None = None,
+    ) -> list[str]:
         """
-        Fetch matching remote files, upload them to GCS, and clean up.
+        Upload one local file to every destination bucket at the same time.
 
-        Only files ending with target_file_type are processed. Each file is
-        downloaded locally, uploaded to GCS, removed locally after upload
-        success, and deleted from SFTP only after the GCS upload succeeds.
-        Per-file failures are recorded in the returned summary instead of
-        aborting the rest of the BIP run.
+        The file is downloaded once; each bucket's upload reads the local
+        staging copy on its own thread.
 
         Returns:
-            Summary of downloaded, deleted, and failed file operations.
+            Names of the buckets the upload failed for; empty on full success.
         """
-        # Result tracking lists
-        downloaded: list[FileResult] = []
-        deleted: list[FileResult] = []
-        failed_downloads: list[FileResult] = []
-        failed_deletions: list[FileResult] = []
-        target_files: list[str] = []
-
-        # Initialize SSH client
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if len(buckets) == 1:
+            ok = self._upload_to_bucket(
+                file_path, buckets[0], blob_name, metadata, if_generation_match
+            )
+            return [] if ok else [buckets[0].name]
 
-        # Record total runtime start
-        overall_start = time.perf_counter()
+        with ThreadPoolExecutor(
+            max_workers=len(buckets), thread_name_prefix="upload"
+        ) as pool:
+            futures = {
+                pool.submit(
+                    self._upload_to_bucket,
+                    file_path,
+                    bucket,
+                    blob_name,
+                    metadata,
+                    if_generation_match,
+                ): bucket.name
+                for bucket in buckets
+            }
+            return [name for future, name in futures.items() if not future.result()]
 
-        # attempt connection
-        try:
-            logging.info(
-                f"Attempting to connect to {self.hostname}:{self.port} as {self.username}"
-            )
+    def _get_buckets(self) -> list:
+        """
+        Look up every destination bucket.
 
-            # Require key-based auth only
-            if not self.path_to_key:
-                error_msg = "SFTP key path not provided; this script requires key-based authentication."
-                logging.fatal(error_msg)
+        Returns:
+            The buckets that could be accessed. Each one that could not is
+            logged and notified.
+        """
+        buckets = []
+        for name in self.bucket_names:
+            try:
+                buckets.append(self.gcs_client.get_bucket(name))
+            except Exception as e:
+                error_msg = f"Could not access GCS bucket '{name}': {e}"
+                logging.error(error_msg)
                 self._safe_notify(
-                    subject=f"[{self._now_str()}] [{self.bip_name}] Key path missing",
+                    kind="Bucket access failed",
                     body=error_msg,
                 )
-                duration = time.perf_counter() - overall_start
-                return BIPSummary(
-                    bip_name=self.bip_name,
-                    files_found=0,
-                    downloaded=[],
-                    deleted=[],
-                    failed_downloads=[],
-                    failed_deletions=[],
-                    duration_s=duration,
-                    status="failed",
-                )
+        return buckets
 
-            # Load the private key (supports RSA, DSA, ECDSA, Ed25519, and OpenSSH format)
-            private_key = None
-            key_load_error = None
+    def _missing_buckets(self, buckets: list) -> list[str]:
+        """Return the configured bucket names that are not in buckets."""
+        reachable = {bucket.name for bucket in buckets}
+        return [name for name in self.bucket_names if name not in reachable]
 
-            # ACI's SFTP server only supports Ed25519 and 4096-bit RSA keys
-            key_attempt_errors: list[str] = []
-            for key_class in (paramiko.RSAKey, paramiko.Ed25519Key):
-                try:
-                    private_key = key_class.from_private_key_file(
-                        self.path_to_key, password=self.key_passphrase
-                    )
+    def _download_file(
+        self,
+        sftp_client,
+        open_channel,
+        remote_file: RemoteFile,
+        local_file_path: str,
+        inspector: CsvInspector | None = None,
+    ) -> None:
+        """
+        Download one remote file through a resumable .part file.
 
-                    # If RSA, enforce 4096-bit length
-                    if isinstance(private_key, paramiko.RSAKey):
-                        bits = None
-                        if hasattr(private_key, "get_bits"):
-                            bits = private_key.get_bits()
-                        elif hasattr(private_key, "bits"):
-                            bits = getattr(private_key, "bits")
-                        if bits != 4096:
-                            logging.fatal(
-                                f"RSA key loaded but key size is {bits}; server requires 4096-bit RSA."
-                            )
-                            duration = time.perf_counter() - overall_start
-                            return BIPSummary(
-                                bip_name=self.bip_name,
-                                files_found=0,
-                                downloaded=[],
-                                deleted=[],
-                                failed_downloads=[],
-                                failed_deletions=[],
-                                duration_s=duration,
-                                status="failed",
-                            )
+        Files of at least ranged_download_threshold bytes are read as
+        concurrent byte ranges over extra SFTP channels. A partial download
+        left by an earlier failure is resumed when the remote size and mtime
+        are unchanged.
 
-                    logging.info(f"Successfully loaded {key_class.__name__}")
-                    break
-                except paramiko.SSHException as e:
-                    msg = f"{key_class.__name__} failed: {e}"
-                    logging.warning(msg)
-                    key_attempt_errors.append(msg)
-                    continue
-                except Exception as e:
-                    key_load_error = e
-                    key_attempt_errors.append(f"{key_class.__name__} failed: {e}")
-                    continue
-
-            if private_key is None:
-                error_msg = f"Failed to load private key from {self.path_to_key}"
-                if key_attempt_errors:
-                    error_msg += "; " + "; ".join(key_attempt_errors)
-                elif key_load_error:
-                    error_msg += f": {key_load_error}"
-                logging.fatal(error_msg)
-                self._safe_notify(
-                    subject=f"[{self._now_str()}] [{self.bip_name}] Key load failed",
-                    body=error_msg,
+        Every channel used has stall_timeout_s as its read timeout, so a server
+        that stops sending data raises TransferStalled instead of hanging. The
+        per-file deadline is checked as each block arrives. An inspector is
+        fed every block as it is downloaded. With a tracer, the download is
+        recorded as a span with its size, host, streams, and retries.
+        """
+        size, mtime = remote_file.size, remote_file.mtime
+        if size is None or mtime is None:
+            attrs = sftp_client.stat(remote_file.remote_path)
+            size, mtime = attrs.st_size, attrs.st_mtime
+
+        streams = 1
+        if (
+            self.ranged_download_threshold > 0
+            and size >= self.ranged_download_threshold
+        ):
+            streams = self.ranged_download_streams
+
+        progress = self.progress.start(
+            remote_file.relative_path, "download", size, self.stall_timeout_s
+        )
+        with self._span(
+            "download",
+            remote_file.relative_path,
+            size=size,
+            host=self.hostname,
+            streams=streams,
+            retries=0,
+            resumed_bytes=0,
+        ) as attributes:
+            try:
+                download_file(
+                    sftp_client,
+                    open_channel,
+                    remote_file.remote_path,
+                    local_file_path,
+                    size=size,
+                    mtime=mtime,
+                    streams=streams,
+                    prefetch=self.tuning.prefetch,
+                    max_concurrent_prefetch_requests=self.tuning.max_concurrent_prefetch_requests,
+                    progress=progress.update,
+                    on_data=inspector.feed if inspector is not None else None,
+                    throttle=self.limiter.consume,
+                    on_start=lambda partial: attributes.update(
+                        retries=partial.retries, resumed_bytes=partial.resumed_bytes
+                    ),
                 )
-                duration = time.perf_counter() - overall_start
-                return BIPSummary(
-                    bip_name=self.bip_name,
-                    files_found=0,
-                    downloaded=[],
-                    deleted=[],
-                    failed_downloads=[],
-                    failed_deletions=[],
-                    duration_s=duration,
-                    status="failed",
+            except TimeoutError as e:
+                raise TransferStalled(
+                    f"download of '{remote_file.relative_path}' stalled: no data for "
+                    f"{self.stall_timeout_s}s after {progress.done}/{size} bytes"
+                ) from e
+            finally:
+                self.progress.finish(progress)
+
+    def _prune_local_dirs(self, directory: Path) -> None:
+        """Remove empty staging subdirectories left by recursive transfers."""
+        staging_root = self.staging.root_of(directory)
+        if staging_root is None:
+            return
+        directory = directory.resolve()
+        while directory != staging_root and staging_root in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
+
+    def _load_private_key(self) -> paramiko.PKey:
+        """
+        Load the BIP's private key, trying RSA before Ed25519.
+
+        Raises:
+            ConnectionSetupError: If no key path is set, no key type loads, or
+                an RSA key is not 4096 bits.
+        """
+        # Require key-based auth only
+        if not self.path_to_key:
+            raise ConnectionSetupError(
+                "SFTP key path not provided; this script requires key-based authentication.",
+                subject="Key path missing",
+            )
+
+        # Load the private key (supports RSA, DSA, ECDSA, Ed25519, and OpenSSH format)
+        key_load_error = None
+
+        # ACI's SFTP server only supports Ed25519 and 4096-bit RSA keys
+        key_attempt_errors: list[str] = []
+        for key_class in (paramiko.RSAKey, paramiko.Ed25519Key):
+            try:
+                private_key = key_class.from_private_key_file(
+                    self.path_to_key, password=self.key_passphrase
                 )
+            except paramiko.SSHException as e:
+                msg = f"{key_class.__name__} failed: {e}"
+                logging.warning(msg)
+                key_attempt_errors.append(msg)
+                continue
+            except Exception as e:
+                key_load_error = e
+                key_attempt_errors.append(f"{key_class.__name__} failed: {e}")
+                continue
 
+            # If RSA, enforce 4096-bit length
+            if isinstance(private_key, paramiko.RSAKey):
+                bits = None
+                if hasattr(private_key, "get_bits"):
+                    bits = private_key.get_bits()
+                elif hasattr(private_key, "bits"):
+                    bits = getattr(private_key, "bits")
+                if bits != 4096:
+                    raise ConnectionSetupError(
+                        f"RSA key loaded but key size is {bits}; server requires 4096-bit RSA."
+                    )
+
+            logging.info(f"Successfully loaded {key_class.__name__}")
+            return private_key
+
+        error_msg = f"Failed to load private key from {self.path_to_key}"
+        if key_attempt_errors:
+            error_msg += "; " + "; ".join(key_attempt_errors)
+        elif key_load_error:
+            error_msg += f": {key_load_error}"
+        raise ConnectionSetupError(error_msg, subject="Key load failed")
+
+    def _connect(self, timeout_s: float = 30) -> paramiko.SSHClient:
+        """
+        Open a key-authenticated SSH connection with the BIP's transport tuning.
+
+        Args:
+            timeout_s: Timeout for the TCP connection.
+
+        Raises:
+            ConnectionSetupError: If the key cannot be used or the connection fails.
+        """
+        logging.info(
+            f"Attempting to connect to {self.hostname}:{self.port} as {self.username}"
+        )
+        try:
+            private_key = self._load_private_key()
+        except ConnectionSetupError:
+            raise
+        except Exception as e:
+            raise ConnectionSetupError(
+                f"Failed to connect to {self.hostname}: {e}", subject="Connection failed"
+            ) from e
+
+        ssh_client = paramiko.SSHClient()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
             ssh_client.connect(
                 hostname=self.hostname,
                 port=self.port,
@@ -234,238 +652,764 @@ class Fetcher:
                 pkey=private_key,
                 look_for_keys=False,
                 allow_agent=False,
-                timeout=30,
+                timeout=timeout_s,
+                compress=self.tuning.compress,
+                transport_factory=make_transport_factory(self.tuning),
             )
         except Exception as e:
-            error_msg = f"Failed to connect to {self.hostname}: {e}"
-            logging.fatal(error_msg)
-            self._safe_notify(
-                subject=f"[{self._now_str()}] [{self.bip_name}] Connection failed",
-                body=error_msg,
-            )
-            duration = time.perf_counter() - overall_start
-            return BIPSummary(
-                bip_name=self.bip_name,
-                files_found=0,
-                downloaded=[],
-                deleted=[],
-                failed_downloads=[],
-                failed_deletions=[],
-                duration_s=duration,
-                status="failed",
-            )
+            ssh_client.close()
+            raise ConnectionSetupError(
+                f"Failed to connect to {self.hostname}: {e}", subject="Connection failed"
+            ) from e
+        return ssh_client
 
-        # open SFTP session
+    def _open_channel(self, ssh_client: paramiko.SSHClient) -> paramiko.SFTPClient:
+        """Open an SFTP channel whose reads time out after stall_timeout_s."""
+        sftp = ssh_client.open_sftp()
+        if self.stall_timeout_s:
+            sftp.get_channel().settimeout(self.stall_timeout_s)
+        return sftp
+
+    def _walker(self, ssh_client: paramiko.SSHClient) -> RemoteWalker:
+        """Build the remote walk for this BIP on ssh_client's connection."""
+        return RemoteWalker(
+            functools.partial(self._open_channel, ssh_client),
+            self.remote_path,
+            self.selector,
+            recursive=self.recursive,
+            max_depth=self.max_depth,
+            concurrency=self.listing_concurrency,
+        )
+
+    def _order_files(self, remote_files: Iterable[RemoteFile]) -> Iterable[RemoteFile]:
+        """
+        Apply the BIP's transfer_order to remote_files.
+
+        "listing" passes the stream through untouched. Every other order has to
+        see the whole listing first, so it trades the early start of streaming
+        for a better transfer order.
+        """
+        if self.transfer_order == "listing":
+            return remote_files
+        if self.transfer_order == "largest_first":
+            return sorted(remote_files, key=lambda f: f.size or 0, reverse=True)
+        if self.transfer_order == "smallest_first":
+            return sorted(remote_files, key=lambda f: f.size or 0)
+        # oldest_first; files without an mtime go last
+        return sorted(
+            remote_files, key=lambda f: (f.mtime is None, f.mtime or 0)
+        )
+
+    def survey(self) -> list[RemoteFile]:
+        """
+        List the files this BIP would transfer, without moving anything.
+
+        Unlike fetch_files, failures are raised to the caller and no
+        notification is sent.
+
+        Raises:
+            ConnectionSetupError: If the SSH connection cannot be set up.
+            Exception: If the remote listing fails.
+        """
+        ssh_client = self._connect()
         try:
-            logging.info(f"Connecting to {self.hostname} via SFTP...")
-            sftp_client = ssh_client.open_sftp()
+            return list(self._walker(ssh_client).walk())
+        finally:
+            ssh_client.close()
 
-            # list target files in the remote directory
-            remote_files = sftp_client.listdir(self.remote_path)
-            target_files = [
-                f for f in remote_files if f.endswith(self.target_file_type)
-            ]
+    def preflight(self, timeout_s: float = 10) -> PreflightResult:
+        """
+        Check that this BIP can run, without listing or moving any file.
 
-            if not target_files:
-                logging.info(
-                    f"No {self.target_file_type} file(s) found in path '{self.remote_path}'.  Exiting..."
-                )
-                self._safe_notify(
-                    subject=f"[{self._now_str()}] [{self.bip_name}] No files found",
-                    body=(
-                        f"[BIP: {self.bip_name}] No {self.target_file_type} file(s) found "
-                        f"in remote path '{self.remote_path}' on host {self.hostname}."
-                    ),
+        The private key is loaded, an SSH connection is opened, remote_path
+        is checked to be a directory, and every destination bucket is looked
+        up, each network step within timeout_s. Buckets are checked even when
+        SFTP fails. Unlike fetch_files, nothing is notified.
+
+        Returns:
+            The result of each check in PREFLIGHT_CHECKS. "config" always
+            passes, since this Fetcher was built from a valid config.
+        """
+        start = time.perf_counter()
+        result = PreflightResult(self.bip_name, dict.fromkeys(PREFLIGHT_CHECKS))
+        result.checks["config"] = True
+        try:
+            self._load_private_key()
+            result.checks["key"] = True
+        except Exception as e:
+            result.fail("key", str(e))
+
+        if result.checks["key"]:
+            ssh_client = None
+            try:
+                ssh_client = self._connect(timeout_s=timeout_s)
+                result.checks["ssh"] = True
+                sftp = ssh_client.open_sftp()
+                try:
+                    sftp.get_channel().settimeout(timeout_s)
+                    attrs = sftp.stat(self.remote_path)
+                finally:
+                    sftp.close()
+                if stat.S_ISDIR(attrs.st_mode or 0):
+                    result.checks["remote_path"] = True
+                else:
+                    result.fail(
+                        "remote_path", f"Remote path '{self.remote_path}' is not a directory"
+                    )
+            except ConnectionSetupError as e:
+                result.fail("ssh", str(e))
+            except Exception as e:
+                result.fail(
+                    "remote_path", f"Cannot stat remote path '{self.remote_path}': {e}"
                 )
-                duration = time.perf_counter() - overall_start
-                return BIPSummary(
-                    bip_name=self.bip_name,
-                    files_found=0,
-                    downloaded=[],
-                    deleted=[],
-                    failed_downloads=[],
-                    failed_deletions=[],
-                    duration_s=duration,
-                    status="no_files",
+            finally:
+                if ssh_client is not None:
+                    ssh_client.close()
+
+        missing = []
+        for name in self.bucket_names:
+            try:
+                self.gcs_client.get_bucket(name, timeout=timeout_s)
+            except Exception as e:
+                missing.append(f"Could not access GCS bucket '{name}': {e}")
+        if len(self.bucket_names) - len(missing) < self.min_uploads:
+            result.fail("buckets", "; ".join(missing))
+        else:
+            result.checks["buckets"] = True
+            for error in missing:
+                logging.warning(
+                    f"{error}; the {self.upload_success_policy} policy is still met."
                 )
 
+        result.duration_s = time.perf_counter() - start
+        return result
+
+    def _refresh_limits(self) -> None:
+        """Apply the job file's current transfer and bandwidth limits."""
+        if self.jobs is None:
+            return
+        job = self.jobs.job(self.bip_name)
+        if job is None:
+            return
+        transfers = min(
+            job.max_concurrent_transfers or self.configured_transfers,
+            max(self.configured_transfers, MAX_TRANSFER_THREADS),
+        )
+        if transfers != self.max_concurrent_transfers:
+            logging.info(
+                f"{self.bip_name}: max_concurrent_transfers "
+                f"{self.max_concurrent_transfers} -> {transfers}"
+            )
+            self.max_concurrent_transfers = transfers
+        if job.bandwidth_limit_bytes_per_s != self.limiter.bytes_per_s:
             logging.info(
-                f"Found: {len(target_files)} {self.target_file_type} file(s) in path '{self.remote_path}'"
+                f"{self.bip_name}: bandwidth limit "
+                f"{self.limiter.bytes_per_s or 'off'} -> "
+                f"{job.bandwidth_limit_bytes_per_s or 'off'} bytes/s"
             )
+            self.limiter.set_rate(job.bandwidth_limit_bytes_per_s)
 
-            # fetch GCS bucket once before the loop
-            try:
-                bucket = self.gcs_client.get_bucket(self.bucket_name)
-            except Exception as e:
-                error_msg = f"Could not access GCS bucket '{self.bucket_name}': {e}"
-                logging.fatal(error_msg)
+    def _lease_key(self, relative_path: str) -> str:
+        """Return the lease key for one of this BIP's files."""
+        return f"{self.bip_name}/{relative_path}"
+
+    def _claim(
+        self, leases: LeaseKeeper, sftp_client, remote_file: RemoteFile
+    ) -> bool:
+        """
+        Lease remote_file for this runner and confirm it is still on the server.
+
+        The existence check covers a listing taken before another runner
+        moved the file and released its lease.
+
+        Returns:
+            True when this runner should transfer the file.
+        """
+        key = self._lease_key(remote_file.relative_path)
+        if not leases.acquire(key):
+            logging.info(f"Skipping {remote_file.relative_path}; leased by another runner.")
+            return False
+        try:
+            sftp_client.stat(remote_file.remote_path)
+        except FileNotFoundError:
+            logging.info(
+                f"Skipping {remote_file.relative_path}; already moved by another runner."
+            )
+            leases.release(key)
+            return False
+        return True
+
+    def _inspector_for(self, remote_file: RemoteFile) -> CsvInspector | None:
+        """Return an inspector when CSV inspection applies to remote_file."""
+        if not self.csv_inspection or not remote_file.name.lower().endswith(".csv"):
+            return None
+        return CsvInspector(self.csv_expected_header)
+
+    def _inspect_bytes(self, remote_file: RemoteFile, data: bytes) -> CsvInspection | None:
+        """Inspect a small file that was read into memory for bundling."""
+        inspector = self._inspector_for(remote_file)
+        if inspector is None:
+            return None
+        inspector.feed(0, data)
+        return inspector.result()
+
+    def _inspected_blob(
+        self, remote_file: RemoteFile, inspection: CsvInspection | None
+    ) -> tuple[str, bool]:
+        """
+        Return the blob name for an inspected file and whether it is quarantined.
+
+        The name comes from blob_name_template. Files that fail inspection go
+        under csv_quarantine_prefix when one is set; otherwise they are stored
+        as usual and only flagged in metadata.
+        """
+        file_name = remote_file.relative_path
+        blob_name = self.namer.blob_name(remote_file)
+        if inspection is None or inspection.valid:
+            return blob_name, False
+        if self.csv_quarantine_prefix:
+            logging.warning(
+                f"Quarantining {file_name} under '{self.csv_quarantine_prefix}': "
+                f"{inspection.error}"
+            )
+            return self.csv_quarantine_prefix + blob_name, True
+        logging.warning(f"CSV inspection failed for {file_name}: {inspection.error}")
+        return blob_name, False
+
+    def _transfer_file(
+        self, sftp_client, open_channel, buckets: list, remote_file: RemoteFile
+    ) -> FileResult:
+        """
+        Download one file, upload it to GCS, and remove the local copy.
+
+        The file is uploaded to every bucket in buckets. It counts as moved
+        when at least min_uploads of the configured buckets hold it.
+
+        CSV files are inspected as they download when csv_inspection is on;
+        the row count and schema hash go into the object metadata and the
+        result, and files that fail validation may be quarantined.
+
+        Returns:
+            A successful "download" result when the file is safely in GCS, or a
+            failed "download" or "upload" result. The local copy is retained
+            when the upload does not meet the success policy.
+        """
+        file_name = remote_file.relative_path
+        local_file_path = self.staging.path_for(remote_file)
+        inspector = self._inspector_for(remote_file)
+
+        # download the file
+        try:
+            logging.info(f"Downloading file {file_name}")
+            os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+            self._download_file(
+                sftp_client, open_channel, remote_file, local_file_path, inspector
+            )
+        except Exception as e:
+            return self._download_failed(remote_file, local_file_path, e)
+
+        # Resumed or ranged downloads arrive out of order; read the local copy.
+        inspection = None
+        if inspector is not None:
+            if not inspector.in_order:
+                inspector.scan_file(local_file_path)
+            inspection = inspector.result()
+        blob_name, quarantined = self._inspected_blob(remote_file, inspection)
+
+        # upload to GCS and delete local copy if the success policy is met
+        local_file: Path = Path(local_file_path)
+        failed = self._upload_file_to_gcs(
+            local_file,
+            buckets,
+            blob_name=blob_name,
+            metadata=inspection_metadata(inspection) if inspection else None,
+        )
+        return self._stored_result(
+            remote_file, local_file, buckets, failed, inspection, blob_name, quarantined
+        )
+
+    def _download_failed(
+        self, remote_file: RemoteFile, local_file_path: str, error: Exception
+    ) -> FileResult:
+        """Log and notify a failed download and return its result."""
+        file_name = remote_file.relative_path
+        error_msg = (
+            f"[BIP: {self.bip_name}] Failed to download file '{file_name}' "
+            f"from '{remote_file.remote_path}' to '{local_file_path}': {error}"
+        )
+        logging.error(error_msg)
+        self._safe_notify(
+            kind="Download failed",
+            body=error_msg,
+        )
+        return FileResult(
+            name=file_name,
+            success=False,
+            stage="download",
+            error_message=str(error),
+        )
+
+    def _stored_result(
+        self,
+        remote_file: RemoteFile,
+        local_file: Path,
+        buckets: list,
+        failed: list[str],
+        inspection: CsvInspection | None,
+        blob_name: str,
+        quarantined: bool,
+    ) -> FileResult:
+        """
+        Return the result of a downloaded file's uploads.
+
+        The local copy is removed when the file is stored in at least
+        min_uploads of the configured buckets, and kept otherwise.
+
+        Args:
+            failed: Buckets in buckets whose upload failed.
+        """
+        file_name = remote_file.relative_path
+        missing = failed + self._missing_buckets(buckets)
+        if len(self.bucket_names) - len(missing) < self.min_uploads:
+            logging.error("Upload FAILED! retaining local copy.")
+            return FileResult(
+                name=file_name,
+                success=False,
+                stage="upload",
+                error_message=(
+                    "Upload to GCS failed"
+                    if len(self.bucket_names) == 1
+                    else f"Upload to GCS failed for {', '.join(missing)}"
+                ),
+            )
+
+        errors = [inspection.error] if inspection and inspection.error else []
+        if missing:
+            logging.warning(
+                f"{file_name} is missing from {', '.join(missing)}; the "
+                f"{self.upload_success_policy} policy is met, so it is moved anyway."
+            )
+            errors.append(f"Not stored in {', '.join(missing)}")
+        logging.info("Upload SUCCESSFUL! Deleting local copy.")
+        local_file.unlink()
+        self._prune_local_dirs(local_file.parent)
+        return FileResult(
+            name=file_name,
+            success=True,
+            stage="download",
+            error_message="; ".join(errors),
+            row_count=inspection.row_count if inspection else None,
+            schema_hash=inspection.schema_hash if inspection else "",
+            quarantined=quarantined,
+            blob_name=blob_name,
+        )
+
+    def fetch_files(self, remote_files: list[RemoteFile] | None = None) -> BIPSummary:
+        """
+        Fetch matching remote files, upload them to GCS, and clean up.
+
+        The remote directory, and its subdirectories in recursive mode, is
+        streamed and only files accepted by the selector are processed,
+        starting as soon as the first entry arrives unless transfer_order needs
+        the full listing. Paths relative to remote_path are kept in the local
+        staging path and the GCS blob name. Up to max_concurrent_transfers
+        files move at once, each on its own SFTP channel. Each file is
+        downloaded locally, uploaded to GCS, removed locally after upload
+        success, and deleted from SFTP only after the GCS upload succeeds;
+        with several buckets, enough of them must hold the file to meet
+        upload_success_policy. Remote deletions are queued and sent in pipelined batches.
+        Per-file failures are recorded in the returned summary instead of
+        aborting the rest of the BIP run. Once the run's time budget is low,
+        in-flight files finish but no new file starts; the rest are recorded
+        as deferred. With a lease store, a file is transferred only by the
+        runner that leases it; the lease is held until the remote deletion
+        completes, so another runner never moves it a second time. With a
+        bundle format, files of at most bundle_max_file_size bytes are packed
+        into archive objects instead, and are deleted remotely only once
+        their bundle is stored. Each download first reserves staging space;
+        while there is too little, new downloads wait for in-flight ones,
+        and a file that cannot fit at all is deferred.
+
+        Args:
+            remote_files: Files already listed by survey; when None the
+                remote directory is walked.
+
+        Returns:
+            Summary of downloaded, deleted, and failed file operations.
+        """
+        # Result tracking lists
+        downloaded: list[FileResult] = []
+        deleted: list[FileResult] = []
+        failed_downloads: list[FileResult] = []
+        failed_deletions: list[FileResult] = []
+        deferred: list[FileResult] = []
+        deferred_bytes = 0
+        bytes_moved = 0
+        files_found = 0
+        claimed_elsewhere = 0
+        leases = LeaseKeeper(self.leases) if self.leases is not None else None
+
+        # Record total runtime start
+        overall_start = time.perf_counter()
+        files_total = len(remote_files) if remote_files is not None else None
+
+        def live_status() -> dict:
+            # Called from the status endpoint's thread; reads counters only.
+            active = self.progress.snapshot()
+            return {
+                "files_found": files_found,
+                "files_total": files_total,
+                "files_done": len(downloaded),
+                "files_failed": len(failed_downloads) + len(failed_deletions),
+                "files_deferred": len(deferred),
+                "bytes_moved": bytes_moved,
+                "bytes_per_s": round(
+                    bytes_moved / max(time.perf_counter() - overall_start, 1e-6)
+                ),
+                "active_bytes_per_s": round(sum(p.bytes_per_s for p in active)),
+                "active": [
+                    {
+                        "name": p.name,
+                        "stage": p.stage,
+                        "done": p.done,
+                        "total": p.total,
+                        "bytes_per_s": round(p.bytes_per_s),
+                        "elapsed_s": round(p.elapsed_s, 1),
+                    }
+                    for p in active
+                ],
+            }
+
+        if self.status is not None:
+            self.status.attach(self.bip_name, live_status)
+
+        def summary(status: str) -> BIPSummary:
+            return BIPSummary(
+                bip_name=self.bip_name,
+                files_found=files_found,
+                downloaded=downloaded,
+                deleted=deleted,
+                failed_downloads=failed_downloads,
+                failed_deletions=failed_deletions,
+                duration_s=time.perf_counter() - overall_start,
+                status=status,
+                deferred=deferred,
+                deferred_bytes=deferred_bytes,
+                claimed_elsewhere=claimed_elsewhere,
+                bytes_moved=bytes_moved,
+                download_s=self.progress.stage_seconds("download"),
+                upload_s=self.progress.stage_seconds("upload"),
+            )
+
+        def record_deletions(results: list[FileResult]) -> None:
+            for result in results:
+                if leases is not None:
+                    leases.release(self._lease_key(result.name))
+                if result.success:
+                    deleted.append(result)
+                else:
+                    failed_deletions.append(result)
+
+        # attempt connection
+        try:
+            ssh_client = self._connect()
+        except ConnectionSetupError as e:
+            logging.fatal(str(e))
+            if e.subject:
                 self._safe_notify(
-                    subject=f"[{self._now_str()}] [{self.bip_name}] Bucket access failed",
-                    body=error_msg,
+                    kind=e.subject,
+                    body=str(e),
                 )
-                duration = time.perf_counter() - overall_start
-                return BIPSummary(
+            return summary("failed")
+
+        # open SFTP session
+        open_channel = functools.partial(self._open_channel, ssh_client)
+        # Threads are started only as needed, so the pool can be sized for a
+        # limit raised by a job file reload.
+        threads = ThreadBackend(
+            self,
+            open_channel,
+            max_workers=(
+                max(self.configured_transfers, MAX_TRANSFER_THREADS)
+                if self.jobs is not None
+                else self.max_concurrent_transfers
+            ),
+        )
+        worker_channel = threads.channel
+        backend: TransferBackend = threads
+        # Confirmed uploads are deleted in pipelined batches on their own channel
+        remover = BatchRemover(
+            open_channel,
+            batch_size=self.delete_batch_size,
+            on_result=self._trace_deletion,
+        )
+
+        try:
+            logging.info(f"Connecting to {self.hostname} via SFTP...")
+            worker_channel()
+            if self.transfer_backend == "asyncio":
+                try:
+                    backend = aio.AsyncBackend(self)
+                except ConnectionSetupError as e:
+                    logging.fatal(str(e))
+                    if e.subject:
+                        self._safe_notify(
+                            kind=e.subject,
+                            body=str(e),
+                        )
+                    return summary("failed")
+            self.progress.start_logging(self.progress_log_interval_s)
+            if leases is not None:
+                leases.start()
+
+            # The walk lists on its own SFTP channels in background threads so
+            # transfers can run while listings are still arriving.
+            if remote_files is None:
+                remote_files = self._walker(ssh_client).walk()
+            buckets = None
+            bundler = None
+            if self.bundle_format:
+                bundler = Bundler(
+                    self.bundle_format,
                     bip_name=self.bip_name,
-                    files_found=len(target_files),
-                    downloaded=[],
-                    deleted=[],
-                    failed_downloads=[],
-                    failed_deletions=[],
-                    duration_s=duration,
-                    status="failed",
+                    blob_prefix=self.bundle_prefix,
+                    max_bytes=self.bundle_max_bytes,
+                    staging=self.staging,
+                    upload=self._upload_file_to_gcs,
+                    min_uploads=self.min_uploads,
+                    progress=self.progress,
+                    span=functools.partial(self._span, host=self.hostname),
+                    inspect=self._inspect_bytes if self.csv_inspection else None,
+                    quarantine=self._inspected_blob,
+                    throttle=self.limiter.consume,
                 )
 
-            for file_name in target_files:
-                remote_file_path = f"{self.remote_path}/{file_name}"
-                local_file_path = f"{self.local_path}/{file_name}"
+            def handle(result: FileResult, remote_file: RemoteFile) -> None:
+                nonlocal bytes_moved
+                self.staging.release(remote_file)
+                if not result.success:
+                    if leases is not None:
+                        leases.release(self._lease_key(result.name))
+                    failed_downloads.append(result)
+                    if result.stage == "upload":
+                        logging.warning(
+                            f"Skipping remote deletion for {result.name} because upload failed."
+                        )
+                    return
+                downloaded.append(result)
+                bytes_moved += remote_file.size or 0
+                logging.info(f"{len(downloaded)}/{files_found} downloaded so far.")
+                # Queue the remote file for deletion only if upload succeeded
+                record_deletions(remover.add(remote_file.remote_path, result.name))
 
-                # download the file
-                try:
-                    logging.info(f"Downloading file {file_name}")
-                    sftp_client.get(remote_file_path, local_file_path)
-                    downloaded.append(
-                        FileResult(name=file_name, success=True, stage="download")
+            def defer(remote_file: RemoteFile, reason: str) -> None:
+                nonlocal deferred_bytes
+                deferred.append(
+                    FileResult(
+                        name=remote_file.relative_path,
+                        success=False,
+                        stage="deferred",
+                        error_message=reason,
                     )
-                    logging.info(
-                        f"{len(downloaded)}/{len(target_files)} downloaded so far."
+                )
+                deferred_bytes += remote_file.size or 0
+
+            def handle_bundle(results: list[tuple[FileResult, RemoteFile]]) -> None:
+                for result, remote_file in results:
+                    if result.stage == "deferred":
+                        if leases is not None:
+                            leases.release(self._lease_key(result.name))
+                        defer(remote_file, result.error_message)
+                        continue
+                    handle(result, remote_file)
+                upload_failures = [r for r, _ in results if r.stage == "upload"]
+                if upload_failures:
+                    self._safe_notify(
+                        kind="Bundle upload failed",
+                        body=(
+                            f"{upload_failures[0].error_message}; "
+                            f"{len(upload_failures)} file(s) kept on the server."
+                        ),
                     )
 
-                    # upload to GCS and delete local copy if upload is successful
-                    upload_success = False
-                    local_file: Path = Path(local_file_path)
-                    upload_success = self._upload_file_to_gcs(local_file, bucket)
-                    if upload_success:
-                        logging.info("Upload SUCCESSFUL! Deleting local copy.")
-                        local_file.unlink()
-                    else:
-                        logging.error("Upload FAILED! retaining local copy.")
-                        # Remove from downloaded since upload failed
-                        downloaded = [d for d in downloaded if d.name != file_name]
-                        failed_downloads.append(
-                            FileResult(
-                                name=file_name,
-                                success=False,
-                                stage="upload",
-                                error_message="Upload to GCS failed",
+            in_flight: dict[Future, RemoteFile] = {}
+            budget_low = staging_full = False
+            try:
+                for remote_file in self._order_files(remote_files):
+                    files_found += 1
+                    self._refresh_limits()
+
+                    # Out of time: leave this file for the next run
+                    if self.budget is not None and self.budget.low():
+                        if not budget_low:
+                            budget_low = True
+                            logging.warning(
+                                f"Run time budget low ({self.budget.describe()}); "
+                                f"{self.bip_name} starts no new files."
+                            )
+                        defer(remote_file, "Run time budget exhausted")
+                        continue
+
+                    # fetch GCS buckets once, when the first matching file arrives
+                    if buckets is None:
+                        buckets = self._get_buckets()
+                        if len(buckets) < self.min_uploads:
+                            logging.fatal(
+                                f"Only {len(buckets)} of {len(self.bucket_names)} "
+                                f"bucket(s) are accessible; {self.min_uploads} required."
                             )
+                            return summary("failed")
+
+                    # Another runner holds this file, or already moved it
+                    if leases is not None and not self._claim(
+                        leases, worker_channel(), remote_file
+                    ):
+                        files_found -= 1
+                        claimed_elsewhere += 1
+                        continue
+
+                    # Small files are packed into the current bundle
+                    if (
+                        bundler is not None
+                        and remote_file.size is not None
+                        and remote_file.size <= self.bundle_max_file_size
+                    ):
+                        handle_bundle(
+                            bundler.add(worker_channel(), buckets, remote_file)
                         )
-                except KeyboardInterrupt:
-                    logging.warning("Download interrupted by user. Exiting...")
-                    duration = time.perf_counter() - overall_start
-                    return BIPSummary(
-                        bip_name=self.bip_name,
-                        files_found=len(target_files),
-                        downloaded=downloaded,
-                        deleted=deleted,
-                        failed_downloads=failed_downloads,
-                        failed_deletions=failed_deletions,
-                        duration_s=duration,
-                        status="failed",
-                    )
-                except Exception as e:
-                    error_msg = (
-                        f"[BIP: {self.bip_name}] Failed to download file '{file_name}' "
-                        f"from '{remote_file_path}' to '{local_file_path}': {e}"
-                    )
-                    logging.error(error_msg)
-                    self._safe_notify(
-                        subject=f"[{self._now_str()}] [{self.bip_name}] Download failed",
-                        body=error_msg,
-                    )
-                    failed_downloads.append(
-                        FileResult(
-                            name=file_name,
-                            success=False,
-                            stage="download",
-                            error_message=str(e),
+                        continue
+
+                    # Reserve staging space; while it is short, new downloads
+                    # wait for in-flight files to leave staging. A file that
+                    # still does not fit is left for the next run.
+                    admitted = self.staging.reserve(remote_file)
+                    if not admitted and in_flight:
+                        logging.info(
+                            f"Staging space low; {remote_file.relative_path} waits "
+                            f"for {len(in_flight)} in-flight file(s)."
                         )
-                    )
-                    continue  # skip deletion if download failed
-
-                # Delete the remote file only if upload succeeded
-                if upload_success:
-                    try:
-                        logging.info(f"Deleting remote file {file_name}")
-                        sftp_client.remove(remote_file_path)
-                        deleted.append(
-                            FileResult(name=file_name, success=True, stage="delete")
+                    while not admitted and in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            handle(future.result(), in_flight.pop(future))
+                        admitted = self.staging.reserve(remote_file)
+                    if not admitted:
+                        if leases is not None:
+                            leases.release(self._lease_key(remote_file.relative_path))
+                        space = ", ".join(
+                            f"{d}: {self.staging.available(d)} bytes"
+                            for d in self.staging.dirs
                         )
-                    except KeyboardInterrupt:
-                        logging.warning("Delete interrupted by user. Exiting...")
-                        duration = time.perf_counter() - overall_start
-                        return BIPSummary(
-                            bip_name=self.bip_name,
-                            files_found=len(target_files),
-                            downloaded=downloaded,
-                            deleted=deleted,
-                            failed_downloads=failed_downloads,
-                            failed_deletions=failed_deletions,
-                            duration_s=duration,
-                            status="partial"
-                            if (failed_downloads or failed_deletions)
-                            else "success",
+                        logging.warning(
+                            f"Not enough staging space for {remote_file.relative_path} "
+                            f"({remote_file.size} bytes) above the "
+                            f"{self.staging.min_free_bytes}-byte reserve ({space}); "
+                            "leaving it for the next run."
                         )
-                    except Exception as e:
-                        logging.error(f"Failed to remove {file_name}: {e}")
-                        failed_deletions.append(
-                            FileResult(
-                                name=file_name,
-                                success=False,
-                                stage="delete",
-                                error_message=str(e),
+                        if not staging_full:
+                            staging_full = True
+                            self._safe_notify(
+                                kind="Staging space low",
+                                body=(
+                                    f"[BIP: {self.bip_name}] Not enough staging space in "
+                                    f"{', '.join(self.staging.dirs)} to download "
+                                    f"'{remote_file.relative_path}' ({remote_file.size} bytes) "
+                                    f"while keeping {self.staging.min_free_bytes} bytes free. "
+                                    "Files that do not fit are left for the next run."
+                                ),
                             )
-                        )
-                else:
-                    logging.warning(
-                        f"Skipping remote deletion for {file_name} because upload failed."
-                    )
+                        defer(remote_file, "Not enough staging space")
+                        continue
+
+                    if self.max_concurrent_transfers <= 1 and not in_flight:
+                        handle(backend.transfer(buckets, remote_file), remote_file)
+                        continue
+
+                    # Keep at most max_concurrent_transfers files in flight;
+                    # the rest wait in the walk's queue. A lowered limit
+                    # drains the extra transfers before the next one starts.
+                    while len(in_flight) >= self.max_concurrent_transfers:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            handle(future.result(), in_flight.pop(future))
+                    future = backend.submit(buckets, remote_file)
+                    in_flight[future] = remote_file
 
-                time.sleep(1)
+                for future in as_completed(list(in_flight)):
+                    handle(future.result(), in_flight.pop(future))
+                if bundler is not None:
+                    handle_bundle(bundler.flush(buckets))
+            except KeyboardInterrupt:
+                logging.warning("Transfer interrupted by user. Exiting...")
+                return summary("failed")
+            finally:
+                backend.close()
 
-            duration = time.perf_counter() - overall_start
+            # Delete whatever is still queued from the last partial batch
+            try:
+                record_deletions(remover.flush())
+            except KeyboardInterrupt:
+                logging.warning("Delete interrupted by user. Exiting...")
+                return summary(
+                    "partial"
+                    if (failed_downloads or failed_deletions or deferred)
+                    else "success"
+                )
+
+            if not files_found and claimed_elsewhere:
+                logging.info(
+                    f"All {claimed_elsewhere} matching file(s) for {self.bip_name} "
+                    "were claimed by other runners."
+                )
+                return summary("no_files")
+
+            if not files_found:
+                logging.info(
+                    f"No {self.selector.describe()} file(s) found in path '{self.remote_path}'.  Exiting..."
+                )
+                self._safe_notify(
+                    kind="No files found",
+                    body=(
+                        f"[BIP: {self.bip_name}] No {self.selector.describe()} file(s) found "
+                        f"in remote path '{self.remote_path}' on host {self.hostname}."
+                    ),
+                )
+                return summary("no_files")
 
             # Determine status
             if failed_downloads or failed_deletions:
                 status = "partial"
                 logging.warning("Some operations failed - review logs above")
+            elif deferred:
+                status = "partial"
             else:
                 status = "success"
 
+            result_summary = summary(status)
+
             # summary logging
             logging.info(
-                f"Process complete: {len(downloaded)} downloaded, "
+                f"Process complete: {files_found} found, {len(downloaded)} downloaded, "
                 f"{len(failed_downloads)} FAILED downloads, "
                 f"{len(failed_deletions)} FAILED deletions, "
-                f"timed for {duration:.6f} seconds."
+                f"{len(deferred)} deferred ({deferred_bytes} bytes), "
+                f"timed for {result_summary.duration_s:.6f} seconds."
             )
 
-            return BIPSummary(
-                bip_name=self.bip_name,
-                files_found=len(target_files),
-                downloaded=downloaded,
-                deleted=deleted,
-                failed_downloads=failed_downloads,
-                failed_deletions=failed_deletions,
-                duration_s=duration,
-                status=status,
-            )
+            return result_summary
 
         except Exception as e:
             logging.fatal(f"Failed to open SFTP session: {e}")
-            duration = time.perf_counter() - overall_start
-            return BIPSummary(
-                bip_name=self.bip_name,
-                files_found=len(target_files),
-                downloaded=downloaded,
-                deleted=deleted,
-                failed_downloads=failed_downloads,
-                failed_deletions=failed_deletions,
-                duration_s=duration,
-                status="failed",
-            )
+            return summary("failed")
 
         finally:
             # ensure SSH connection is always closed
-            if ssh_client:
-                logging.info("Finally closing session.")
-                ssh_client.close()
+            self.progress.stop_logging()
+            if leases is not None:
+                leases.stop()
+                leases.release_all()
+            threads.close()
+            remover.close()
+            self.staging.release_all()
+            logging.info("Finally closing session.")
+            ssh_client.close()
@@ -0,0 +1,159 @@
+import csv
+import hashlib
+import re
+import threading
+
+from models import CsvInspection
+
+# Reads used when a file has to be scanned from disk after its download.
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+# A header record longer than this is treated as malformed.
+MAX_HEADER_BYTES = 1024 * 1024
+
+# A line break that directly follows another one, i.e. a blank line.
+_BLANK_LINE = re.compile(rb"(?<=\n)\r?\n")
+
+
+def schema_hash(columns: list[str]) -> str:
+    """Return a short, stable hash of an ordered list of header columns."""
+    return hashlib.sha256("\x1f".join(columns).encode("utf-8")).hexdigest()[:16]
+
+
+class CsvInspector:
+    """
+    Count CSV rows and check the header while the file streams past.
+
+    Data is fed in blocks and never kept beyond the header record, so memory
+    use does not grow with the file. Quoted fields may contain line breaks;
+    only line breaks outside quotes end a record. Blank lines are not rows.
+
+    Blocks must arrive in file order. A block at any other offset, such as
+    from a resumed or ranged download, switches the inspector off; the
+    caller then runs scan_file on the finished local copy instead.
+    """
+
+    def __init__(self, expected_header: list[str] | None = None) -> None:
+        """
+        Args:
+            expected_header: Required column names in order; None only
+                counts rows and hashes whatever header is found.
+        """
+        self.expected_header = expected_header
+        self.in_order = True
+        self._next_offset = 0
+        self._lock = threading.Lock()
+        self._in_quotes = False
+        self._record_has_data = False
+        self._records = 0
+        self._header_buf = bytearray()
+        self._header: bytes | None = None
+
+    def feed(self, offset: int, data: bytes) -> None:
+        """Inspect the block of data that starts at offset in the file."""
+        with self._lock:
+            if not self.in_order:
+                return
+            if offset != self._next_offset:
+                self.in_order = False
+                return
+            self._next_offset += len(data)
+            self._consume(data)
+
+    def scan_file(self, path: str) -> None:
+        """Inspect a complete local file from the start, discarding earlier input."""
+        self.__init__(self.expected_header)
+        with open(path, "rb") as fp:
+            while True:
+                data = fp.read(SCAN_BLOCK_SIZE)
+                if not data:
+                    break
+                self._consume(data)
+
+    def result(self) -> CsvInspection:
+        """Return the inspection of everything fed so far, treated as the whole file."""
+        records = self._records + (1 if self._record_has_data else 0)
+        header_raw = self._header
+        if header_raw is None:
+            if not self._record_has_data:
+                return CsvInspection(
+                    row_count=0, valid=False, error="File is empty or has no header"
+                )
+            header_raw = bytes(self._header_buf)
+
+        row_count = max(0, records - 1)
+        try:
+            if len(header_raw) > MAX_HEADER_BYTES:
+                raise ValueError(f"header is longer than {MAX_HEADER_BYTES} bytes")
+            text = header_raw.decode("utf-8-sig").rstrip("\r")
+            columns = [c.strip() for c in next(csv.reader([text]), [])]
+        except (UnicodeDecodeError, ValueError, csv.Error) as e:
+            return CsvInspection(
+                row_count=row_count, valid=False, error=f"Unreadable header: {e}"
+            )
+
+        inspection = CsvInspection(
+            row_count=row_count, header=columns, schema_hash=schema_hash(columns)
+        )
+        if self.expected_header is not None and columns != self.expected_header:
+            inspection.valid = False
+            inspection.error = (
+                f"Header {columns} does not match expected {self.expected_header}"
+            )
+        return inspection
+
+    def _consume(self, data: bytes) -> None:
+        if self._header is not None and not self._in_quotes and b'"' not in data:
+            self._consume_unquoted(data)
+            return
+
+        pieces = data.split(b"\n")
+        last = len(pieces) - 1
+        for i, piece in enumerate(pieces):
+            if self._header is None and len(self._header_buf) <= MAX_HEADER_BYTES:
+                self._header_buf += piece
+            if piece.strip(b"\r"):
+                self._record_has_data = True
+            if piece.count(b'"') % 2:
+                self._in_quotes = not self._in_quotes
+            if i == last:
+                break
+            if self._in_quotes:
+                # A line break inside quotes is part of the field.
+                if self._header is None:
+                    self._header_buf += b"\n"
+                continue
+            if self._record_has_data:
+                self._records += 1
+                self._record_has_data = False
+                if self._header is None:
+                    self._header = bytes(self._header_buf)
+                    self._header_buf = bytearray()
+            elif self._header is None:
+                # Blank lines before the header are skipped.
+                self._header_buf = bytearray()
+
+    def _consume_unquoted(self, data: bytes) -> None:
+        """Count records in a block without quotes once the header is known."""
+        breaks = data.count(b"\n")
+        if not breaks:
+            if data.strip(b"\r"):
+                self._record_has_data = True
+            return
+        blank = len(_BLANK_LINE.findall(data))
+        if not self._record_has_data and not data[: data.index(b"\n")].strip(b"\r"):
+            blank += 1
+        self._records += breaks - blank
+        self._record_has_data = bool(data[data.rindex(b"\n") + 1 :].strip(b"\r"))
+
+
+def inspection_metadata(inspection: CsvInspection) -> dict[str, str]:
+    """Return the GCS object metadata that records an inspection."""
+    metadata = {
+        "csv-row-count": str(inspection.row_count),
+        "csv-schema-hash": inspection.schema_hash,
+        "csv-header-valid": "true" if inspection.valid else "false",
+    }
+    if inspection.error:
+        metadata["csv-error"] = inspection.error[:512]
+    return metadata
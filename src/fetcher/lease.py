@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+from models import Lease
+
+
+class LeaseStore:
+    """
+    Shared store of time-limited leases that split work between runners.
+
+    A key can be held by one runner at a time. A lease that is not renewed
+    before it expires may be taken over by any other runner, so work claimed
+    by a runner that crashed is picked up again on a later run.
+    """
+
+    def __init__(self, owner: str, ttl_s: float) -> None:
+        """
+        Args:
+            owner: ID of this runner, recorded in every lease it takes.
+            ttl_s: Seconds a lease stays valid after it is taken or renewed.
+        """
+        self.owner = owner
+        self.ttl_s = ttl_s
+
+    def acquire(self, key: str) -> Lease | None:
+        """Take key, or return None when another runner holds a live lease on it."""
+        raise NotImplementedError
+
+    def renew(self, lease: Lease) -> Lease | None:
+        """Extend lease, or return None when it has been lost to another runner."""
+        raise NotImplementedError
+
+    def release(self, lease: Lease) -> None:
+        """Give up lease so another runner can take key straight away."""
+        raise NotImplementedError
+
+    def _record(self, key: str) -> dict:
+        return {"key": key, "owner": self.owner, "expires_at": time.time() + self.ttl_s}
+
+
+class GCSLeaseStore(LeaseStore):
+    """
+    Leases stored as small JSON objects under a GCS prefix.
+
+    Every write is conditional on the object's generation: a new lease is
+    created only if no object exists (if_generation_match=0), and renewals,
+    expired-lease takeovers, and releases only succeed against the exact
+    generation this runner last saw. GCS enforces these preconditions
+    atomically, so two runners can never both hold the same key.
+    """
+
+    def __init__(self, bucket, prefix: str, owner: str, ttl_s: float) -> None:
+        """
+        Args:
+            bucket: GCS bucket the lease objects live in.
+            prefix: Object name prefix for lease objects.
+            owner: ID of this runner.
+            ttl_s: Seconds a lease stays valid after it is taken or renewed.
+        """
+        super().__init__(owner, ttl_s)
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/") + "/" if prefix else ""
+
+    def _write(self, key: str, if_generation_match: int) -> Lease:
+        record = self._record(key)
+        blob = self.bucket.blob(self.prefix + key)
+        blob.upload_from_string(
+            json.dumps(record),
+            content_type="application/json",
+            if_generation_match=if_generation_match,
+        )
+        return Lease(key, self.owner, record["expires_at"], blob.generation)
+
+    def acquire(self, key: str) -> Lease | None:
+        try:
+            return self._write(key, if_generation_match=0)
+        except PreconditionFailed:
+            pass
+
+        # Held by someone; take it over only if that lease has expired.
+        blob = self.bucket.blob(self.prefix + key)
+        try:
+            blob.reload()
+            generation = blob.generation
+            record = json.loads(blob.download_as_bytes(if_generation_match=generation))
+        except (NotFound, PreconditionFailed):
+            # Released or renewed while we looked; try again next run.
+            return None
+        if record.get("expires_at", 0) > time.time():
+            return None
+        try:
+            lease = self._write(key, if_generation_match=generation)
+        except PreconditionFailed:
+            return None
+        logging.warning(
+            f"Recovered expired lease '{key}' from runner {record.get('owner')}"
+        )
+        return lease
+
+    def renew(self, lease: Lease) -> Lease | None:
+        try:
+            return self._write(lease.key, if_generation_match=lease.token)
+        except (NotFound, PreconditionFailed):
+            return None
+
+    def release(self, lease: Lease) -> None:
+        try:
+            self.bucket.blob(self.prefix + lease.key).delete(
+                if_generation_match=lease.token
+            )
+        except (NotFound, PreconditionFailed):
+            logging.warning(f"Lease '{lease.key}' was already lost before release")
+
+
+class LocalLeaseStore(LeaseStore):
+    """
+    Leases stored as files in a local or shared directory.
+
+    A lease file is created with O_EXCL, so only one runner can create it.
+    An expired lease is recovered by renaming it to a unique tombstone first;
+    rename is atomic, so exactly one runner wins the takeover. Intended for
+    runners on one host or a shared filesystem, and as a stand-in for
+    GCSLeaseStore when testing coordination.
+    """
+
+    def __init__(self, directory: Path, owner: str, ttl_s: float) -> None:
+        """
+        Args:
+            directory: Directory holding the lease files; created if missing.
+            owner: ID of this runner.
+            ttl_s: Seconds a lease stays valid after it is taken or renewed.
+        """
+        super().__init__(owner, ttl_s)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (quote(key, safe="") + ".lease")
+
+    def _read(self, path: Path) -> dict | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _create(self, key: str) -> Lease | None:
+        record = self._record(key)
+        record["token"] = uuid.uuid4().hex
+        try:
+            fd = os.open(self._path(key), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            return None
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(record, fp)
+        return Lease(key, self.owner, record["expires_at"], record["token"])
+
+    def acquire(self, key: str) -> Lease | None:
+        lease = self._create(key)
+        if lease is not None:
+            return lease
+
+        path = self._path(key)
+        record = self._read(path)
+        # A file that cannot be read yet is still being written by its creator.
+        if record is None or record.get("expires_at", 0) > time.time():
+            return None
+        tombstone = path.with_name(f"{path.name}.{uuid.uuid4().hex}.expired")
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return None
+        stolen = self._read(tombstone)
+        if stolen is not None and stolen.get("expires_at", 0) > time.time():
+            # Renewed between our read and the rename; hand it back.
+            try:
+                os.link(tombstone, path)
+            except FileExistsError:
+                pass
+            tombstone.unlink(missing_ok=True)
+            return None
+        tombstone.unlink(missing_ok=True)
+        logging.warning(f"Recovered expired lease '{key}' from runner {record.get('owner')}")
+        return self._create(key)
+
+    def renew(self, lease: Lease) -> Lease | None:
+        path = self._path(lease.key)
+        record = self._read(path)
+        if record is None or record.get("token") != lease.token:
+            return None
+        record["expires_at"] = time.time() + self.ttl_s
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(record), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return Lease(lease.key, self.owner, record["expires_at"], lease.token)
+
+    def release(self, lease: Lease) -> None:
+        path = self._path(lease.key)
+        record = self._read(path)
+        if record is None or record.get("token") != lease.token:
+            logging.warning(f"Lease '{lease.key}' was already lost before release")
+            return
+        path.unlink(missing_ok=True)
+
+
+class LeaseKeeper:
+    """
+    The leases one Fetcher holds, renewed in the background until released.
+
+    Leases are renewed every third of the store's TTL, so a transfer that
+    runs longer than the TTL keeps its claim. A lease that cannot be renewed
+    is logged; the transfer carries on, but another runner may now pick the
+    file up as well.
+    """
+
+    def __init__(self, store: LeaseStore) -> None:
+        self.store = store
+        self._held: dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def acquire(self, key: str) -> bool:
+        """Claim key for this runner; False means another runner holds it."""
+        lease = self.store.acquire(key)
+        if lease is None:
+            return False
+        with self._lock:
+            self._held[key] = lease
+        return True
+
+    def release(self, key: str) -> None:
+        """Give up key if it is held; failures are logged, not raised."""
+        with self._lock:
+            lease = self._held.pop(key, None)
+        if lease is None:
+            return
+        try:
+            self.store.release(lease)
+        except Exception as e:
+            logging.warning(f"Failed to release lease '{key}': {e}")
+
+    def release_all(self) -> None:
+        """Release every lease still held, such as after an interrupted run."""
+        with self._lock:
+            keys = list(self._held)
+        for key in keys:
+            self.release(key)
+
+    def start(self) -> None:
+        """Start renewing held leases in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lease-renew", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop renewing; held leases are left to release_all or expiry."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(1.0, self.store.ttl_s / 3)):
+            with self._lock:
+                held = list(self._held.values())
+            for lease in held:
+                try:
+                    renewed = self.store.renew(lease)
+                except Exception as e:
+                    logging.warning(f"Failed to renew lease '{lease.key}': {e}")
+                    continue
+                with self._lock:
+                    released = lease.key not in self._held
+                    if not released and renewed is None:
+                        logging.warning(
+                            f"Lease '{lease.key}' was lost; another runner may "
+                            "transfer the same file."
+                        )
+                        self._held.pop(lease.key)
+                    elif not released:
+                        self._held[lease.key] = renewed
+                if released and renewed is not None:
+                    # Released while this renewal was in flight, so the
+                    # release missed the renewed version.
+                    try:
+                        self.store.release(renewed)
+                    except Exception as e:
+                        logging.warning(f"Failed to release lease '{lease.key}': {e}")
@@ -0,0 +1,118 @@
+import hashlib
+import posixpath
+import string
+from datetime import datetime, timezone
+
+from models import RemoteFile
+
+# Fields available in a blob name template.
+TEMPLATE_FIELDS = (
+    "bip",
+    "name",
+    "basename",
+    "stem",
+    "ext",
+    "dir",
+    "yyyy",
+    "mm",
+    "dd",
+    "hh",
+    "date",
+    "hash",
+)
+
+
+class BlobNamer:
+    """
+    Build GCS object names for transferred files from a template.
+
+    The template is a str.format string, such as
+    "{bip}/dt={date}/{hash:.6}-{name}". Date fields come from the file's
+    remote modification time in UTC, so a retried file always maps to the
+    same object. {hash} is 16 hex digits identifying the file by BIP, path,
+    size, and modification time; "{hash:.4}" keeps the first four. A file
+    redelivered under an old name with a new size or modification time
+    therefore gets a new object instead of overwriting the earlier one, and
+    a leading hash spreads sequential names across the keyspace.
+    """
+
+    def __init__(self, template: str, bip_name: str) -> None:
+        """
+        Raises:
+            ValueError: If the template is empty, malformed, uses an unknown
+                field, or has no field that tells files apart.
+        """
+        self.template = template
+        self.bip_name = bip_name
+        try:
+            used = {
+                name
+                for _, name, _, _ in string.Formatter().parse(template)
+                if name is not None
+            }
+        except ValueError as e:
+            raise ValueError(f"Invalid blob name template '{template}': {e}") from e
+        unknown = sorted(used - set(TEMPLATE_FIELDS))
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s) {', '.join(unknown)} in blob name template "
+                f"'{template}'. Expected {', '.join(TEMPLATE_FIELDS)}."
+            )
+        if not used & {"name", "basename", "stem", "hash"}:
+            raise ValueError(
+                f"Blob name template '{template}' needs {{name}}, {{basename}}, "
+                "{stem}, or {hash} to tell files apart."
+            )
+        # Catch bad format specs now rather than on the first file.
+        try:
+            self.blob_name(RemoteFile("x.csv", "/x.csv", "x.csv", 0, 0))
+        except ValueError as e:
+            raise ValueError(f"Invalid blob name template '{template}': {e}") from e
+
+    def file_hash(self, remote_file: RemoteFile) -> str:
+        """
+        Return the 16-hex-digit identity hash used by {hash}.
+
+        The hash covers the BIP, relative path, size, and remote modification
+        time, which SFTP reports in whole seconds. A file redelivered with the
+        same name and size within the same second therefore gets the same
+        hash and overwrites the earlier object.
+        """
+        key = (
+            f"{self.bip_name}/{remote_file.relative_path}:"
+            f"{remote_file.size}:{remote_file.mtime}"
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def blob_name(self, remote_file: RemoteFile) -> str:
+        """
+        Return the object name for remote_file.
+
+        Raises:
+            ValueError: If a format spec in the template does not apply.
+        """
+        if remote_file.mtime is not None:
+            when = datetime.fromtimestamp(remote_file.mtime, tz=timezone.utc)
+        else:
+            when = datetime.now(timezone.utc)
+        relative = remote_file.relative_path
+        basename = posixpath.basename(relative)
+        stem, _, ext = basename.rpartition(".")
+        if not stem:
+            stem, ext = basename, ""
+        name = self.template.format(
+            bip=self.bip_name,
+            name=relative,
+            basename=basename,
+            stem=stem,
+            ext=ext,
+            dir=posixpath.dirname(relative),
+            yyyy=f"{when:%Y}",
+            mm=f"{when:%m}",
+            dd=f"{when:%d}",
+            hh=f"{when:%H}",
+            date=f"{when:%Y-%m-%d}",
+            hash=self.file_hash(remote_file),
+        )
+        # An empty {dir} must not leave "//" or a leading "/" in the name.
+        return posixpath.normpath("/" + name).lstrip("/")
@@ -0,0 +1,199 @@
+import logging
+import threading
+import time
+
+
+class TransferAborted(IOError):
+    """Raised when a transfer is stopped by stall or deadline detection."""
+
+
+class TransferStalled(TransferAborted):
+    """Raised when a transfer makes no progress within the stall window."""
+
+
+class TransferDeadlineExceeded(TransferAborted):
+    """Raised when a transfer runs past its size-scaled deadline."""
+
+
+class TransferProgress:
+    """Bytes moved for one file in one stage, with deadline and stall checks."""
+
+    def __init__(
+        self,
+        name: str,
+        stage: str,
+        total: int,
+        deadline_s: float | None,
+        stall_s: float | None = None,
+    ) -> None:
+        self.name = name
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.deadline_s = deadline_s
+        self.stall_s = stall_s
+        self.started = time.monotonic()
+        self.last_progress_at = self.started
+        self._lock = threading.Lock()
+
+    def update(self, nbytes: int) -> None:
+        """
+        Record nbytes more moved; called from transfer callbacks.
+
+        Raises:
+            TransferStalled: If more than stall_s passed since the last update
+                that moved data.
+            TransferDeadlineExceeded: If the transfer has run past its deadline.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = now - self.last_progress_at
+            self.done += nbytes
+            if nbytes:
+                self.last_progress_at = now
+        if self.stall_s and idle > self.stall_s:
+            raise TransferStalled(
+                f"{self.stage} of '{self.name}' stalled: no data for {idle:.0f}s "
+                f"after {self.done}/{self.total} bytes"
+            )
+        if self.deadline_s and now - self.started > self.deadline_s:
+            raise TransferDeadlineExceeded(
+                f"{self.stage} of '{self.name}' exceeded its {self.deadline_s:.0f}s "
+                f"deadline after {self.done}/{self.total} bytes"
+            )
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def bytes_per_s(self) -> float:
+        elapsed = self.elapsed_s
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def describe(self) -> str:
+        """Return a one-line progress description for logs."""
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        idle = time.monotonic() - self.last_progress_at
+        return (
+            f"{self.name} {self.stage} {percent:.0f}% "
+            f"({self.done}/{self.total} bytes, {self.bytes_per_s / 1024:.0f} KiB/s, "
+            f"idle {idle:.0f}s)"
+        )
+
+
+class ProgressReader:
+    """Read-through file wrapper that reports every read to a TransferProgress."""
+
+    def __init__(self, fp, progress: TransferProgress) -> None:
+        self._fp = fp
+        self._progress = progress
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fp.read(size)
+        self._progress.update(len(data))
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self._fp, name)
+
+
+class ProgressTracker:
+    """
+    Live progress of every in-flight transfer for one BIP.
+
+    Transfers register when they start and unregister when they end, when
+    their bytes and time are added to per-stage totals. An optional
+    background thread logs a line per active transfer at a fixed
+    interval so long transfers are visible without waiting for completion.
+    """
+
+    def __init__(
+        self,
+        *,
+        deadline_base_s: float = 0.0,
+        deadline_min_bytes_per_s: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            deadline_base_s: Fixed part of each transfer's deadline.
+            deadline_min_bytes_per_s: Slowest acceptable average throughput;
+                a file of n bytes gets deadline_base_s + n / this value
+                seconds. 0 disables per-file deadlines.
+        """
+        self.deadline_base_s = deadline_base_s
+        self.deadline_min_bytes_per_s = deadline_min_bytes_per_s
+        self._active: dict[int, TransferProgress] = {}
+        self._stage_bytes: dict[str, int] = {}
+        self._stage_seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def deadline_for(self, size: int) -> float | None:
+        """Return the deadline in seconds for a file of size bytes, if enabled."""
+        if self.deadline_min_bytes_per_s <= 0:
+            return None
+        return self.deadline_base_s + size / self.deadline_min_bytes_per_s
+
+    def start(
+        self, name: str, stage: str, total: int, stall_s: float | None = None
+    ) -> TransferProgress:
+        """
+        Register a transfer and return its progress handle.
+
+        With stall_s, the transfer fails once data stops arriving for that
+        long; only pass it for transfers that report every block they move.
+        """
+        progress = TransferProgress(
+            name, stage, total, self.deadline_for(total), stall_s
+        )
+        with self._lock:
+            self._active[id(progress)] = progress
+        return progress
+
+    def finish(self, progress: TransferProgress) -> None:
+        """Unregister a transfer, whether it succeeded or failed."""
+        with self._lock:
+            if self._active.pop(id(progress), None) is not None:
+                stage = progress.stage
+                self._stage_bytes[stage] = self._stage_bytes.get(stage, 0) + progress.done
+                self._stage_seconds[stage] = (
+                    self._stage_seconds.get(stage, 0.0) + progress.elapsed_s
+                )
+
+    def stage_seconds(self, stage: str) -> float:
+        """Return the time finished transfers spent in stage, summed over files."""
+        with self._lock:
+            return self._stage_seconds.get(stage, 0.0)
+
+    def stage_bytes(self, stage: str) -> int:
+        """Return the bytes finished transfers moved in stage."""
+        with self._lock:
+            return self._stage_bytes.get(stage, 0)
+
+    def snapshot(self) -> list[TransferProgress]:
+        """Return the transfers in flight right now."""
+        with self._lock:
+            return list(self._active.values())
+
+    def start_logging(self, interval_s: float) -> None:
+        """Log active transfers every interval_s seconds until stop_logging."""
+        if interval_s <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval_s):
+                for progress in self.snapshot():
+                    logging.info(f"Progress: {progress.describe()}")
+
+        self._thread = threading.Thread(target=run, name="progress-log", daemon=True)
+        self._thread.start()
+
+    def stop_logging(self) -> None:
+        """Stop the periodic progress log started by start_logging."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
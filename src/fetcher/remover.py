@@ -0,0 +1,158 @@
+import logging
+import time
+from typing import Callable
+
+import paramiko
+from paramiko.sftp import CMD_REMOVE, CMD_STATUS
+
+from models import FileResult
+
+# Pipelining goes through SFTPClient's async request protocol, the one its
+# own file prefetch uses: _async_request registers a reply handler,
+# _read_response dispatches each reply to it, and _convert_status turns a
+# status reply into an error. pyproject.toml bounds paramiko to the major
+# versions tests/test_remover.py has run against.
+
+
+class _RemoveReplies:
+    """Reply handler for one batch; SFTPClient calls _async_response per reply."""
+
+    def __init__(self, sftp_client: paramiko.SFTPClient) -> None:
+        self.sftp_client = sftp_client
+        # request id -> (perf counter the reply arrived, error or None)
+        self.replies: dict[int, tuple[float, Exception | None]] = {}
+
+    def _async_response(self, t: int, msg, num: int) -> None:
+        error = None
+        try:
+            if t != CMD_STATUS:
+                raise paramiko.SFTPError(f"Expected status, got {t}")
+            self.sftp_client._convert_status(msg)
+        except Exception as e:
+            # A failure status (missing file, no permission, SFTP_FAILURE)
+            # is still a reply; the channel stays usable.
+            error = e
+        self.replies[num] = (time.perf_counter(), error)
+
+
+class BatchRemover:
+    """Delete remote files in pipelined batches on a dedicated SFTP channel."""
+
+    def __init__(
+        self,
+        open_channel: Callable[[], paramiko.SFTPClient],
+        batch_size: int = 100,
+        on_result: Callable[[FileResult, float, float, int], None] | None = None,
+    ) -> None:
+        """
+        Args:
+            open_channel: Opens the channel used only by this remover, so its
+                replies are never interleaved with transfer traffic.
+            batch_size: Queued deletions that trigger an automatic flush; all
+                of a batch's requests are in flight at once.
+            on_result: Called with each delete result, the Unix time its
+                request was sent, the seconds until its reply or failure, and
+                the number of requests in its batch.
+        """
+        self.open_channel = open_channel
+        self.batch_size = max(1, batch_size)
+        self.on_result = on_result
+        self._queued: list[tuple[str, str]] = []
+        self._sftp: paramiko.SFTPClient | None = None
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def add(self, remote_path: str, file_name: str) -> list[FileResult]:
+        """
+        Queue one confirmed upload for remote deletion.
+
+        Returns:
+            Delete results when the batch filled up and was flushed, otherwise
+            an empty list.
+        """
+        self._queued.append((remote_path, file_name))
+        if len(self._queued) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self) -> list[FileResult]:
+        """
+        Send every queued REMOVE request, then collect the replies.
+
+        All requests are written before any reply is read, so the batch costs
+        about one round trip instead of one per file. Replies are matched to
+        files by SFTP request id, so out-of-order replies are handled. A
+        failure status fails only its file; a broken channel fails every
+        unanswered request and is reopened for the next batch.
+
+        Returns:
+            One delete FileResult per queued file, in queue order.
+        """
+        queued, self._queued = self._queued, []
+        if not queued:
+            return []
+
+        logging.info(f"Deleting {len(queued)} remote file(s) in one pipelined batch")
+        # request id -> file name
+        requests: dict[int, str] = {}
+        # file name -> (Unix time, perf counter) its request was sent
+        sent: dict[str, tuple[float, float]] = {}
+        replies: _RemoveReplies | None = None
+        channel_error: Exception | None = None
+        try:
+            if self._sftp is None:
+                self._sftp = self.open_channel()
+            replies = _RemoveReplies(self._sftp)
+            for remote_path, file_name in queued:
+                sent[file_name] = (time.time(), time.perf_counter())
+                num = self._sftp._async_request(replies, CMD_REMOVE, remote_path)
+                requests[num] = file_name
+            while not requests.keys() <= replies.replies.keys():
+                self._sftp._read_response()
+        except (paramiko.SSHException, EOFError, OSError) as e:
+            logging.error(f"Pipelined remote deletion failed: {e}")
+            channel_error = e
+            self._discard_channel()
+
+        answered = replies.replies if replies is not None else {}
+        by_name: dict[str, tuple[float, Exception | None]] = {
+            file_name: answered[num]
+            for num, file_name in requests.items()
+            if num in answered
+        }
+        now = time.perf_counter()
+        ordered = []
+        for _, file_name in queued:
+            replied_at, error = by_name.get(
+                file_name,
+                (now, channel_error or RuntimeError("Remove request was not sent")),
+            )
+            if error is None:
+                result = FileResult(name=file_name, success=True, stage="delete")
+            else:
+                logging.error(f"Failed to remove {file_name}: {error}")
+                result = FileResult(
+                    name=file_name,
+                    success=False,
+                    stage="delete",
+                    error_message=str(error),
+                )
+            if self.on_result is not None:
+                sent_at, started = sent.get(file_name, (time.time(), now))
+                self.on_result(result, sent_at, replied_at - started, len(queued))
+            ordered.append(result)
+        return ordered
+
+    def close(self) -> None:
+        """Close the remover's channel."""
+        self._discard_channel()
+
+    def _discard_channel(self) -> None:
+        sftp, self._sftp = self._sftp, None
+        if sftp is None:
+            return
+        try:
+            sftp.close()
+        except Exception:
+            pass
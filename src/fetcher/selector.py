@@ -0,0 +1,61 @@
+import fnmatch
+import re
+from typing import Iterable
+
+from models import SFTPConfig
+
+
+class FileSelector:
+    """Decide which remote filenames a BIP transfers."""
+
+    def __init__(
+        self,
+        suffixes: Iterable[str] = (),
+        globs: Iterable[str] = (),
+        regex: str = "",
+    ) -> None:
+        """
+        Build a selector from suffixes, glob patterns, and a regular expression.
+
+        A filename is selected when it matches any configured rule.
+
+        Raises:
+            ValueError: If no rule is configured or the regex is invalid.
+        """
+        self.suffixes = tuple(s for s in suffixes if s)
+        self.globs = tuple(g for g in globs if g)
+        try:
+            self.regex = re.compile(regex) if regex else None
+        except re.error as e:
+            raise ValueError(f"Invalid file regex '{regex}': {e}") from e
+        if not (self.suffixes or self.globs or self.regex):
+            raise ValueError("No file suffix, glob, or regex configured.")
+
+    @classmethod
+    def from_config(cls, config: SFTPConfig) -> "FileSelector":
+        """Build a selector from the comma-separated SFTPConfig selection fields."""
+        return cls(
+            suffixes=_split_csv(config.target_file_type),
+            globs=_split_csv(config.target_file_glob),
+            regex=config.target_file_regex,
+        )
+
+    def matches(self, file_name: str) -> bool:
+        """Return True when file_name should be transferred."""
+        if self.suffixes and file_name.endswith(self.suffixes):
+            return True
+        if any(fnmatch.fnmatchcase(file_name, g) for g in self.globs):
+            return True
+        return bool(self.regex and self.regex.search(file_name))
+
+    def describe(self) -> str:
+        """Return a short human-readable description for logs and emails."""
+        parts = list(self.suffixes) + list(self.globs)
+        if self.regex:
+            parts.append(f"/{self.regex.pattern}/")
+        return ", ".join(parts)
+
+
+def _split_csv(value: str) -> list[str]:
+    """Split a comma-separated setting into stripped, non-empty items."""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
@@ -0,0 +1,201 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from models import RemoteFile
+
+from .download import PART_SUFFIX, STATE_SUFFIX
+
+
+def _allocated(path: str) -> int:
+    """Return the bytes path occupies on disk, or 0 if it does not exist."""
+    try:
+        return os.stat(path).st_blocks * 512
+    except (FileNotFoundError, AttributeError):
+        return 0
+
+
+class StagingArea:
+    """
+    Local staging directories for one BIP, with disk space admission.
+
+    Before a download starts, reserve() picks a directory for the file and
+    holds its remote size against that directory's volume. A file is only
+    admitted while the volume's free space, less every outstanding
+    reservation on it, stays at or above min_free_bytes after the file. A
+    reservation shrinks as the file's bytes are allocated on disk, and is
+    dropped with release() once the file leaves staging. Reservations are
+    shared by every StagingArea in the process, so BIPs staging on the same
+    volume see each other's downloads.
+
+    A file with a partial download in one of the directories is always
+    staged there, so it resumes. Other files go to the directory with the
+    most space left.
+    """
+
+    # local file path -> (volume, reserved bytes), for every BIP in the process
+    _held: dict[str, tuple[int, int]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, dirs: list[str], min_free_bytes: int) -> None:
+        """
+        Args:
+            dirs: Existing staging directories, possibly on different volumes.
+            min_free_bytes: Free space each volume keeps after admitted files.
+
+        Raises:
+            OSError: If a directory does not exist.
+        """
+        self.dirs = dirs
+        self.min_free_bytes = max(0, min_free_bytes)
+        self._devices = {d: os.stat(d).st_dev for d in dirs}
+        self._mine: set[str] = set()
+
+    def _outstanding(self, device: int) -> int:
+        """Reserved bytes on device not yet allocated by their files."""
+        return sum(
+            max(0, nbytes - _allocated(path + PART_SUFFIX) - _allocated(path))
+            for path, (dev, nbytes) in self._held.items()
+            if dev == device
+        )
+
+    def _resume_dir(self, remote_file: RemoteFile) -> str | None:
+        for d in self.dirs:
+            if os.path.exists(os.path.join(d, remote_file.relative_path) + PART_SUFFIX):
+                return d
+        return None
+
+    def available(self, directory: str) -> int:
+        """Return directory's free bytes less outstanding reservations and min_free_bytes."""
+        with self._lock:
+            return self._available(directory)
+
+    def _available(self, directory: str) -> int:
+        free = shutil.disk_usage(directory).free
+        return free - self._outstanding(self._devices[directory]) - self.min_free_bytes
+
+    def reserve(self, remote_file: RemoteFile) -> bool:
+        """
+        Reserve space for remote_file in one of the staging directories.
+
+        Returns:
+            True when the file is admitted; False when no directory has room,
+            in which case nothing is reserved.
+        """
+        size = remote_file.size or 0
+        with self._lock:
+            resume_dir = self._resume_dir(remote_file)
+            candidates = [resume_dir] if resume_dir else self.dirs
+            best, room = None, 0
+            for d in candidates:
+                path = os.path.join(d, remote_file.relative_path)
+                left = self._available(d) - max(
+                    0, size - _allocated(path + PART_SUFFIX)
+                )
+                if left >= 0 and (best is None or left > room):
+                    best, room = d, left
+            if best is None:
+                return False
+            path = os.path.join(best, remote_file.relative_path)
+            self._held[path] = (self._devices[best], size)
+            self._mine.add(path)
+            return True
+
+    def path_for(self, remote_file: RemoteFile) -> str:
+        """
+        Return remote_file's local path in its reserved directory.
+
+        Without a reservation, the directory holding its partial download or
+        the first directory is used.
+        """
+        with self._lock:
+            for d in self.dirs:
+                path = os.path.join(d, remote_file.relative_path)
+                if path in self._held:
+                    return path
+            return os.path.join(
+                self._resume_dir(remote_file) or self.dirs[0],
+                remote_file.relative_path,
+            )
+
+    def release(self, remote_file: RemoteFile) -> None:
+        """Drop remote_file's reservation, if it holds one."""
+        with self._lock:
+            for d in self.dirs:
+                path = os.path.join(d, remote_file.relative_path)
+                if path in self._mine:
+                    self._mine.discard(path)
+                    self._held.pop(path, None)
+
+    def release_all(self) -> None:
+        """Drop every reservation this staging area still holds."""
+        with self._lock:
+            for path in self._mine:
+                self._held.pop(path, None)
+            self._mine.clear()
+
+    def root_of(self, path: Path) -> Path | None:
+        """Return the staging directory that contains path."""
+        path = path.resolve()
+        for d in self.dirs:
+            root = Path(d).resolve()
+            if path == root or root in path.parents:
+                return root
+        return None
+
+
+def clean_staging(dirs: list[str], max_age_s: float) -> tuple[int, int]:
+    """
+    Delete partial downloads that can no longer be resumed.
+
+    A .part file without its progress sidecar, a sidecar without its .part
+    file, a half-written sidecar, and any partial download untouched for
+    max_age_s are removed, and so are empty staging subdirectories.
+    Completed files, such as those kept after a failed upload, are never
+    touched. Only call this while no download is running in dirs.
+
+    Returns:
+        The number of files removed and the disk bytes freed.
+    """
+    removed, freed = 0, 0
+    cutoff = time.time() - max_age_s
+    for d in dirs:
+        root = Path(d)
+        if not root.is_dir():
+            continue
+        for dirpath, _, filenames in os.walk(root, topdown=False):
+            names = set(filenames)
+            orphans = []
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name.endswith(STATE_SUFFIX + ".tmp"):
+                    orphans.append(path)
+                elif name.endswith(STATE_SUFFIX):
+                    part = name[: -len(STATE_SUFFIX)] + PART_SUFFIX
+                    if part not in names or os.path.getmtime(path) < cutoff:
+                        orphans.append(path)
+                elif name.endswith(PART_SUFFIX):
+                    state = name[: -len(PART_SUFFIX)] + STATE_SUFFIX
+                    if state not in names or os.path.getmtime(
+                        os.path.join(dirpath, state)
+                    ) < cutoff:
+                        orphans.append(path)
+            for path in orphans:
+                nbytes = _allocated(path)
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logging.warning(f"Failed to remove orphaned partial file {path}: {e}")
+                    continue
+                logging.info(f"Removed orphaned partial file {path}")
+                removed += 1
+                freed += nbytes
+            if Path(dirpath) != root:
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
+    return removed, freed
@@ -0,0 +1,55 @@
+import threading
+import time
+
+
+class BandwidthLimiter:
+    """
+    Token bucket shared by every transfer thread of one BIP.
+
+    Readers call consume() with each block they receive and are put to sleep
+    once the BIP is ahead of its rate, so the combined read rate stays under
+    the limit however many files are in flight. Up to one second of data may
+    be read in a burst. The rate can be changed while transfers are running;
+    a rate of 0 turns the limit off.
+    """
+
+    def __init__(self, bytes_per_s: int = 0) -> None:
+        self._rate = max(0, bytes_per_s)
+        self._available = float(self._rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_per_s(self) -> int:
+        return self._rate
+
+    def set_rate(self, bytes_per_s: int) -> None:
+        """Change the limit; 0 removes it."""
+        with self._lock:
+            self._rate = max(0, bytes_per_s)
+            self._available = min(self._available, float(self._rate))
+
+    def reserve(self, nbytes: int) -> float:
+        """
+        Account for nbytes read without blocking.
+
+        Returns:
+            Seconds the caller should wait before reading more; 0 when the
+            BIP is within its rate.
+        """
+        with self._lock:
+            if self._rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self._available = min(
+                float(self._rate), self._available + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._available -= nbytes
+            return -self._available / self._rate if self._available < 0 else 0.0
+
+    def consume(self, nbytes: int) -> None:
+        """Account for nbytes read, sleeping first if the rate is exceeded."""
+        wait_s = self.reserve(nbytes)
+        if wait_s > 0:
+            time.sleep(wait_s)
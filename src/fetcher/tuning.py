@@ -0,0 +1,43 @@
+import logging
+from typing import Callable
+
+import paramiko
+
+from models import TransportTuning
+
+
+def make_transport_factory(
+    tuning: TransportTuning,
+) -> Callable[..., paramiko.Transport]:
+    """
+    Return a transport_factory for SSHClient.connect that applies tuning.
+
+    Window and packet sizes become the transport defaults, so every SFTP
+    channel opened on the connection inherits them. Preferred ciphers are
+    moved to the front of the negotiation list; unsupported names are logged
+    and ignored.
+    """
+
+    def factory(sock, **kwargs) -> paramiko.Transport:
+        # SSHClient passes its own Transport options, which differ between
+        # paramiko versions (4.x adds gss_kex and gss_deleg_creds).
+        if tuning.window_size:
+            kwargs["default_window_size"] = tuning.window_size
+        if tuning.max_packet_size:
+            kwargs["default_max_packet_size"] = tuning.max_packet_size
+        transport = paramiko.Transport(sock, **kwargs)
+
+        if tuning.ciphers:
+            options = transport.get_security_options()
+            available = list(options.ciphers)
+            preferred = [c for c in tuning.ciphers if c in available]
+            unknown = [c for c in tuning.ciphers if c not in available]
+            if unknown:
+                logging.warning(f"Ignoring unsupported SSH ciphers: {unknown}")
+            if preferred:
+                options.ciphers = preferred + [
+                    c for c in available if c not in preferred
+                ]
+        return transport
+
+    return factory
@@ -0,0 +1,144 @@
+import logging
+import posixpath
+import queue
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+import paramiko
+
+from models import RemoteFile
+
+from .selector import FileSelector
+
+# Outstanding READDIR requests kept in flight while streaming a listing.
+LISTING_READ_AHEADS = 50
+
+# Matching entries buffered between the listing threads and the transfer loop.
+WALK_QUEUE_SIZE = 10_000
+
+_DONE = object()
+
+
+class RemoteWalker:
+    """Stream matching files from a remote directory tree."""
+
+    def __init__(
+        self,
+        open_channel: Callable[[], paramiko.SFTPClient],
+        root: str,
+        selector: FileSelector,
+        *,
+        recursive: bool = False,
+        max_depth: int = 0,
+        concurrency: int = 1,
+    ) -> None:
+        """
+        Configure a walk of root.
+
+        Args:
+            open_channel: Opens a new SFTP channel; each listing thread gets its own.
+            root: Remote directory to walk.
+            selector: Decides which filenames are yielded.
+            recursive: Whether to descend into subdirectories.
+            max_depth: Deepest subdirectory level listed below root.
+            concurrency: Number of directories listed at the same time.
+        """
+        self.open_channel = open_channel
+        self.root = root.rstrip("/") or "/"
+        self.selector = selector
+        self.recursive = recursive
+        self.max_depth = max(0, max_depth)
+        self.concurrency = max(1, concurrency)
+
+    def walk(self) -> Iterator[RemoteFile]:
+        """
+        Yield matching files as soon as any listing thread finds them.
+
+        Directories are listed in background threads so the caller can start
+        transferring before the whole tree has been read. A failure to list
+        root is raised to the caller; subdirectory failures are logged and
+        skipped. Closing the generator stops the remaining listings.
+        """
+        found: queue.Queue = queue.Queue(maxsize=WALK_QUEUE_SIZE)
+        stop = threading.Event()
+        lock = threading.Lock()
+        local = threading.local()
+        channels: list[paramiko.SFTPClient] = []
+        pending = 1
+
+        def channel() -> paramiko.SFTPClient:
+            sftp = getattr(local, "sftp", None)
+            if sftp is None:
+                sftp = self.open_channel()
+                local.sftp = sftp
+                with lock:
+                    channels.append(sftp)
+            return sftp
+
+        def put(item) -> None:
+            while not stop.is_set():
+                try:
+                    found.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def list_dir(relative_dir: str, depth: int) -> None:
+            nonlocal pending
+            remote_dir = (
+                posixpath.join(self.root, relative_dir) if relative_dir else self.root
+            )
+            try:
+                for attr in channel().listdir_iter(
+                    remote_dir, read_aheads=LISTING_READ_AHEADS
+                ):
+                    if stop.is_set():
+                        return
+                    relative_path = posixpath.join(relative_dir, attr.filename)
+                    if attr.st_mode is not None and stat.S_ISDIR(attr.st_mode):
+                        if self.recursive and depth < self.max_depth:
+                            with lock:
+                                pending += 1
+                            pool.submit(list_dir, relative_path, depth + 1)
+                        continue
+                    if self.selector.matches(attr.filename):
+                        put(
+                            RemoteFile(
+                                name=attr.filename,
+                                remote_path=posixpath.join(remote_dir, attr.filename),
+                                relative_path=relative_path,
+                                size=attr.st_size,
+                                mtime=attr.st_mtime,
+                            )
+                        )
+            except Exception as e:
+                if not relative_dir:
+                    put(e)
+                elif not stop.is_set():
+                    logging.warning(f"Failed to list remote directory '{remote_dir}': {e}")
+            finally:
+                with lock:
+                    pending -= 1
+                    finished = pending == 0
+                if finished:
+                    put(_DONE)
+
+        pool = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="sftp-list"
+        )
+        pool.submit(list_dir, "", 0)
+        try:
+            while True:
+                item = found.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            for sftp in channels:
+                sftp.close()
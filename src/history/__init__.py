@@ -0,0 +1,14 @@
+from .history import (
+    RunHistory,
+    compare_with_history,
+    flag_regressions,
+    format_rate,
+    trend_text,
+)
+from .plan import estimate_duration_s, format_bytes, format_duration, plan_report
+
+__version__ = "1.0.0"
+__author__ = "Bryan Olandres"
+
+# Expose main classes/functions at package level
+__all__ = ["RunHistory", "compare_with_history", "estimate_duration_s", "flag_regressions", "format_bytes", "format_duration", "format_rate", "plan_report", "trend_text"]
@@ -0,0 +1,234 @@
+import logging
+import socket
+import sqlite3
+import time
+from pathlib import Path
+
+from models import BIPStats, BIPSummary
+
+# Schema for the run history; columns are only ever added, never changed.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bip_runs (
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    bip_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    files_found INTEGER NOT NULL,
+    files_moved INTEGER NOT NULL,
+    files_deleted INTEGER NOT NULL,
+    files_failed INTEGER NOT NULL,
+    files_deferred INTEGER NOT NULL,
+    bytes_moved INTEGER NOT NULL,
+    duration_s REAL NOT NULL,
+    download_s REAL NOT NULL,
+    upload_s REAL NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (run_id, bip_name)
+);
+CREATE INDEX IF NOT EXISTS bip_runs_by_bip ON bip_runs (bip_name, recorded_at);
+"""
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the pct-th percentile of values, interpolating between ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class RunHistory:
+    """
+    Local SQLite record of every run's per-BIP summaries.
+
+    One row is kept per BIP per run, with its counts, bytes moved, and time
+    per stage, so trends can be read back over weeks of runs. Only runs that
+    moved at least one file are used for percentiles; empty runs finish in
+    seconds and would hide real slowdowns.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        """
+        Args:
+            db_path: SQLite database file; created with its schema if missing.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30)
+        self._conn.executescript(_SCHEMA)
+
+    def record(self, run_id: str, summaries: list[BIPSummary]) -> None:
+        """Append one run's summaries to the history."""
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, host, recorded_at) VALUES (?, ?, ?)",
+                (run_id, socket.gethostname(), now),
+            )
+            self._conn.executemany(
+                "INSERT INTO bip_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        s.bip_name,
+                        s.status,
+                        s.files_found,
+                        len(s.downloaded),
+                        len(s.deleted),
+                        s.files_failed,
+                        len(s.deferred),
+                        s.bytes_moved,
+                        s.duration_s,
+                        s.download_s,
+                        s.upload_s,
+                        now,
+                    )
+                    for s in summaries
+                ],
+            )
+        logging.info(f"Recorded run {run_id} in history {self.db_path}")
+
+    def stats(self, bip_name: str, window: int) -> BIPStats | None:
+        """
+        Return duration and throughput percentiles over a BIP's last runs.
+
+        Args:
+            bip_name: BIP label.
+            window: Most recent runs that moved files to include.
+
+        Returns:
+            The percentiles, or None when the BIP has no such runs yet.
+        """
+        rows = self._conn.execute(
+            "SELECT duration_s, bytes_moved FROM bip_runs "
+            "WHERE bip_name = ? AND files_moved > 0 AND duration_s > 0 "
+            "ORDER BY recorded_at DESC LIMIT ?",
+            (bip_name, window),
+        ).fetchall()
+        if not rows:
+            return None
+        durations = [duration for duration, _ in rows]
+        throughputs = [moved / duration for duration, moved in rows]
+        return BIPStats(
+            bip_name=bip_name,
+            runs=len(rows),
+            p50_duration_s=percentile(durations, 50),
+            p95_duration_s=percentile(durations, 95),
+            p50_bytes_per_s=percentile(throughputs, 50),
+            p95_bytes_per_s=percentile(throughputs, 95),
+        )
+
+    def stream_rate(self, bip_name: str, window: int) -> float | None:
+        """
+        Return the bytes per second one transfer slot moved in a BIP's last runs.
+
+        Download and upload time are summed over files, so concurrent
+        transfers do not inflate the rate. Returns None without history.
+        """
+        row = self._conn.execute(
+            "SELECT SUM(bytes_moved), SUM(download_s + upload_s) FROM ("
+            "SELECT bytes_moved, download_s, upload_s FROM bip_runs "
+            "WHERE bip_name = ? AND files_moved > 0 AND download_s + upload_s > 0 "
+            "ORDER BY recorded_at DESC LIMIT ?)",
+            (bip_name, window),
+        ).fetchone()
+        if not row or not row[0] or not row[1]:
+            return None
+        return row[0] / row[1]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def flag_regressions(
+    stats: BIPStats, summary: BIPSummary, threshold_pct: float, min_runs: int
+) -> None:
+    """
+    Mark stats when summary is slower than the BIP's median by threshold_pct.
+
+    Runs that moved no files, and BIPs with fewer than min_runs past runs,
+    are never flagged.
+    """
+    if stats.runs < min_runs or not summary.downloaded or summary.duration_s <= 0:
+        return
+    factor = threshold_pct / 100.0
+    stats.duration_regressed = summary.duration_s > stats.p50_duration_s * (1 + factor)
+    stats.throughput_regressed = summary.bytes_per_s < stats.p50_bytes_per_s * (
+        1 - factor
+    )
+
+
+def format_rate(bytes_per_s: float) -> str:
+    """Return a throughput in KiB/s or MiB/s."""
+    if bytes_per_s < 1024 * 1024:
+        return f"{bytes_per_s / 1024:.0f} KiB/s"
+    return f"{bytes_per_s / (1024 * 1024):.1f} MiB/s"
+
+
+def trend_text(stats: BIPStats | None) -> str:
+    """Return the history percentiles and regression flags for one BIP."""
+    if stats is None:
+        return "no history yet"
+    text = (
+        f"p50/p95 {stats.p50_duration_s:.1f}s/{stats.p95_duration_s:.1f}s, "
+        f"{format_rate(stats.p50_bytes_per_s)}/{format_rate(stats.p95_bytes_per_s)} "
+        f"over {stats.runs} runs"
+    )
+    flags = []
+    if stats.duration_regressed:
+        flags.append("slower")
+    if stats.throughput_regressed:
+        flags.append("lower throughput")
+    if flags:
+        text += f" - REGRESSION: {', '.join(flags)}"
+    return text
+
+
+def compare_with_history(
+    db_path: Path,
+    summaries: list[BIPSummary],
+    run_id: str,
+    *,
+    window: int,
+    threshold_pct: float,
+    min_runs: int,
+) -> dict[str, BIPStats]:
+    """
+    Compare a run with the run history, then append it to the history.
+
+    Each BIP's percentiles come from its last window runs before this one,
+    and a run that falls behind the median duration or throughput by more
+    than threshold_pct percent is flagged. History failures are logged and
+    never raised, so they cannot stop the summary email.
+
+    Returns:
+        Percentiles by BIP name, for BIPs with history.
+    """
+    stats: dict[str, BIPStats] = {}
+    try:
+        history = RunHistory(db_path)
+    except Exception as e:
+        logging.error(f"Failed to open run history {db_path}: {e}")
+        return stats
+    try:
+        for s in summaries:
+            st = history.stats(s.bip_name, window)
+            if st is None:
+                continue
+            flag_regressions(st, s, threshold_pct, min_runs)
+            if st.regressed:
+                logging.warning(f"{s.bip_name} regressed: {trend_text(st)}")
+            stats[s.bip_name] = st
+        history.record(run_id, summaries)
+    except Exception as e:
+        logging.error(f"Failed to update run history {db_path}: {e}")
+    finally:
+        history.close()
+    return stats
@@ -0,0 +1,140 @@
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable
+
+from models import RemoteFile
+
+from .history import RunHistory, format_rate
+
+
+def estimate_duration_s(
+    sizes: Iterable[int], bytes_per_s: float, concurrency: int
+) -> float:
+    """
+    Estimate how long files take to move at a given concurrency.
+
+    Files are handed out in the order given to whichever of the concurrency
+    transfer slots frees up first, as Fetcher.fetch_files does, and each
+    slot moves bytes_per_s. This assumes the remote host keeps up with every
+    slot; the estimate is a lower bound once the host or link is saturated.
+
+    Args:
+        sizes: File sizes in bytes, in transfer order.
+        bytes_per_s: Throughput of one transfer slot.
+        concurrency: Files moved at the same time.
+
+    Returns:
+        Estimated seconds until the last file is moved.
+    """
+    slots = [0.0] * max(1, concurrency)
+    for size in sizes:
+        heapq.heappush(slots, heapq.heappop(slots) + size / bytes_per_s)
+    return max(slots)
+
+
+def format_duration(seconds: float) -> str:
+    """Return a duration as hours and minutes, or minutes and seconds."""
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+def format_bytes(nbytes: float) -> str:
+    """Return a byte count in B, KiB, MiB, GiB, or TiB."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} TiB"
+
+
+def plan_report(
+    bips: dict[str, int],
+    survey: Callable[[str], list[RemoteFile]],
+    *,
+    history_path: Path,
+    window: int,
+    concurrencies: list[int],
+    max_parallel_bips: int,
+) -> str:
+    """
+    Estimate how long each BIP's pending files would take to move.
+
+    Every BIP is surveyed at the same time. Estimates use the per-transfer
+    throughput recorded for the BIP in its last window runs, so a BIP
+    without history gets byte totals only. The run total assumes BIPs run
+    max_parallel_bips at a time, largest backlog first.
+
+    Args:
+        bips: Each BIP's current max_concurrent_transfers, by name.
+        survey: Lists a BIP's pending files; a failure is logged and the BIP
+            is shown as failed.
+        history_path: Run history database.
+        window: Past runs per BIP used for its throughput.
+        concurrencies: Transfer concurrencies to compare.
+        max_parallel_bips: BIPs run at the same time.
+
+    Returns:
+        The plan as a table, one row per BIP.
+    """
+
+    def listed(bip_name: str) -> list[RemoteFile] | None:
+        try:
+            return survey(bip_name)
+        except Exception as e:
+            logging.error(f"Listing failed for {bip_name}: {e}")
+            return None
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, len(bips)), thread_name_prefix="plan"
+    ) as pool:
+        surveys = dict(zip(bips, pool.map(listed, bips)))
+
+    rates: dict[str, float | None] = {}
+    try:
+        history = RunHistory(history_path)
+        try:
+            rates = {bip_name: history.stream_rate(bip_name, window) for bip_name in bips}
+        finally:
+            history.close()
+    except Exception as e:
+        logging.error(f"Failed to read run history: {e}")
+
+    header = f"{'BIP':<12}{'Files':>10}{'Bytes':>12}{'Per transfer':>15}" + "".join(
+        f"{f'x{c}':>10}" for c in concurrencies
+    )
+    lines = ["Transfer plan (estimated duration per transfer concurrency)", header]
+    totals = {c: [] for c in concurrencies}
+    for bip_name, current in bips.items():
+        files = surveys[bip_name]
+        if files is None:
+            lines.append(f"{bip_name:<12}  listing failed")
+            continue
+        sizes = [f.size or 0 for f in files]
+        rate = rates.get(bip_name)
+        row = (
+            f"{bip_name:<12}{len(files):>10}{format_bytes(sum(sizes)):>12}"
+            f"{format_rate(rate) if rate else 'no history':>15}"
+        )
+        for c in concurrencies:
+            if rate:
+                estimate = estimate_duration_s(sizes, rate, c)
+                totals[c].append(estimate)
+                mark = "*" if c == current else ""
+                row += f"{format_duration(estimate) + mark:>10}"
+            else:
+                row += f"{'-':>10}"
+        lines.append(row)
+
+    row = f"{f'Run ({max_parallel_bips} BIP(s) at a time)':<49}"
+    for c in concurrencies:
+        run_s = estimate_duration_s(sorted(totals[c], reverse=True), 1.0, max_parallel_bips)
+        row += f"{format_duration(run_s):>10}"
+    lines.append(row)
+    lines.append(
+        "* current max concurrent transfers. "
+        "BIPs without history are left out of the run total."
+    )
+    return "\n".join(lines)
@@ -1,19 +1,76 @@
+import argparse
+import dataclasses
+import functools
 import html
 import logging
 import os
+import socket
 import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 from dotenv import load_dotenv
+from google.cloud import storage
 from infisical_sdk import InfisicalSDKClient
 
-from fetcher import Fetcher
-from models import BIPSummary, SFTPConfig
+from fetcher import (
+    PREFLIGHT_CHECKS,
+    Fetcher,
+    GCSLeaseStore,
+    LeaseStore,
+    LocalLeaseStore,
+    clean_staging,
+)
+from history import (
+    compare_with_history,
+    format_bytes,
+    format_rate,
+    plan_report,
+    trend_text,
+)
+from models import (
+    BIPJob,
+    BIPStats,
+    BIPSummary,
+    FileResult,
+    PreflightResult,
+    RemoteFile,
+    RunSettings,
+    SFTPConfig,
+    SuppressedNotification,
+    TransportTuning,
+)
 from models.models import EmailConfig, InfisicalConfig
-from sender import Sender
+from report import (
+    Tracer,
+    build_run_report,
+    open_tracer,
+    upload_run_report,
+    write_results_report,
+)
+from runctl import (
+    JobFile,
+    RunBudget,
+    RunLock,
+    RunLockHeld,
+    RunStatus,
+    StatusServer,
+    WorkerFailed,
+    preflight_command,
+    readiness_table,
+    run_in_worker,
+    run_preflight,
+    schedule_matches,
+)
+from sender import NotificationLog, Sender
 
-# BIP label (for logs / email) and Infisical secret_path. Order is run order.
+# BIP label (for logs / email) and Infisical secret_path, run in this order
+# with default settings when there is no job file.
 BIP_JOBS: list[tuple[str, str]] = [
     # ("PRTPE_TEST", "/prtpe_test"),
     # ("PRTSO_TEST", "/prtso_test"),
@@ -25,6 +82,48 @@ BIP_JOBS: list[tuple[str, str]] = [
     ("BIGE", "/bige"),
 ]
 
+# Failed files listed per BIP in the summary email body. The attached results
+# report always carries every per-file outcome.
+SUMMARY_MAX_FAILURES_PER_BIP = 10
+
+# Results reports larger than this are gzip-compressed before being attached.
+REPORT_GZIP_THRESHOLD_BYTES = 256 * 1024
+
+# Default run time budget and the part of it kept back for in-flight files,
+# remote deletions, and the summary email. Overridable in config/.env.
+RUN_TIME_BUDGET_S = 55 * 60
+RUN_BUDGET_RESERVE_S = 5 * 60
+
+# Default resident memory limit for a BIP worker process in process mode.
+WORKER_RSS_LIMIT_MB = 2048
+
+# Default lifetime of a file lease when runners coordinate through leases.
+LEASE_TTL_S = 15 * 60
+
+# Transfer concurrencies compared by plan mode unless --concurrency is given.
+PLAN_CONCURRENCIES = (1, 2, 4, 8)
+
+# Run history defaults: runs per BIP used for percentiles, how far a run may
+# fall behind the median before it is flagged, and the runs needed first.
+HISTORY_WINDOW = 20
+HISTORY_REGRESSION_PCT = 50
+HISTORY_MIN_RUNS = 5
+
+# Seconds between checks of the job file for changes during a run.
+JOBS_RELOAD_INTERVAL_S = 5
+
+# Default time during which a repeat of a sent notification is suppressed.
+NOTIFY_COOLDOWN_S = 6 * 60 * 60
+
+# Partial downloads untouched for longer than this are removed at startup.
+STAGING_PART_MAX_AGE_S = 2 * 24 * 60 * 60
+
+# Timeout for each network step of a BIP's pre-flight check.
+PREFLIGHT_TIMEOUT_S = 10
+
+# Default object prefix for run reports in RUN_REPORT_BUCKET.
+RUN_REPORT_PREFIX = "move-it/runs"
+
 
 def init_logger() -> None:
     """Append logs to app.log and echo them to the console."""
@@ -51,6 +150,8 @@ def init_sender(
     use_ssl: bool,
     subject_prefix: str,
     app_name: str,
+    timeout_s: float = 30,
+    notifications: NotificationLog | None = None,
 ) -> Sender:
     """
     Build the email sender from SMTP settings.
@@ -69,6 +170,9 @@ def init_sender(
         use_ssl: Whether to use implicit TLS from connection start.
         subject_prefix: Prefix added to outbound email subjects.
         app_name: Application name used in generated exception subjects.
+        timeout_s: Timeout for SMTP connections and commands.
+        notifications: Log used to suppress repeated notifications; None
+            sends every one.
 
     Returns:
         Configured Sender instance.
@@ -84,9 +188,10 @@ def init_sender(
         use_ssl=use_ssl,
         subject_prefix=subject_prefix,
         app_name=app_name,
+        timeout_s=timeout_s,
     )
 
-    return Sender(config=email_cfg)
+    return Sender(config=email_cfg, notifications=notifications)
 
 
 def init_infisical_client() -> InfisicalConfig:
@@ -134,10 +239,20 @@ def _now_str() -> str:
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
-def _safe_notify(email_sender: Sender, *, subject: str, body: str) -> None:
-    """Send an email notification without propagating SMTP failures."""
+def _safe_notify(email_sender: Sender, *, bip_name: str, kind: str, body: str) -> None:
+    """
+    Send an email notification without propagating SMTP failures.
+
+    Repeats of the same kind and error for a BIP are suppressed while they
+    are within the sender's cool-down.
+    """
     try:
-        email_sender.send(subject=subject, body=body)
+        email_sender.notify(
+            bip_name=bip_name,
+            kind=kind,
+            subject=f"[{_now_str()}] [{bip_name}] {kind}",
+            body=body,
+        )
     except Exception as notify_error:
         logging.error(f"Failed to send notification email: {notify_error}")
 
@@ -160,16 +275,61 @@ def _secrets_dict_at_path(
     return {row.secretKey: row.secretValue for row in rows}
 
 
+def _int_setting(
+    sc_dct: dict[str, str], key: str, default: int | None
+) -> int | None:
+    """
+    Return an optional integer BIP setting, or default when it is unset.
+
+    Raises:
+        ValueError: If the value is set but is not an integer.
+    """
+    raw = (sc_dct.get(key) or "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{key} must be an integer, got '{raw}'.")
+
+
+def _bool_setting(sc_dct: dict[str, str], key: str, default: bool) -> bool:
+    """
+    Return an optional true/false BIP setting, or default when it is unset.
+
+    Raises:
+        ValueError: If the value is set but is not a recognized boolean.
+    """
+    raw = (sc_dct.get(key) or "").strip().lower()
+    if not raw:
+        return default
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{key} must be true or false, got '{raw}'.")
+
+
 def _status_emoji(status: str) -> str:
     return {
         "success": "&#x2705;",
         "partial": "&#x26A0;",
         "failed": "&#x274C;",
         "no_files": "&#x26AA;",
+        "skipped": "&#x23ED;",
     }.get(status, "&#x2753;")
 
 
-def _build_summary_text(summaries: list[BIPSummary]) -> str:
+def _format_timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _build_summary_text(
+    summaries: list[BIPSummary],
+    max_failures: int = SUMMARY_MAX_FAILURES_PER_BIP,
+    stats: dict[str, BIPStats] | None = None,
+    suppressed: list[SuppressedNotification] | None = None,
+) -> str:
     """Build the plain-text fallback body for the summary email."""
     lines = [
         "PaaS Data Extraction Script - Hourly Summary",
@@ -179,24 +339,80 @@ def _build_summary_text(summaries: list[BIPSummary]) -> str:
     for s in summaries:
         lines.append(f"BIP: {s.bip_name}")
         lines.append(f"  Status: {s.status}")
+        if s.error:
+            lines.append(f"  Error: {s.error}")
         lines.append(f"  Files found: {s.files_found}")
         lines.append(f"  Downloaded: {len(s.downloaded)}")
         lines.append(f"  Deleted: {len(s.deleted)}")
         lines.append(f"  Failed: {s.files_failed}")
+        if s.deferred:
+            lines.append(
+                f"  Deferred to next run: {len(s.deferred)} ({s.deferred_bytes} bytes)"
+            )
+        if s.claimed_elsewhere:
+            lines.append(f"  Moved by other runners: {s.claimed_elsewhere}")
+        quarantined = [fr.name for fr in s.downloaded if fr.quarantined]
+        if quarantined:
+            lines.append(f"  Quarantined: {len(quarantined)}")
+            for name in quarantined[:max_failures]:
+                lines.append(f"    - {name}")
         lines.append(f"  Duration: {s.duration_s:.1f}s")
-        if s.failed_downloads or s.failed_deletions:
+        if s.bytes_moved:
+            lines.append(f"  Moved: {s.bytes_moved} bytes ({format_rate(s.bytes_per_s)})")
+        if stats is not None:
+            lines.append(f"  History: {trend_text(stats.get(s.bip_name))}")
+        failures = s.failed_downloads + s.failed_deletions
+        if failures:
             lines.append("  Failed files:")
-            for fr in s.failed_downloads + s.failed_deletions:
+            for fr in failures[:max_failures]:
                 lines.append(f"    - {fr.name} ({fr.stage}): {fr.error_message or ''}")
+            if len(failures) > max_failures:
+                lines.append(
+                    f"    ... and {len(failures) - max_failures} more "
+                    "(see attached results report)"
+                )
+        lines.append("")
+    if suppressed:
+        lines.append("Suppressed notifications:")
+        for n in suppressed:
+            lines.append(
+                f"  - {n.bip_name}: {n.kind} x{n.count} "
+                f"(last sent {_format_timestamp(n.last_sent_at)})"
+            )
         lines.append("")
     return "\n".join(lines)
 
 
-def _build_summary_html(summaries: list[BIPSummary]) -> str:
-    """Build the HTML body for the summary email."""
+def _build_summary_html(
+    summaries: list[BIPSummary],
+    max_failures: int = SUMMARY_MAX_FAILURES_PER_BIP,
+    stats: dict[str, BIPStats] | None = None,
+    suppressed: list[SuppressedNotification] | None = None,
+) -> str:
+    """
+    Build the HTML body for the summary email.
+
+    Only the first max_failures failed files of each BIP are listed so large
+    outages do not produce oversized emails; the rest are counted. With
+    stats, each BIP also shows its history percentiles, highlighted when
+    the run regressed. Notifications suppressed by their cool-down during
+    the run are counted in their own section.
+    """
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    stats = stats or {}
     rows_html = []
     for s in summaries:
+        st = stats.get(s.bip_name)
+        flagged = "color:#d32f2f;font-weight:bold;"
+        duration_style = flagged if st and st.duration_regressed else ""
+        throughput_style = flagged if st and st.throughput_regressed else ""
+        if st is None:
+            history_cells = ["-", "-"]
+        else:
+            history_cells = [
+                f"{st.p50_duration_s:.1f}s / {st.p95_duration_s:.1f}s",
+                f"{format_rate(st.p50_bytes_per_s)} / {format_rate(st.p95_bytes_per_s)}",
+            ]
         rows_html.append(
             f"<tr>"
             f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;'><strong>{html.escape(s.bip_name)}</strong></td>"
@@ -204,7 +420,11 @@ def _build_summary_html(summaries: list[BIPSummary]) -> str:
             f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{len(s.downloaded)}</td>"
             f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{len(s.deleted)}</td>"
             f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{s.files_failed}</td>"
-            f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{s.duration_s:.1f}s</td>"
+            f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{len(s.deferred)}</td>"
+            f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;{duration_style}'>{s.duration_s:.1f}s</td>"
+            f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;{throughput_style}'>{format_rate(s.bytes_per_s)}</td>"
+            f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{history_cells[0]}</td>"
+            f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;'>{history_cells[1]}</td>"
             f"<td style='padding:10px;border-bottom:1px solid #e0e0e0;text-align:center;font-size:20px;'>{_status_emoji(s.status)}</td>"
             f"</tr>"
         )
@@ -212,21 +432,47 @@ def _build_summary_html(summaries: list[BIPSummary]) -> str:
     # Build failed details section
     failed_details_html = []
     for s in summaries:
-        if s.failed_downloads or s.failed_deletions:
-            failed_items = []
-            for fr in s.failed_downloads:
-                failed_items.append(
-                    f"<li><code>{html.escape(fr.name)}</code> ({html.escape(fr.stage)}) - {html.escape(fr.error_message or '')}</li>"
-                )
-            for fr in s.failed_deletions:
-                failed_items.append(
-                    f"<li><code>{html.escape(fr.name)}</code> ({html.escape(fr.stage)}) - {html.escape(fr.error_message or '')}</li>"
-                )
-            if failed_items:
-                failed_details_html.append(
-                    f"<h3 style='color:#d32f2f;margin-top:20px;'>{html.escape(s.bip_name)}</h3>"
-                    f"<ul style='color:#d32f2f;'>{''.join(failed_items)}</ul>"
-                )
+        failures = s.failed_downloads + s.failed_deletions
+        if not failures and not s.error:
+            continue
+        failed_items = [f"<li>{html.escape(s.error)}</li>"] if s.error else []
+        failed_items += [
+            f"<li><code>{html.escape(fr.name)}</code> ({html.escape(fr.stage)}) - {html.escape(fr.error_message or '')}</li>"
+            for fr in failures[:max_failures]
+        ]
+        if len(failures) > max_failures:
+            failed_items.append(
+                f"<li><em>... and {len(failures) - max_failures} more "
+                f"(see attached results report)</em></li>"
+            )
+        failed_details_html.append(
+            f"<h3 style='color:#d32f2f;margin-top:20px;'>{html.escape(s.bip_name)}</h3>"
+            f"<ul style='color:#d32f2f;'>{''.join(failed_items)}</ul>"
+        )
+
+    regressed = [st for st in stats.values() if st.regressed]
+    regression_section = ""
+    if regressed:
+        regression_items = [
+            f"<li><strong>{html.escape(st.bip_name)}</strong>: {html.escape(trend_text(st))}</li>"
+            for st in regressed
+        ]
+        regression_section = (
+            "<h2 style='color:#d32f2f;margin-top:30px;'>Regressions</h2>"
+            f"<ul style='color:#d32f2f;'>{''.join(regression_items)}</ul>"
+        )
+
+    suppressed_section = ""
+    if suppressed:
+        suppressed_items = [
+            f"<li><strong>{html.escape(n.bip_name)}</strong>: {html.escape(n.kind)} "
+            f"&times;{n.count} (last sent {_format_timestamp(n.last_sent_at)})</li>"
+            for n in suppressed
+        ]
+        suppressed_section = (
+            "<h2 style='color:#555;margin-top:30px;'>Suppressed Notifications</h2>"
+            f"<ul style='color:#555;'>{''.join(suppressed_items)}</ul>"
+        )
 
     failed_section = (
         "<h2 style='color:#d32f2f;margin-top:30px;'>Failed Details</h2>"
@@ -257,51 +503,214 @@ def _build_summary_html(summaries: list[BIPSummary]) -> str:
                 <th>Downloaded</th>
                 <th>Deleted</th>
                 <th>Failed</th>
+                <th>Deferred</th>
                 <th>Duration</th>
+                <th>Throughput</th>
+                <th>Duration p50 / p95</th>
+                <th>Throughput p50 / p95</th>
                 <th>Status</th>
             </tr>
             {"".join(rows_html)}
         </table>
+        {regression_section}
         {failed_section}
+        {suppressed_section}
     </body>
     </html>
     """
     return html_body
 
 
+def _build_sftp_config(
+    bip_name: str, sc_dct: dict[str, str], path_to_gcs_file: Path
+) -> SFTPConfig:
+    """
+    Map one BIP's secrets onto an SFTPConfig.
+
+    Raises:
+        ValueError: If a numeric or boolean setting cannot be parsed.
+    """
+    raw_port = sc_dct.get("PORT", "22")
+    try:
+        port = int(raw_port)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Invalid PORT value for {bip_name}: '{raw_port}'. PORT must be an integer."
+        )
+
+    try:
+        recursive = _bool_setting(sc_dct, "RECURSIVE", False)
+        max_depth = _int_setting(sc_dct, "MAX_DEPTH", 5)
+        listing_concurrency = _int_setting(sc_dct, "LISTING_CONCURRENCY", 4)
+        delete_batch_size = _int_setting(sc_dct, "DELETE_BATCH_SIZE", 100)
+        ranged_download_threshold = _int_setting(
+            sc_dct, "RANGED_DOWNLOAD_THRESHOLD", 256 * 1024 * 1024
+        )
+        ranged_download_streams = _int_setting(sc_dct, "RANGED_DOWNLOAD_STREAMS", 4)
+        max_concurrent_transfers = _int_setting(sc_dct, "MAX_CONCURRENT_TRANSFERS", 1)
+        stall_timeout_s = _int_setting(sc_dct, "STALL_TIMEOUT_S", 120)
+        file_deadline_base_s = _int_setting(sc_dct, "FILE_DEADLINE_BASE_S", 300)
+        file_deadline_min_bytes_per_s = _int_setting(
+            sc_dct, "FILE_DEADLINE_MIN_BPS", 100 * 1024
+        )
+        progress_log_interval_s = _int_setting(sc_dct, "PROGRESS_LOG_INTERVAL_S", 30)
+        bundle_max_file_size = _int_setting(sc_dct, "BUNDLE_MAX_FILE_SIZE", 1024 * 1024)
+        bundle_max_bytes = _int_setting(sc_dct, "BUNDLE_MAX_BYTES", 64 * 1024 * 1024)
+        csv_inspection = _bool_setting(sc_dct, "CSV_INSPECTION", False)
+        staging_min_free_bytes = _int_setting(sc_dct, "STAGING_MIN_FREE_BYTES", 0)
+        tuning = TransportTuning(
+            window_size=_int_setting(sc_dct, "SFTP_WINDOW_SIZE", None),
+            max_packet_size=_int_setting(sc_dct, "SFTP_MAX_PACKET_SIZE", None),
+            compress=_bool_setting(sc_dct, "SFTP_COMPRESSION", False),
+            prefetch=_bool_setting(sc_dct, "SFTP_PREFETCH", True),
+            max_concurrent_prefetch_requests=_int_setting(
+                sc_dct, "SFTP_PREFETCH_CONCURRENCY", None
+            ),
+            ciphers=[
+                c.strip()
+                for c in sc_dct.get("SFTP_CIPHERS", "").split(",")
+                if c.strip()
+            ],
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid setting for {bip_name}: {e}")
+
+    # Suffix selection defaults to .csv only when no glob or regex is set.
+    target_file_glob = sc_dct.get("TARGET_FILE_GLOB", "")
+    target_file_regex = sc_dct.get("TARGET_FILE_REGEX", "")
+    default_file_type = "" if (target_file_glob or target_file_regex) else ".csv"
+
+    # map to SFTPConfig dataclass
+    return SFTPConfig(
+        hostname=sc_dct.get("HOSTNAME", ""),
+        username=sc_dct.get("USERNAME", ""),
+        port=port,
+        key_passphrase=sc_dct.get("PASSWORD", ""),
+        path_to_key=sc_dct.get("PATH_TO_KEY", ""),
+        local_path=sc_dct.get("LOCAL_PATH", "."),
+        bucket_name=sc_dct.get("BUCKET_NAME", ""),
+        path_to_gcs_credentials=str(path_to_gcs_file),
+        target_file_type=sc_dct.get("TARGET_FILE_TYPE", default_file_type),
+        remote_path=sc_dct.get("REMOTE_PATH", "/REPORTS"),
+        target_file_glob=target_file_glob,
+        target_file_regex=target_file_regex,
+        recursive=recursive,
+        max_depth=max_depth,
+        listing_concurrency=listing_concurrency,
+        delete_batch_size=delete_batch_size,
+        tuning=tuning,
+        ranged_download_threshold=ranged_download_threshold,
+        ranged_download_streams=ranged_download_streams,
+        max_concurrent_transfers=max_concurrent_transfers,
+        transfer_order=(sc_dct.get("TRANSFER_ORDER") or "listing").strip().lower(),
+        stall_timeout_s=stall_timeout_s,
+        file_deadline_base_s=file_deadline_base_s,
+        file_deadline_min_bytes_per_s=file_deadline_min_bytes_per_s,
+        progress_log_interval_s=progress_log_interval_s,
+        bundle_format=(sc_dct.get("BUNDLE_FORMAT") or "").strip().lower(),
+        bundle_max_file_size=bundle_max_file_size,
+        bundle_max_bytes=bundle_max_bytes,
+        bundle_prefix=sc_dct.get("BUNDLE_PREFIX", "bundles/"),
+        csv_inspection=csv_inspection,
+        csv_expected_header=sc_dct.get("CSV_EXPECTED_HEADER", ""),
+        csv_quarantine_prefix=sc_dct.get("CSV_QUARANTINE_PREFIX", ""),
+        upload_success_policy=(
+            (sc_dct.get("UPLOAD_SUCCESS_POLICY") or "all").strip().lower()
+        ),
+        blob_name_template=(
+            sc_dct.get("BLOB_NAME_TEMPLATE") or "{bip}/dt={date}/{hash:.6}-{name}"
+        ).strip(),
+        transfer_backend=(sc_dct.get("TRANSFER_BACKEND") or "thread").strip().lower(),
+        staging_min_free_bytes=staging_min_free_bytes,
+    )
+
+
 def fetch_and_move(
     bip_name: str,
     sc_dct: dict[str, str],
     path_to_gcs_file: Path,
     email_sender: Sender,
+    remote_files: list[RemoteFile] | None = None,
+    budget: RunBudget | None = None,
+    leases: LeaseStore | None = None,
+    status: RunStatus | None = None,
+    jobs: JobFile | None = None,
+    tracer: Tracer | None = None,
 ) -> BIPSummary:
     """
     Run one BIP transfer from SFTP to GCS using secrets from Infisical.
 
     Invalid configuration and Fetcher failures are logged, reported by email,
     and converted into a failed BIPSummary instead of aborting the full job run.
+    A BIP that would start after the run's time budget is already low is
+    skipped, with any surveyed files recorded as deferred. So is a BIP that
+    was disabled or removed in the job file since the run started.
 
     Args:
         bip_name: Name used in logs, notifications, and summaries.
         sc_dct: Secret values for this BIP path.
         path_to_gcs_file: Local GCS service account credentials file.
         email_sender: Sender used for failure notifications.
+        remote_files: Files already listed by a survey; when None the remote
+            directory is walked.
+        budget: Run-wide time budget shared with the Fetcher.
+        leases: Lease store shared with other runners, when coordinating.
+        status: Live run status the Fetcher reports its counters to.
+        jobs: Job file; supplies the BIP's limits and transfer pause, and is
+            re-read while the BIP runs.
+        tracer: Trace file writer the Fetcher records its per-file spans to.
 
     Returns:
         Summary of the BIP transfer attempt.
     """
 
-    raw_port = sc_dct.get("PORT", "22")
-    try:
-        port = int(raw_port)
-    except (TypeError, ValueError):
-        error_msg = (
-            f"Invalid PORT value for {bip_name}: '{raw_port}'. PORT must be an integer."
+    job = jobs.job(bip_name) if jobs is not None else None
+    skip_reason = ""
+    if budget is not None and budget.low():
+        logging.warning(
+            f"Skipping {bip_name}: run time budget is low ({budget.describe()})."
         )
+        skip_reason = "Run time budget exhausted"
+    elif jobs is not None and (job is None or not job.enabled):
+        logging.warning(f"Skipping {bip_name}: disabled or removed in the job file.")
+        skip_reason = "Disabled in the job file"
+    if skip_reason:
+        return BIPSummary(
+            bip_name=bip_name,
+            files_found=len(remote_files or []),
+            downloaded=[],
+            deleted=[],
+            failed_downloads=[],
+            failed_deletions=[],
+            duration_s=0.0,
+            status="skipped",
+            deferred=[
+                FileResult(
+                    name=f.relative_path,
+                    success=False,
+                    stage="deferred",
+                    error_message=skip_reason,
+                )
+                for f in remote_files or []
+            ],
+            deferred_bytes=sum(f.size or 0 for f in remote_files or []),
+        )
+
+    try:
+        sftp_conf = _build_sftp_config(bip_name, sc_dct, path_to_gcs_file)
+        if job is not None:
+            sftp_conf = dataclasses.replace(
+                sftp_conf,
+                bandwidth_limit_bytes_per_s=job.bandwidth_limit_bytes_per_s,
+                transfer_pause_s=jobs.current().run.transfer_pause_s,
+            )
+    except ValueError as e:
+        error_msg = str(e)
         logging.error(error_msg)
         _safe_notify(
             email_sender,
-            subject=f"[{_now_str()}] [{bip_name}] Port validation error",
+            bip_name=bip_name,
+            kind="Setting validation error",
             body=error_msg,
         )
         return BIPSummary(
@@ -313,22 +722,9 @@ def fetch_and_move(
             failed_deletions=[],
             duration_s=0.0,
             status="failed",
+            error=error_msg,
         )
 
-    # map to SFTPConfig dataclass
-    sftp_conf = SFTPConfig(
-        hostname=sc_dct.get("HOSTNAME", ""),
-        username=sc_dct.get("USERNAME", ""),
-        port=port,
-        key_passphrase=sc_dct.get("PASSWORD", ""),
-        path_to_key=sc_dct.get("PATH_TO_KEY", ""),
-        local_path=sc_dct.get("LOCAL_PATH", "."),
-        bucket_name=sc_dct.get("BUCKET_NAME", ""),
-        path_to_gcs_credentials=str(path_to_gcs_file),
-        target_file_type=sc_dct.get("TARGET_FILE_TYPE", ".csv"),
-        remote_path=sc_dct.get("REMOTE_PATH", "/REPORTS"),
-    )
-
     # initialize Fetcher class
     logging.info(f"> > > > > FETCHER task started for {bip_name} < < < < <")
 
@@ -337,15 +733,21 @@ def fetch_and_move(
             config=sftp_conf,
             email_sender=email_sender,
             bip_name=bip_name,
+            budget=budget,
+            leases=leases,
+            status=status,
+            jobs=jobs,
+            tracer=tracer,
         )
-        return fetcher.fetch_files()
+        return fetcher.fetch_files(remote_files)
 
     except SystemExit as e:
         error_msg = f"SystemExit occurred while running Fetcher for {bip_name}: {e}"
         logging.error(error_msg)
         _safe_notify(
             email_sender,
-            subject=f"[{_now_str()}] [{bip_name}] SystemExit occurred",
+            bip_name=bip_name,
+            kind="SystemExit occurred",
             body=error_msg,
         )
         return BIPSummary(
@@ -357,6 +759,7 @@ def fetch_and_move(
             failed_deletions=[],
             duration_s=0.0,
             status="failed",
+            error=error_msg,
         )
 
     except Exception as e:
@@ -364,7 +767,8 @@ def fetch_and_move(
         logging.error(error_msg)
         _safe_notify(
             email_sender,
-            subject=f"[{_now_str()}] [{bip_name}] Fetcher error",
+            bip_name=bip_name,
+            kind="Fetcher error",
             body=error_msg,
         )
         return BIPSummary(
@@ -376,22 +780,558 @@ def fetch_and_move(
             failed_deletions=[],
             duration_s=0.0,
             status="failed",
+            error=error_msg,
+        )
+
+
+def _preflight_bip(
+    bip_name: str, sc_dct: dict[str, str], path_to_gcs_file: Path, timeout_s: float
+) -> PreflightResult:
+    """Run one BIP's pre-flight checks; an invalid configuration fails "config"."""
+    try:
+        fetcher = Fetcher(
+            config=_build_sftp_config(bip_name, sc_dct, path_to_gcs_file),
+            email_sender=None,
+            bip_name=bip_name,
+            notify=False,
         )
+    except Exception as e:
+        result = PreflightResult(bip_name, dict.fromkeys(PREFLIGHT_CHECKS))
+        result.fail("config", str(e))
+        return result
+    return fetcher.preflight(timeout_s)
+
+
+def _preflight_check(
+    path_to_gcs_file: Path,
+) -> Callable[[str, dict[str, str]], PreflightResult]:
+    """Return the check run for each BIP, with PREFLIGHT_TIMEOUT_S per network step."""
+    return functools.partial(
+        _preflight_bip,
+        path_to_gcs_file=path_to_gcs_file,
+        timeout_s=_env_int("PREFLIGHT_TIMEOUT_S", PREFLIGHT_TIMEOUT_S),
+    )
+
+
+def _survey_bip(
+    bip_name: str,
+    sc_dct: dict[str, str],
+    path_to_gcs_file: Path,
+    email_sender: Sender,
+) -> list[RemoteFile] | None:
+    """
+    List one BIP's pending files without transferring them.
+
+    Survey failures are only logged and return None; the BIP's real run then
+    walks the remote directory itself and reports any problem as usual.
+    """
+    try:
+        fetcher = Fetcher(
+            config=_build_sftp_config(bip_name, sc_dct, path_to_gcs_file),
+            email_sender=email_sender,
+            bip_name=bip_name,
+            notify=False,
+        )
+        remote_files = fetcher.survey()
+    except Exception as e:
+        logging.warning(f"Survey failed for {bip_name}; it will list during its run: {e}")
+        return None
+    logging.info(
+        f"Survey for {bip_name}: {len(remote_files)} file(s), "
+        f"{sum(f.size or 0 for f in remote_files)} bytes pending"
+    )
+    return remote_files
+
+
+def _run_jobs_in_parallel(
+    jobs: list[tuple[str, dict[str, str]]],
+    max_parallel_bips: int,
+    path_to_gcs_file: Path,
+    email_sender: Sender,
+    budget: RunBudget | None = None,
+    leases: LeaseStore | None = None,
+    run_bip: Callable[..., BIPSummary] = fetch_and_move,
+    priorities: dict[str, int] | None = None,
+) -> dict[str, BIPSummary]:
+    """
+    Run BIP jobs concurrently, dispatching the most pending bytes first.
+
+    Every BIP is surveyed concurrently first. Jobs are then submitted by
+    priority and, within a priority, in descending order of pending bytes, so
+    the largest BIP never starts last and stretches the run. Each job reuses its survey listing instead of
+    listing the remote directory again. run_bip runs one job; it is
+    fetch_and_move, or a wrapper that runs it in a worker process.
+
+    Returns:
+        Summaries keyed by BIP name.
+    """
+    with ThreadPoolExecutor(
+        max_workers=max_parallel_bips, thread_name_prefix="bip"
+    ) as pool:
+        surveys = dict(
+            zip(
+                [bip_name for bip_name, _ in jobs],
+                pool.map(
+                    lambda job: _survey_bip(
+                        job[0], job[1], path_to_gcs_file, email_sender
+                    ),
+                    jobs,
+                ),
+            )
+        )
+        priorities = priorities or {}
+        ordered_jobs = sorted(
+            jobs,
+            key=lambda job: (
+                priorities.get(job[0], 0),
+                sum(f.size or 0 for f in surveys[job[0]] or []),
+            ),
+            reverse=True,
+        )
+        logging.info(
+            "BIP dispatch order: " + ", ".join(bip_name for bip_name, _ in ordered_jobs)
+        )
+        futures = {
+            bip_name: pool.submit(
+                run_bip,
+                bip_name=bip_name,
+                sc_dct=sc_dct,
+                path_to_gcs_file=path_to_gcs_file,
+                email_sender=email_sender,
+                remote_files=surveys[bip_name],
+                budget=budget,
+                leases=leases,
+            )
+            for bip_name, sc_dct in ordered_jobs
+        }
+        return {bip_name: future.result() for bip_name, future in futures.items()}
+
+
+def _fetch_and_move_in_worker(**kwargs) -> BIPSummary:
+    """
+    Worker-process entry point for one BIP.
+
+    The spawned worker starts with a fresh interpreter, so it sets up its own
+    logging and, when coordinating, its own lease store before running
+    fetch_and_move.
+    """
+    init_logger()
+    leases = _build_lease_store(kwargs["path_to_gcs_file"])
+    return fetch_and_move(**kwargs, leases=leases)
+
+
+def _fetch_and_move_isolated(
+    *,
+    bip_name: str,
+    email_sender: Sender,
+    rss_limit_bytes: int,
+    timeout_s: int,
+    budget: RunBudget | None = None,
+    leases: LeaseStore | None = None,
+    status: RunStatus | None = None,
+    **kwargs,
+) -> BIPSummary:
+    """
+    Run fetch_and_move for one BIP in its own worker process.
+
+    The worker is killed when it exceeds rss_limit_bytes or timeout_s; with
+    no timeout_s, the rest of the run's time budget is used instead. A
+    killed, crashed, or failing worker becomes a failed BIPSummary, so the
+    other BIPs and the summary email are unaffected. leases is ignored: the
+    worker builds its own store from the same settings. status is also
+    ignored, so the status endpoint shows the BIP as running without its
+    per-file counters. A job file in kwargs is copied to the worker, which
+    keeps re-reading it.
+    """
+    if not timeout_s and budget is not None and budget.limited:
+        timeout_s = max(1, int(budget.remaining_s()))
+    try:
+        return run_in_worker(
+            _fetch_and_move_in_worker,
+            dict(kwargs, bip_name=bip_name, email_sender=email_sender, budget=budget),
+            name=f"bip-{bip_name}",
+            rss_limit_bytes=rss_limit_bytes,
+            timeout_s=timeout_s,
+        )
+    except WorkerFailed as e:
+        error_msg = f"Worker for {bip_name} failed ({e.reason}): {e}"
+        logging.error(error_msg)
+        _safe_notify(
+            email_sender,
+            bip_name=bip_name,
+            kind="Worker failed",
+            body=error_msg,
+        )
+        return BIPSummary(
+            bip_name=bip_name,
+            files_found=0,
+            downloaded=[],
+            deleted=[],
+            failed_downloads=[],
+            failed_deletions=[],
+            duration_s=0.0,
+            status="failed",
+            error=error_msg,
+        )
+
+
+def _env_int(name: str, default: int) -> int:
+    """Return an integer run option from config/.env, or default if unset or invalid."""
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logging.error(f"{name} must be an integer; using {default}.")
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Return a true/false run option from config/.env, or default if unset or invalid."""
+    try:
+        return _bool_setting(os.environ, name, default)
+    except ValueError as e:
+        logging.error(f"{e} Using {default}.")
+        return default
+
+
+def _build_lease_store(path_to_gcs_file: Path) -> LeaseStore | None:
+    """
+    Build the lease store that splits work between runners, if enabled.
+
+    COORDINATION selects "gcs" (lease objects in LEASE_BUCKET, guarded by
+    generation preconditions) or "local" (lease files in LEASE_DIR). Unset
+    means this runner works alone.
+
+    Raises:
+        ValueError: If COORDINATION is unknown or its required setting is missing.
+    """
+    mode = os.environ.get("COORDINATION", "").strip().lower()
+    if mode in ("", "none"):
+        return None
+
+    owner = os.environ.get("RUNNER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+    ttl_s = _env_int("LEASE_TTL_S", LEASE_TTL_S)
+    if mode == "gcs":
+        bucket_name = os.environ.get("LEASE_BUCKET", "")
+        if not bucket_name:
+            raise ValueError("COORDINATION=gcs requires LEASE_BUCKET.")
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(path_to_gcs_file)
+        bucket = storage.Client().bucket(bucket_name)
+        prefix = os.environ.get("LEASE_PREFIX", "move-it/leases")
+        logging.info(
+            f"Coordinating through GCS leases in gs://{bucket_name}/{prefix} as {owner}"
+        )
+        return GCSLeaseStore(bucket, prefix, owner, ttl_s)
+    if mode == "local":
+        lease_dir = os.environ.get("LEASE_DIR", "")
+        if not lease_dir:
+            raise ValueError("COORDINATION=local requires LEASE_DIR.")
+        logging.info(f"Coordinating through lease files in {lease_dir} as {owner}")
+        return LocalLeaseStore(Path(lease_dir), owner, ttl_s)
+    raise ValueError(f"Unknown COORDINATION '{mode}'; expected gcs, local, or none.")
+
+
+def _history_path() -> Path:
+    return Path(
+        os.environ.get("HISTORY_DB")
+        or Path(__file__).resolve().parents[1] / "history.sqlite3"
+    )
+
+
+def _notification_log() -> NotificationLog | None:
+    """
+    Open the notification log named by NOTIFY_DB, unless deduplication is off.
+
+    A NOTIFY_COOLDOWN_S of 0 sends every notification. A log that cannot be
+    opened is logged and deduplication is skipped for the run.
+    """
+    cooldown_s = _env_int("NOTIFY_COOLDOWN_S", NOTIFY_COOLDOWN_S)
+    if cooldown_s <= 0:
+        return None
+    db_path = Path(
+        os.environ.get("NOTIFY_DB")
+        or Path(__file__).resolve().parents[1] / "notifications.sqlite3"
+    )
+    try:
+        return NotificationLog(db_path, cooldown_s)
+    except Exception as e:
+        logging.error(f"Failed to open notification log {db_path}: {e}")
+        return None
+
+
+def _suppressed_notifications(
+    email_sender: Sender, since: float
+) -> list[SuppressedNotification]:
+    """Return the notifications suppressed since the run started."""
+    if email_sender.notifications is None:
+        return []
+    try:
+        return email_sender.notifications.suppressed_since(since)
+    except Exception as e:
+        logging.error(f"Failed to read the notification log: {e}")
+        return []
+
+
+def _clean_staging_dirs(bip_secrets: list[tuple[str, dict[str, str]]]) -> None:
+    """
+    Remove orphaned partial downloads from every BIP's staging directories.
+
+    Runs before any BIP starts, while the run lock is held, so no download
+    can be writing to them. Failures are logged and never stop the run.
+    """
+    dirs = sorted(
+        {
+            os.path.expanduser(p.strip())
+            for _, sc_dct in bip_secrets
+            for p in sc_dct.get("LOCAL_PATH", ".").split(",")
+            if p.strip()
+        }
+    )
+    try:
+        removed, freed = clean_staging(
+            dirs, _env_int("STAGING_PART_MAX_AGE_S", STAGING_PART_MAX_AGE_S)
+        )
+    except Exception as e:
+        logging.error(f"Failed to clean staging directories: {e}")
+        return
+    if removed:
+        logging.info(
+            f"Removed {removed} orphaned partial file(s), freeing "
+            f"{format_bytes(freed)}, from {', '.join(dirs)}"
+        )
+
+
+def _load_job_file() -> JobFile | None:
+    """
+    Load the job file named by JOBS_FILE, or config/jobs.toml by default.
+
+    Returns:
+        The job file, or None when the default file does not exist and the
+        built-in BIP_JOBS list is used instead.
+
+    Raises:
+        OSError: If a job file named by JOBS_FILE cannot be read.
+        ValueError: If the job file is not valid.
+    """
+    path = os.environ.get("JOBS_FILE", "").strip()
+    if not path:
+        default = Path(__file__).resolve().parents[1] / "config" / "jobs.toml"
+        if not default.exists():
+            return None
+        path = str(default)
+    jobs = JobFile(Path(path), _env_int("JOBS_RELOAD_INTERVAL_S", JOBS_RELOAD_INTERVAL_S))
+    logging.info(f"Loaded {len(jobs.current().bips)} BIP job(s) from {path}")
+    return jobs
+
+
+def _job_list(jobs: JobFile | None) -> tuple[RunSettings, list[BIPJob]]:
+    """Return the run settings and BIP entries, falling back to BIP_JOBS."""
+    if jobs is None:
+        return RunSettings(), [BIPJob(name, secret_path) for name, secret_path in BIP_JOBS]
+    config = jobs.current()
+    return config.run, list(config.bips)
+
+
+def _priorities(jobs: JobFile | None) -> dict[str, int]:
+    """Return each BIP's current priority from the job file."""
+    return {job.name: job.priority for job in _job_list(jobs)[1]}
+
+
+def _plan(
+    infisical_config: InfisicalConfig,
+    concurrencies: list[int],
+    jobs: JobFile | None = None,
+) -> None:
+    """
+    Print how long each BIP's pending files would take to move.
+
+    Every BIP is listed at the same time with its normal file selection, and
+    nothing is downloaded, uploaded, deleted, or emailed. Estimates use the
+    per-transfer throughput recorded for the BIP's host in the run history,
+    so a BIP without history gets byte totals only. Disabled BIPs are left
+    out; schedules are ignored.
+    """
+    client = infisical_config.client
+    path_to_gcs_file = Path(__file__).resolve().parents[1] / "config" / "gcs.json"
+
+    configs: dict[str, SFTPConfig] = {}
+    for job in _job_list(jobs)[1]:
+        if not job.enabled:
+            continue
+        bip_name = job.name
+        try:
+            sc_dct = _secrets_dict_at_path(
+                client,
+                project_id=infisical_config.project_id,
+                project_slug=infisical_config.project_slug,
+                environment_slug=infisical_config.environment_slug,
+                secret_path=job.secret_path,
+            )
+            config = _build_sftp_config(bip_name, sc_dct, path_to_gcs_file)
+            if job.max_concurrent_transfers:
+                config.max_concurrent_transfers = job.max_concurrent_transfers
+            configs[bip_name] = config
+        except Exception as e:
+            logging.error(f"Skipping {bip_name} in plan: {e}")
+
+    def survey(bip_name: str) -> list[RemoteFile]:
+        return Fetcher(
+            config=configs[bip_name],
+            email_sender=None,
+            bip_name=bip_name,
+            notify=False,
+        ).survey()
+
+    print(
+        plan_report(
+            {name: config.max_concurrent_transfers for name, config in configs.items()},
+            survey,
+            history_path=_history_path(),
+            window=max(1, _env_int("HISTORY_WINDOW", HISTORY_WINDOW)),
+            concurrencies=concurrencies,
+            max_parallel_bips=max(1, _env_int("MAX_PARALLEL_BIPS", 1)),
+        )
+    )
+
+
+def _preflight_command(
+    infisical_config: InfisicalConfig, jobs: JobFile | None = None
+) -> bool:
+    """
+    Print the pre-flight readiness table for every enabled BIP.
+
+    The run lock is not taken.
+
+    Returns:
+        True when every BIP is ready.
+    """
+    path_to_gcs_file = Path(__file__).resolve().parents[1] / "config" / "gcs.json"
+    return preflight_command(
+        _job_list(jobs)[1],
+        lambda job: _secrets_dict_at_path(
+            infisical_config.client,
+            project_id=infisical_config.project_id,
+            project_slug=infisical_config.project_slug,
+            environment_slug=infisical_config.environment_slug,
+            secret_path=job.secret_path,
+        ),
+        _preflight_check(path_to_gcs_file),
+    )
 
 
 def main() -> None:
-    """Run all configured BIP jobs and send the hourly summary email."""
+    """
+    Run all configured BIP jobs and send the hourly summary email.
+
+    The run holds an exclusive lock for its whole duration, so a run that
+    starts while the previous one is still going exits straight away. The
+    lock is an flock, so the operating system releases it even if the
+    process crashes or is killed. With --plan, the BIPs are only listed and
+    an estimate of the run is printed; with --preflight, they are only
+    checked.
+    """
+    parser = argparse.ArgumentParser(description="Move BIP files from SFTP to GCS.")
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="list pending files and estimate the run without moving anything",
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="check every BIP's key, SSH connection, remote path, and buckets, then exit",
+    )
+    parser.add_argument(
+        "--concurrency",
+        default=",".join(str(c) for c in PLAN_CONCURRENCIES),
+        help="comma-separated transfer concurrencies to estimate in plan mode",
+    )
+    args = parser.parse_args()
 
     # Start logging both in the terminal and the log file.
     init_logger()
     logging.info("Script started.")
 
+    # BIP list and limits, re-read during the run when the file changes
+    try:
+        jobs = _load_job_file()
+    except (OSError, ValueError) as e:
+        logging.error(f"Invalid job file: {e}")
+        sys.exit(1)
+
     # init infisical client for fetching secrets
     infisical_config = init_infisical_client()
+
+    if args.preflight:
+        sys.exit(0 if _preflight_command(infisical_config, jobs) else 1)
+
+    if args.plan:
+        try:
+            concurrencies = [int(c) for c in args.concurrency.split(",") if c.strip()]
+        except ValueError:
+            parser.error("--concurrency must be a comma-separated list of integers")
+        _plan(infisical_config, [c for c in concurrencies if c > 0] or [1], jobs)
+        return
+
+    budget = RunBudget(
+        total_s=_env_int("RUN_TIME_BUDGET_S", RUN_TIME_BUDGET_S),
+        reserve_s=_env_int("RUN_BUDGET_RESERVE_S", RUN_BUDGET_RESERVE_S),
+    )
+    run_lock = RunLock(
+        Path(
+            os.environ.get("RUN_LOCK_PATH")
+            or Path(__file__).resolve().parents[1] / "move-it.lock"
+        )
+    )
+    try:
+        run_lock.acquire()
+    except RunLockHeld as e:
+        logging.warning(f"{e}; exiting without starting a new run.")
+        return
+    except OSError as e:
+        logging.error(f"Failed to open run lock {run_lock.lock_path}: {e}")
+        sys.exit(1)
+
+    try:
+        logging.info(f"Run time budget: {budget.describe()}")
+        _run_jobs(infisical_config, budget, jobs)
+    finally:
+        run_lock.release()
+
+
+def _run_jobs(
+    infisical_config: InfisicalConfig, budget: RunBudget, jobs: JobFile | None = None
+) -> None:
+    """
+    Fetch secrets, move every BIP, and send the summary email.
+
+    BIPs that are enabled and scheduled for the current hour are run, highest
+    priority first, unless they fail the pre-flight check. Run settings are
+    read once here; BIP limits keep being re-read from the job file while
+    the BIPs run. Per-file spans go to TRACE_FILE, and a JSON report of the
+    run is uploaded to RUN_REPORT_BUCKET, when they are set.
+    """
     client = infisical_config.client
     project_id = infisical_config.project_id
     project_slug = infisical_config.project_slug
     environment_slug = infisical_config.environment_slug
+    run_settings, bip_jobs = _job_list(jobs)
+    run_started = time.time()
+    run_id = f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    hour = datetime.now().hour
+    scheduled: list[BIPJob] = []
+    for job in bip_jobs:
+        if not job.enabled:
+            logging.info(f"Skipping {job.name}: disabled in the job file.")
+        elif not schedule_matches(job.schedule, hour):
+            logging.info(f"Skipping {job.name}: not scheduled at {hour:02d}h ({job.schedule}).")
+        else:
+            scheduled.append(job)
+    # Stable sort: equal priorities keep their job file order
+    scheduled.sort(key=lambda job: job.priority, reverse=True)
 
     try:
         # fetch secrets for email sender
@@ -404,8 +1344,8 @@ def main() -> None:
         sc_dct_email = {sc.secretKey: sc.secretValue for sc in sc_email}
 
         email_sender = init_sender(
-            host="smtp.gmail.com",
-            port=587,
+            host=run_settings.smtp_host,
+            port=run_settings.smtp_port,
             username=sc_dct_email.get("USERNAME", ""),
             password=sc_dct_email.get("PASSWORD", ""),
             from_addr=sc_dct_email.get("FROM_ADDR", ""),
@@ -414,6 +1354,8 @@ def main() -> None:
             use_ssl=False,
             subject_prefix=sc_dct_email.get("SUBJECT_PREFIX", ""),
             app_name=sc_dct_email.get("APP_NAME", ""),
+            timeout_s=run_settings.smtp_timeout_s,
+            notifications=_notification_log(),
         )
     except Exception as e:
         logging.error(f"Error initializing email sender: {e}")
@@ -425,59 +1367,217 @@ def main() -> None:
         logging.error(f"GCS credentials file not found at: {path_to_gcs_file}")
         sys.exit(1)
 
-    summaries: list[BIPSummary] = []
-    for bip_name, secret_path in BIP_JOBS:
+    # BIPs moved at the same time; 1 runs them one by one in priority order.
+    max_parallel_bips = _env_int("MAX_PARALLEL_BIPS", 1)
+
+    # Leases split files between runners on several hosts
+    try:
+        leases = _build_lease_store(path_to_gcs_file)
+    except Exception as e:
+        logging.error(f"Failed to set up runner coordination: {e}")
+        sys.exit(1)
+
+    # "process" runs each BIP in its own worker process with memory and
+    # time limits; "thread" runs every BIP in this interpreter.
+    execution_mode = os.environ.get("EXECUTION_MODE", "thread").strip().lower()
+    if execution_mode == "process":
+        run_bip = functools.partial(
+            _fetch_and_move_isolated,
+            rss_limit_bytes=_env_int("WORKER_RSS_LIMIT_MB", WORKER_RSS_LIMIT_MB)
+            * 1024
+            * 1024,
+            timeout_s=_env_int("WORKER_TIMEOUT_S", 0),
+        )
+    else:
+        if execution_mode != "thread":
+            logging.error(
+                f"Unknown EXECUTION_MODE '{execution_mode}'; running BIPs in threads."
+            )
+        run_bip = fetch_and_move
+    if jobs is not None:
+        run_bip = functools.partial(run_bip, jobs=jobs)
+
+    # Per-file download, upload, and delete spans for the whole run
+    tracer = open_tracer(os.environ.get("TRACE_FILE", ""), run_id)
+    if tracer is not None:
+        logging.info(f"Writing trace spans for run {run_id} to {tracer.path}")
+        run_bip = functools.partial(run_bip, tracer=tracer)
+
+    # Optional JSON status endpoint on a localhost port or a Unix socket
+    status_server = None
+    status_port = _env_int("STATUS_PORT", 0)
+    status_socket = os.environ.get("STATUS_SOCKET", "").strip()
+    if status_port or status_socket:
+        run_status = RunStatus(budget)
+        status_server = StatusServer(
+            run_status, port=status_port, socket_path=status_socket
+        )
+        try:
+            status_server.start()
+            run_bip = run_status.track(functools.partial(run_bip, status=run_status))
+        except OSError as e:
+            logging.error(f"Failed to start the status endpoint: {e}")
+            status_server = None
+
+    results: dict[str, BIPSummary] = {}
+    bip_secrets: list[tuple[str, dict[str, str]]] = []
+    for job in scheduled:
+        bip_name = job.name
         try:
             sc_dct = _secrets_dict_at_path(
                 client,
                 project_id=project_id,
                 project_slug=project_slug,
                 environment_slug=environment_slug,
-                secret_path=secret_path,
+                secret_path=job.secret_path,
             )
         except Exception as e:
             error_msg = f"Error fetching secrets for {bip_name}: {e}"
             logging.error(error_msg)
             _safe_notify(
                 email_sender,
-                subject=f"[{_now_str()}] [{bip_name}] Secrets fetch error",
+                bip_name=bip_name,
+                kind="Secrets fetch error",
                 body=error_msg,
             )
-            summaries.append(
-                BIPSummary(
-                    bip_name=bip_name,
-                    files_found=0,
-                    downloaded=[],
-                    deleted=[],
-                    failed_downloads=[],
-                    failed_deletions=[],
-                    duration_s=0.0,
-                    status="failed",
-                )
+            results[bip_name] = BIPSummary(
+                bip_name=bip_name,
+                files_found=0,
+                downloaded=[],
+                deleted=[],
+                failed_downloads=[],
+                failed_deletions=[],
+                duration_s=0.0,
+                status="failed",
+                error=error_msg,
             )
             continue
+        bip_secrets.append((bip_name, sc_dct))
 
-        summary = fetch_and_move(
-            bip_name=bip_name,
-            sc_dct=sc_dct,
-            path_to_gcs_file=path_to_gcs_file,
-            email_sender=email_sender,
+    _clean_staging_dirs(bip_secrets)
+
+    # When enabled, every BIP is checked at once, so a broken key, host, or
+    # bucket fails in seconds instead of after the BIPs ahead of it.
+    if _env_bool("PREFLIGHT", False) and bip_secrets:
+        checks = run_preflight(bip_secrets, _preflight_check(path_to_gcs_file))
+        logging.info("Pre-flight readiness:\n" + readiness_table(list(checks.values())))
+        for bip_name, check in checks.items():
+            if check.ready:
+                continue
+            error_msg = f"Pre-flight failed for {bip_name}: {check.error}"
+            logging.error(error_msg)
+            _safe_notify(
+                email_sender,
+                bip_name=bip_name,
+                kind="Pre-flight failed",
+                body=error_msg,
+            )
+            results[bip_name] = BIPSummary(
+                bip_name=bip_name,
+                files_found=0,
+                downloaded=[],
+                deleted=[],
+                failed_downloads=[],
+                failed_deletions=[],
+                duration_s=check.duration_s,
+                status="failed",
+                error=error_msg,
+            )
+        bip_secrets = [job for job in bip_secrets if checks[job[0]].ready]
+
+    if max_parallel_bips > 1 and len(bip_secrets) > 1:
+        results.update(
+            _run_jobs_in_parallel(
+                bip_secrets,
+                max_parallel_bips,
+                path_to_gcs_file,
+                email_sender,
+                budget,
+                leases,
+                run_bip,
+                _priorities(jobs),
+            )
         )
-        summaries.append(summary)
+    else:
+        # Coordinated runners start at different BIPs so they rarely
+        # contend for the same files.
+        pending = bip_secrets
+        if leases is not None and pending:
+            offset = _env_int("RUNNER_INDEX", 0) % len(pending)
+            pending = pending[offset:] + pending[:offset]
+        while pending:
+            # Priorities are re-read before each BIP; max() keeps the
+            # earliest of equal priorities.
+            priorities = _priorities(jobs)
+            bip_name, sc_dct = max(pending, key=lambda job: priorities.get(job[0], 0))
+            pending = [job for job in pending if job[0] != bip_name]
+            results[bip_name] = run_bip(
+                bip_name=bip_name,
+                sc_dct=sc_dct,
+                path_to_gcs_file=path_to_gcs_file,
+                email_sender=email_sender,
+                budget=budget,
+                leases=leases,
+            )
+
+    # Summaries keep job file order regardless of dispatch order
+    summaries = [results[job.name] for job in bip_jobs if job.name in results]
+    if status_server is not None:
+        status_server.stop()
+    run_finished = time.time()
+    stats = compare_with_history(
+        _history_path(),
+        summaries,
+        run_id,
+        window=max(1, _env_int("HISTORY_WINDOW", HISTORY_WINDOW)),
+        threshold_pct=_env_int("HISTORY_REGRESSION_PCT", HISTORY_REGRESSION_PCT),
+        min_runs=_env_int("HISTORY_MIN_RUNS", HISTORY_MIN_RUNS),
+    )
+    suppressed = _suppressed_notifications(email_sender, run_started)
 
-    # Send daily summary email
+    # Send daily summary email with the full per-file results attached
     try:
-        html_body = _build_summary_html(summaries)
-        text_body = _build_summary_text(summaries)
-        email_sender.send(
-            subject=f"[{_now_str()}] Hourly Summary",
-            body=text_body,
-            html=html_body,
-        )
+        html_body = _build_summary_html(summaries, stats=stats, suppressed=suppressed)
+        text_body = _build_summary_text(summaries, stats=stats, suppressed=suppressed)
+        with tempfile.TemporaryDirectory(prefix="move-it-report-") as report_dir:
+            attachments: list[Path] = []
+            try:
+                attachments.append(
+                    write_results_report(
+                        summaries,
+                        Path(report_dir),
+                        file_stem=f"results_{datetime.now():%Y%m%d_%H%M%S}",
+                        gzip_threshold_bytes=REPORT_GZIP_THRESHOLD_BYTES,
+                    )
+                )
+            except Exception as e:
+                logging.error(f"Failed to write results report: {e}")
+
+            email_sender.send(
+                subject=f"[{_now_str()}] Hourly Summary",
+                body=text_body,
+                html=html_body,
+                attachments=attachments,
+            )
         logging.info("Daily summary email sent successfully.")
     except Exception as e:
         logging.error(f"Failed to send daily summary email: {e}")
 
+    report_bucket = os.environ.get("RUN_REPORT_BUCKET", "").strip()
+    if report_bucket:
+        upload_run_report(
+            build_run_report(
+                summaries,
+                run_id=run_id,
+                started_at=run_started,
+                finished_at=run_finished,
+                runner=os.environ.get("RUNNER_ID") or socket.gethostname(),
+            ),
+            report_bucket,
+            os.environ.get("RUN_REPORT_PREFIX", RUN_REPORT_PREFIX),
+            path_to_gcs_file,
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,7 @@
-from .models import EmailConfig, SFTPConfig, FileResult, BIPSummary
+from .models import EmailConfig, SFTPConfig, FileResult, BIPSummary, RemoteFile, TransportTuning, Lease, CsvInspection, BIPStats, PreflightResult, SuppressedNotification, TraceSpan, BIPJob, RunSettings, JobsConfig
 
 __version__ = "1.0.0"
 __author__ = "Bryan Olandres"
 
 # Expose main classes/functions at package level
-__all__ = ["SFTPConfig", "EmailConfig", "FileResult", "BIPSummary"]
+__all__ = ["SFTPConfig", "EmailConfig", "FileResult", "BIPSummary", "RemoteFile", "TransportTuning", "Lease", "CsvInspection", "BIPStats", "PreflightResult", "SuppressedNotification", "TraceSpan", "BIPJob", "RunSettings", "JobsConfig"]
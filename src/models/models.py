@@ -10,8 +10,35 @@ class FileResult:
 
     name: str
     success: bool
-    stage: str  # e.g. "download", "upload", "delete"
+    stage: str  # e.g. "download", "upload", "delete", "deferred"
     error_message: str = ""
+    # Set when the file was inspected as a CSV during its transfer.
+    row_count: int | None = None
+    schema_hash: str = ""
+    quarantined: bool = False
+    # GCS object (or bundle) holding the file, once it is uploaded.
+    blob_name: str = ""
+
+
+@dataclass
+class CsvInspection:
+    """
+    Row count and header check for one CSV, gathered while it was transferred.
+
+    Attributes:
+        row_count: Data records after the header; blank lines are not counted.
+        header: Column names from the first record.
+        schema_hash: Short hash of the ordered header columns.
+        valid: False when the header is missing, unreadable, or does not
+            match the BIP's expected header.
+        error: Why the file is not valid.
+    """
+
+    row_count: int
+    header: list[str] = field(default_factory=list)
+    schema_hash: str = ""
+    valid: bool = True
+    error: str = ""
 
 
 @dataclass
@@ -25,7 +52,20 @@ class BIPSummary:
     failed_downloads: list[FileResult]
     failed_deletions: list[FileResult]
     duration_s: float
-    status: str  # "success", "partial", "failed", or "no_files"
+    status: str  # "success", "partial", "failed", "no_files", or "skipped"
+    # Files left for a later run because the run's time budget or staging
+    # space ran low.
+    deferred: list[FileResult] = field(default_factory=list)
+    deferred_bytes: int = 0
+    # Matching files left to other runners that leased them first.
+    claimed_elsewhere: int = 0
+    # Bytes of the files moved, and time spent in each stage summed over
+    # files, so concurrent transfers can add up to more than duration_s.
+    bytes_moved: int = 0
+    download_s: float = 0.0
+    upload_s: float = 0.0
+    # Why the BIP failed before moving any file, such as a failed pre-flight.
+    error: str = ""
 
     @property
     def files_succeeded(self) -> int:
@@ -35,6 +75,139 @@ class BIPSummary:
     def files_failed(self) -> int:
         return len(self.failed_downloads) + len(self.failed_deletions)
 
+    @property
+    def bytes_per_s(self) -> float:
+        return self.bytes_moved / self.duration_s if self.duration_s > 0 else 0.0
+
+
+@dataclass
+class BIPStats:
+    """
+    Duration and throughput percentiles for one BIP over its recent runs.
+
+    Attributes:
+        bip_name: BIP label.
+        runs: Past runs that moved files and were used for the percentiles.
+        p50_duration_s: Median run duration.
+        p95_duration_s: 95th percentile run duration.
+        p50_bytes_per_s: Median throughput.
+        p95_bytes_per_s: 95th percentile throughput.
+        duration_regressed: This run took longer than the median by more
+            than the regression threshold.
+        throughput_regressed: This run's throughput fell below the median by
+            more than the regression threshold.
+    """
+
+    bip_name: str
+    runs: int
+    p50_duration_s: float
+    p95_duration_s: float
+    p50_bytes_per_s: float
+    p95_bytes_per_s: float
+    duration_regressed: bool = False
+    throughput_regressed: bool = False
+
+    @property
+    def regressed(self) -> bool:
+        return self.duration_regressed or self.throughput_regressed
+
+
+@dataclass
+class PreflightResult:
+    """
+    Outcome of one BIP's pre-flight checks.
+
+    Attributes:
+        bip_name: BIP label.
+        checks: Each check, in the order run, mapped to True when it
+            passed, False when it failed, and None when it could not run.
+        error: Messages of the failed checks.
+        duration_s: Time the checks took.
+    """
+
+    bip_name: str
+    checks: dict[str, bool | None]
+    error: str = ""
+    duration_s: float = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return all(self.checks.values())
+
+    def fail(self, check: str, error: str) -> None:
+        """Mark check as failed and record its message."""
+        self.checks[check] = False
+        self.error = f"{self.error}; {error}" if self.error else error
+
+
+@dataclass
+class SuppressedNotification:
+    """
+    Repeats of one notification held back by its cool-down during a run.
+
+    Attributes:
+        bip_name: BIP the notification is about.
+        kind: Notification kind, such as "Connection failed".
+        count: Repeats suppressed during the run.
+        last_sent_at: Unix time the notification was last emailed.
+    """
+
+    bip_name: str
+    kind: str
+    count: int
+    last_sent_at: float
+
+
+@dataclass
+class TraceSpan:
+    """
+    One timed step in a file's transfer, as written to the trace file.
+
+    Attributes:
+        run_id: Run the step belongs to, shared by every BIP and worker.
+        bip_name: BIP the file belongs to.
+        file_name: File path relative to the BIP's remote path.
+        name: "download", "upload", or "delete".
+        start: Unix time the step started.
+        duration_s: Seconds the step took.
+        success: Whether the step succeeded.
+        error: Why the step failed; empty on success.
+        attributes: Step details such as size, host, bucket, and retries.
+    """
+
+    run_id: str
+    bip_name: str
+    file_name: str
+    name: str
+    start: float
+    duration_s: float
+    success: bool
+    error: str = ""
+    attributes: dict[str, str | int | float] = field(default_factory=dict)
+
+
+@dataclass
+class TransportTuning:
+    """
+    SSH transport and SFTP read settings for one BIP.
+
+    Attributes:
+        window_size: SSH channel window in bytes; None keeps the paramiko default.
+        max_packet_size: Largest SSH packet in bytes; None keeps the paramiko default.
+        compress: Whether to request zlib compression on the SSH transport.
+        prefetch: Whether downloads pipeline read requests ahead of the writer.
+        max_concurrent_prefetch_requests: Cap on outstanding prefetch reads;
+            None leaves it unbounded.
+        ciphers: Preferred ciphers, tried before the remaining supported ones.
+    """
+
+    window_size: int | None = None
+    max_packet_size: int | None = None
+    compress: bool = False
+    prefetch: bool = True
+    max_concurrent_prefetch_requests: int | None = None
+    ciphers: list[str] = field(default_factory=list)
+
 
 @dataclass
 class SFTPConfig:
@@ -47,11 +220,61 @@ class SFTPConfig:
         port: SFTP server port.
         key_passphrase: Passphrase for the private key file.
         path_to_key: Local path to the private key file.
-        local_path: Existing local directory used for downloads before upload.
-        bucket_name: Destination GCS bucket.
+        local_path: Existing local directory used for downloads before
+            upload, or a comma-separated list of directories to spread
+            downloads across.
+        bucket_name: Destination GCS bucket, or a comma-separated list of
+            buckets that each receive every file.
         path_to_gcs_credentials: Local path to the GCS service account key.
-        target_file_type: Remote file suffix to process.
+        target_file_type: Comma-separated remote file suffixes to process.
         remote_path: Remote SFTP directory to scan.
+        target_file_glob: Comma-separated glob patterns to process.
+        target_file_regex: Regular expression searched in remote filenames.
+        recursive: Whether to walk subdirectories of remote_path.
+        max_depth: Deepest subdirectory level below remote_path to walk.
+        listing_concurrency: Number of remote directories listed at once.
+        delete_batch_size: Confirmed uploads queued before their remote
+            deletes are sent as one pipelined batch.
+        tuning: SSH transport and SFTP read settings.
+        ranged_download_threshold: Files of at least this many bytes are
+            downloaded as parallel byte ranges; 0 disables ranged downloads.
+        ranged_download_streams: Byte ranges read at once for a large file.
+        max_concurrent_transfers: Files moved at the same time, each on its
+            own SFTP channel.
+        transfer_order: "listing", "largest_first", "smallest_first", or
+            "oldest_first".
+        stall_timeout_s: Seconds without data before a download or upload
+            request is abandoned; 0 disables stall detection for both.
+        file_deadline_base_s: Fixed part of each file's transfer deadline.
+        file_deadline_min_bytes_per_s: Slowest acceptable average throughput;
+            each file's deadline grows by its size divided by this value.
+            0 disables per-file deadlines.
+        progress_log_interval_s: Seconds between progress log lines for
+            in-flight transfers; 0 disables them.
+        bundle_format: "tar.gz" or "zip" to pack small files into archive
+            objects; empty uploads every file as its own object.
+        bundle_max_file_size: Files of at most this many bytes are bundled.
+        bundle_max_bytes: Uncompressed bytes after which a bundle is uploaded.
+        bundle_prefix: Object name prefix for bundles.
+        csv_inspection: Count rows and check the header of .csv files as
+            they download, recording both as object metadata.
+        csv_expected_header: Comma-separated columns a .csv header must
+            match exactly; empty accepts any header.
+        csv_quarantine_prefix: Object name prefix for .csv files that fail
+            inspection; empty stores them under their usual name.
+        upload_success_policy: "all" or "quorum"; how many of the buckets in
+            bucket_name must store a file before it is deleted remotely.
+            "quorum" is a strict majority.
+        bandwidth_limit_bytes_per_s: Cap on the BIP's combined SFTP read
+            rate; 0 leaves it unlimited.
+        transfer_pause_s: Pause after each file on a transfer thread.
+        blob_name_template: Object name for each uploaded file, built from
+            fields such as {bip}, {date}, {name}, and {hash}.
+        transfer_backend: "thread" for blocking transfers on a thread per
+            file, or "asyncio" for transfers on the shared event loop.
+        staging_min_free_bytes: Free space kept on each staging volume; a
+            download starts only if the volume stays above it afterwards.
+            0 keeps no reserve, so a file only has to fit.
     """
     hostname: str
     username: str
@@ -63,6 +286,117 @@ class SFTPConfig:
     path_to_gcs_credentials: str
     target_file_type: str = ".csv"
     remote_path: str = "/REPORTS"
+    target_file_glob: str = ""
+    target_file_regex: str = ""
+    recursive: bool = False
+    max_depth: int = 5
+    listing_concurrency: int = 4
+    delete_batch_size: int = 100
+    tuning: TransportTuning = field(default_factory=TransportTuning)
+    ranged_download_threshold: int = 256 * 1024 * 1024
+    ranged_download_streams: int = 4
+    max_concurrent_transfers: int = 1
+    transfer_order: str = "listing"
+    stall_timeout_s: int = 120
+    file_deadline_base_s: int = 300
+    file_deadline_min_bytes_per_s: int = 100 * 1024
+    progress_log_interval_s: int = 30
+    bundle_format: str = ""
+    bundle_max_file_size: int = 1024 * 1024
+    bundle_max_bytes: int = 64 * 1024 * 1024
+    bundle_prefix: str = "bundles/"
+    csv_inspection: bool = False
+    csv_expected_header: str = ""
+    csv_quarantine_prefix: str = ""
+    upload_success_policy: str = "all"
+    bandwidth_limit_bytes_per_s: int = 0
+    transfer_pause_s: float = 1.0
+    blob_name_template: str = "{bip}/dt={date}/{hash:.6}-{name}"
+    transfer_backend: str = "thread"
+    staging_min_free_bytes: int = 0
+
+
+@dataclass
+class BIPJob:
+    """
+    One BIP entry from the job file.
+
+    Attributes:
+        name: BIP label used in logs, notifications, and summaries.
+        secret_path: Infisical path holding the BIP's secrets.
+        priority: BIPs with a higher priority start first.
+        enabled: Disabled BIPs are not run.
+        max_concurrent_transfers: Overrides the MAX_CONCURRENT_TRANSFERS
+            secret when set.
+        bandwidth_limit_bytes_per_s: Cap on the BIP's combined SFTP read
+            rate; 0 leaves it unlimited.
+        schedule: Local hours the BIP runs in, in cron hour syntax such as
+            "*", "*/2", or "0-6,18-23".
+    """
+
+    name: str
+    secret_path: str
+    priority: int = 0
+    enabled: bool = True
+    max_concurrent_transfers: int | None = None
+    bandwidth_limit_bytes_per_s: int = 0
+    schedule: str = "*"
+
+
+@dataclass
+class RunSettings:
+    """
+    Run-wide settings from the job file.
+
+    Attributes:
+        smtp_host: SMTP server hostname.
+        smtp_port: SMTP server port.
+        smtp_timeout_s: Timeout for SMTP connections and commands.
+        transfer_pause_s: Pause after each file on a transfer thread.
+    """
+
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_timeout_s: float = 30
+    transfer_pause_s: float = 1.0
+
+
+@dataclass
+class JobsConfig:
+    """Validated contents of the job file."""
+
+    run: RunSettings
+    bips: list[BIPJob]
+
+
+@dataclass
+class RemoteFile:
+    """Remote file selected for transfer, with attributes from the listing."""
+
+    name: str
+    remote_path: str
+    relative_path: str
+    size: int | None = None
+    mtime: int | None = None
+
+
+@dataclass
+class Lease:
+    """
+    A runner's claim on one unit of work, valid until expires_at.
+
+    Attributes:
+        key: Work item the lease covers, such as "<BIP>/<relative path>".
+        owner: Runner ID that holds the lease.
+        expires_at: Unix time after which other runners may take it over.
+        token: Store-specific version used to renew or release only the
+            lease this runner still holds.
+    """
+
+    key: str
+    owner: str
+    expires_at: float
+    token: int | str
 
 
 @dataclass
@@ -81,6 +415,7 @@ class EmailConfig:
         use_ssl: Use implicit SSL from connection start. If true, STARTTLS is ignored.
         subject_prefix: Optional prefix for all outbound message subjects.
         app_name: Application name used in generated exception subjects.
+        timeout_s: Timeout for SMTP connections and commands.
     """
 
     host: str
@@ -93,6 +428,7 @@ class EmailConfig:
     use_ssl: bool = False
     subject_prefix: str = ""
     app_name: str = ""
+    timeout_s: float = 30
 
 
 @dataclass
@@ -0,0 +1,8 @@
+from .report import build_run_report, upload_run_report, write_results_report
+from .trace import Tracer, open_tracer
+
+__version__ = "1.0.0"
+__author__ = "Bryan Olandres"
+
+# Expose main classes/functions at package level
+__all__ = ["Tracer", "build_run_report", "open_tracer", "upload_run_report", "write_results_report"]
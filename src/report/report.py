@@ -0,0 +1,179 @@
+import csv
+import dataclasses
+import gzip
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from google.cloud import storage
+
+from models import BIPSummary, FileResult
+
+REPORT_COLUMNS = [
+    "bip_name",
+    "file_name",
+    "stage",
+    "success",
+    "error_message",
+    "row_count",
+    "schema_hash",
+    "quarantined",
+    "blob_name",
+]
+
+
+def _iter_file_results(summary: BIPSummary) -> Iterator[FileResult]:
+    """Yield every per-file outcome recorded for one BIP."""
+    yield from summary.downloaded
+    yield from summary.failed_downloads
+    yield from summary.deleted
+    yield from summary.failed_deletions
+    yield from summary.deferred
+
+
+def write_results_report(
+    summaries: Iterable[BIPSummary],
+    directory: Path,
+    *,
+    file_stem: str = "results",
+    gzip_threshold_bytes: int = 256 * 1024,
+) -> Path:
+    """
+    Write every per-file result from a run to a CSV report.
+
+    Rows are streamed to disk one at a time so the report never has to be held
+    in memory. When the finished CSV is larger than gzip_threshold_bytes, it is
+    replaced by a gzip-compressed copy.
+
+    Args:
+        summaries: BIP summaries from the run.
+        directory: Existing directory the report is written into.
+        file_stem: Report filename without extension.
+        gzip_threshold_bytes: Size above which the report is compressed.
+
+    Returns:
+        Path to the written .csv or .csv.gz report.
+    """
+    csv_path = directory / f"{file_stem}.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(REPORT_COLUMNS)
+        for summary in summaries:
+            for fr in _iter_file_results(summary):
+                writer.writerow(
+                    [
+                        summary.bip_name,
+                        fr.name,
+                        fr.stage,
+                        fr.success,
+                        fr.error_message,
+                        "" if fr.row_count is None else fr.row_count,
+                        fr.schema_hash,
+                        fr.quarantined,
+                        fr.blob_name,
+                    ]
+                )
+
+    size = csv_path.stat().st_size
+    if size <= gzip_threshold_bytes:
+        return csv_path
+
+    gz_path = directory / f"{file_stem}.csv.gz"
+    with open(csv_path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    csv_path.unlink()
+    logging.info(
+        f"Results report compressed from {size} to {gz_path.stat().st_size} bytes."
+    )
+    return gz_path
+
+
+def build_run_report(
+    summaries: Iterable[BIPSummary],
+    *,
+    run_id: str,
+    started_at: float,
+    finished_at: float,
+    runner: str = "",
+) -> dict:
+    """
+    Build a machine-readable report of a run from its BIP summaries.
+
+    Every BIPSummary field is kept, per-file results included, along with
+    its derived counts and throughput, so the report can be loaded as is.
+    Times are Unix timestamps, matching the trace file's spans.
+
+    Args:
+        summaries: BIP summaries from the run.
+        run_id: Run identifier, also written on the run's trace spans.
+        started_at: Unix time the run started.
+        finished_at: Unix time the last BIP finished.
+        runner: Name of the host or runner that ran the BIPs.
+
+    Returns:
+        A JSON-serializable dict.
+    """
+    bips = [
+        dict(
+            dataclasses.asdict(summary),
+            files_succeeded=summary.files_succeeded,
+            files_failed=summary.files_failed,
+            bytes_per_s=summary.bytes_per_s,
+        )
+        for summary in summaries
+    ]
+    statuses: dict[str, int] = {}
+    for bip in bips:
+        statuses[bip["status"]] = statuses.get(bip["status"], 0) + 1
+    return {
+        "run_id": run_id,
+        "runner": runner,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "duration_s": finished_at - started_at,
+        "totals": {
+            "bips": len(bips),
+            "statuses": statuses,
+            "files_found": sum(b["files_found"] for b in bips),
+            "files_succeeded": sum(b["files_succeeded"] for b in bips),
+            "files_failed": sum(b["files_failed"] for b in bips),
+            "files_deferred": sum(len(b["deferred"]) for b in bips),
+            "bytes_moved": sum(b["bytes_moved"] for b in bips),
+        },
+        "bips": bips,
+    }
+
+
+def upload_run_report(
+    report: dict, bucket_name: str, prefix: str, path_to_gcs_file: Path
+) -> None:
+    """
+    Upload a run report built by build_run_report to a GCS bucket.
+
+    The object is "<prefix>/dt=<UTC date>/<run id>.json". Upload failures
+    are only logged.
+
+    Args:
+        report: The run report.
+        bucket_name: Destination bucket.
+        prefix: Object name prefix; empty stores reports at the bucket root.
+        path_to_gcs_file: GCS service account credentials.
+    """
+    prefix = prefix.strip("/")
+    started = datetime.fromtimestamp(report["started_at"], timezone.utc)
+    blob_name = f"dt={started:%Y-%m-%d}/{report['run_id']}.json"
+    if prefix:
+        blob_name = f"{prefix}/{blob_name}"
+    try:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(path_to_gcs_file)
+        blob = storage.Client().bucket(bucket_name).blob(blob_name)
+        blob.upload_from_string(
+            json.dumps(report), content_type="application/json", timeout=60
+        )
+        logging.info(f"Run report uploaded to gs://{bucket_name}/{blob_name}")
+    except Exception as e:
+        logging.error(f"Failed to upload run report to gs://{bucket_name}/{blob_name}: {e}")
@@ -0,0 +1,94 @@
+import dataclasses
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from models import TraceSpan
+
+
+class Tracer:
+    """
+    Append per-file trace spans to a local JSONL file.
+
+    Each span is one JSON object on its own line, written with a single
+    append, so the BIPs and worker processes of a run can share one file.
+    The file is opened for every span, which keeps the tracer picklable for
+    worker processes. A span that cannot be written is logged and dropped;
+    tracing never fails a transfer.
+    """
+
+    def __init__(self, path: Path, run_id: str) -> None:
+        """
+        Args:
+            path: Trace file; created, with its directory, if missing.
+            run_id: Identifier written on every span of the run.
+        """
+        self.path = Path(path)
+        self.run_id = run_id
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, span: TraceSpan) -> None:
+        """Append one span to the trace file."""
+        line = json.dumps(dataclasses.asdict(span), separators=(",", ":")) + "\n"
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logging.warning(f"Failed to write trace span to {self.path}: {e}")
+
+    @contextmanager
+    def span(
+        self, name: str, *, bip_name: str, file_name: str, **attributes
+    ) -> Iterator[dict]:
+        """
+        Time the enclosed step and record it as a span.
+
+        Yields the span's attributes, so the step can add details it only
+        learns while running. An exception marks the span failed with its
+        message and is re-raised.
+        """
+        start = time.time()
+        started = time.perf_counter()
+        error = ""
+        try:
+            yield attributes
+        except BaseException as e:
+            error = str(e) or type(e).__name__
+            raise
+        finally:
+            self.record(
+                TraceSpan(
+                    run_id=self.run_id,
+                    bip_name=bip_name,
+                    file_name=file_name,
+                    name=name,
+                    start=start,
+                    duration_s=time.perf_counter() - started,
+                    success=not error,
+                    error=error,
+                    attributes=attributes,
+                )
+            )
+
+
+def open_tracer(path: str, run_id: str) -> Tracer | None:
+    """
+    Return a writer for the trace file at path, or None when path is empty.
+
+    A trace file that cannot be created is logged and tracing is skipped.
+    """
+    path = path.strip()
+    if not path:
+        return None
+    try:
+        return Tracer(Path(path), run_id)
+    except OSError as e:
+        logging.error(f"Failed to open trace file {path}: {e}")
+        return None
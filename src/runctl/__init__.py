@@ -0,0 +1,11 @@
+from .jobfile import JobFile, parse_jobs, schedule_matches
+from .preflight import preflight_command, readiness_table, run_preflight
+from .runctl import RunBudget, RunLock, RunLockHeld
+from .status import RunStatus, StatusServer
+from .worker import WorkerFailed, run_in_worker
+
+__version__ = "1.0.0"
+__author__ = "Bryan Olandres"
+
+# Expose main classes/functions at package level
+__all__ = ["JobFile", "RunBudget", "RunLock", "RunLockHeld", "RunStatus", "StatusServer", "WorkerFailed", "parse_jobs", "preflight_command", "readiness_table", "run_in_worker", "run_preflight", "schedule_matches"]
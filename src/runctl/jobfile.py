@@ -0,0 +1,180 @@
+import logging
+import os
+import threading
+import time
+import tomllib
+from dataclasses import fields
+from pathlib import Path
+
+from models import BIPJob, JobsConfig, RunSettings
+
+
+def parse_hours(spec: str) -> set[int]:
+    """
+    Return the hours matched by a cron hour field such as "*/2" or "0-6,18".
+
+    Raises:
+        ValueError: If spec is not valid cron hour syntax.
+    """
+    hours: set[int] = set()
+    for part in spec.replace(" ", "").split(","):
+        base, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if base == "*":
+                start, end = 0, 23
+            elif "-" in base:
+                start, end = (int(x) for x in base.split("-", 1))
+            else:
+                start = end = int(base)
+        except ValueError:
+            raise ValueError(f"invalid schedule '{spec}'")
+        if step < 1:
+            raise ValueError(f"invalid step in schedule '{spec}'")
+        if not 0 <= start <= end <= 23:
+            raise ValueError(f"hours in schedule '{spec}' must be 0-23")
+        hours.update(range(start, end + 1, step))
+    return hours
+
+
+def schedule_matches(spec: str, hour: int) -> bool:
+    """Return True if hour falls inside a valid cron hour field spec."""
+    return hour in parse_hours(spec)
+
+
+def _check_keys(table: dict, allowed: set[str], where: str) -> None:
+    unknown = sorted(set(table) - allowed)
+    if unknown:
+        raise ValueError(f"{where}: unknown key(s) {', '.join(unknown)}")
+
+
+def _typed(table: dict, key: str, kind: type | tuple[type, ...], where: str):
+    value = table[key]
+    # bool is an int subclass; never accept it for a number.
+    if isinstance(value, bool) != (kind is bool) or not isinstance(value, kind):
+        raise ValueError(f"{where}: {key} has an invalid value {value!r}")
+    return value
+
+
+def parse_jobs(data: dict, source: str = "job file") -> JobsConfig:
+    """
+    Validate the parsed contents of a job file.
+
+    Raises:
+        ValueError: If a key is unknown, missing, or has an invalid value.
+    """
+    _check_keys(data, {"run", "bip"}, source)
+
+    run_table = data.get("run", {})
+    run_keys = {f.name for f in fields(RunSettings)}
+    _check_keys(run_table, run_keys, f"{source} [run]")
+    run = RunSettings()
+    for key in run_table:
+        kind = str if key == "smtp_host" else int if key == "smtp_port" else (int, float)
+        setattr(run, key, _typed(run_table, key, kind, f"{source} [run]"))
+    if run.smtp_timeout_s <= 0 or run.transfer_pause_s < 0:
+        raise ValueError(f"{source} [run]: timeouts and pauses cannot be negative")
+
+    bips: list[BIPJob] = []
+    bip_keys = {f.name for f in fields(BIPJob)}
+    for index, table in enumerate(data.get("bip", [])):
+        where = f"{source} [[bip]] #{index + 1}"
+        _check_keys(table, bip_keys, where)
+        for key in ("name", "secret_path"):
+            if not isinstance(table.get(key), str) or not table[key]:
+                raise ValueError(f"{where}: {key} is required")
+        where = f"{source} BIP {table['name']}"
+        job = BIPJob(name=table["name"], secret_path=table["secret_path"])
+        for key in ("priority", "max_concurrent_transfers", "bandwidth_limit_bytes_per_s"):
+            if key in table:
+                setattr(job, key, _typed(table, key, int, where))
+        if "enabled" in table:
+            job.enabled = _typed(table, "enabled", bool, where)
+        if "schedule" in table:
+            job.schedule = _typed(table, "schedule", str, where)
+        try:
+            parse_hours(job.schedule)
+        except ValueError as e:
+            raise ValueError(f"{where}: {e}")
+        if job.max_concurrent_transfers is not None and job.max_concurrent_transfers < 1:
+            raise ValueError(f"{where}: max_concurrent_transfers must be at least 1")
+        if job.bandwidth_limit_bytes_per_s < 0:
+            raise ValueError(f"{where}: bandwidth_limit_bytes_per_s cannot be negative")
+        if any(b.name == job.name for b in bips):
+            raise ValueError(f"{where}: duplicate BIP name")
+        bips.append(job)
+    return JobsConfig(run=run, bips=bips)
+
+
+class JobFile:
+    """
+    TOML job file, reloaded when it changes on disk.
+
+    current() checks the file's modification time at most once every
+    check_interval_s, so callers can ask for it as often as they like. A
+    changed file that fails validation is logged and the last valid version
+    stays in force, so a typo during an incident never stops a running job.
+    """
+
+    def __init__(self, path: Path, check_interval_s: float = 5.0) -> None:
+        """
+        Args:
+            path: TOML job file.
+            check_interval_s: Minimum seconds between checks for changes.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not valid TOML or fails validation.
+        """
+        self.path = Path(path)
+        self.check_interval_s = check_interval_s
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._config = self._load()
+        self._checked_at = time.monotonic()
+
+    def __getstate__(self) -> dict:
+        # Sent to worker processes in process mode; locks cannot be pickled.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _file_stamp(self) -> tuple[int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> JobsConfig:
+        with open(self.path, "rb") as fp:
+            try:
+                data = tomllib.load(fp)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"{self.path} is not valid TOML: {e}")
+        return parse_jobs(data, str(self.path))
+
+    def current(self) -> JobsConfig:
+        """Return the job file's contents, reloading them if the file changed."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval_s:
+                return self._config
+            self._checked_at = now
+            try:
+                stamp = self._file_stamp()
+                if stamp != self._stamp:
+                    self._stamp = stamp
+                    self._config = self._load()
+                    logging.info(f"Reloaded job file {self.path}")
+            except (OSError, ValueError) as e:
+                logging.error(f"Keeping the previous job settings; reload failed: {e}")
+            return self._config
+
+    def job(self, bip_name: str) -> BIPJob | None:
+        """Return the current entry for bip_name, or None if it was removed."""
+        for job in self.current().bips:
+            if job.name == bip_name:
+                return job
+        return None
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from models import BIPJob, PreflightResult
+
+
+def run_preflight(
+    bip_secrets: list[tuple[str, dict[str, str]]],
+    check: Callable[[str, dict[str, str]], PreflightResult],
+) -> dict[str, PreflightResult]:
+    """
+    Check every BIP at the same time.
+
+    Args:
+        bip_secrets: Each BIP's name and secrets.
+        check: Runs one BIP's checks from its name and secrets.
+
+    Returns:
+        Pre-flight results keyed by BIP name, in bip_secrets order.
+    """
+    with ThreadPoolExecutor(
+        max_workers=max(1, len(bip_secrets)), thread_name_prefix="preflight"
+    ) as pool:
+        results = pool.map(lambda job: check(job[0], job[1]), bip_secrets)
+        return {result.bip_name: result for result in results}
+
+
+def readiness_table(results: list[PreflightResult]) -> str:
+    """Format pre-flight results as a table, with the errors of failed BIPs below."""
+    marks = {True: "ok", False: "FAIL", None: "-"}
+    # Columns in the order the checks ran; a check a BIP never reached is "-"
+    columns = list(dict.fromkeys(check for r in results for check in r.checks))
+    lines = [
+        f"{'BIP':<12}"
+        + "".join(f"{check:>13}" for check in columns)
+        + f"{'Time':>8}  Ready"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.bip_name:<12}"
+            + "".join(f"{marks[result.checks.get(check)]:>13}" for check in columns)
+            + f"{result.duration_s:>7.1f}s  {'yes' if result.ready else 'NO'}"
+        )
+    for result in results:
+        if not result.ready:
+            lines.append(f"{result.bip_name}: {result.error}")
+    return "\n".join(lines)
+
+
+def preflight_command(
+    jobs: list[BIPJob],
+    load_secrets: Callable[[BIPJob], dict[str, str]],
+    check: Callable[[str, dict[str, str]], PreflightResult],
+) -> bool:
+    """
+    Print the pre-flight readiness table for every enabled BIP.
+
+    Schedules are ignored and nothing is moved or emailed. A BIP whose
+    secrets cannot be loaded fails its "config" check.
+
+    Args:
+        jobs: BIP entries from the job file.
+        load_secrets: Fetches one BIP's secrets.
+        check: Runs one BIP's checks from its name and secrets.
+
+    Returns:
+        True when every enabled BIP is ready.
+    """
+    failed: dict[str, PreflightResult] = {}
+    bip_secrets: list[tuple[str, dict[str, str]]] = []
+    names = []
+    for job in jobs:
+        if not job.enabled:
+            continue
+        names.append(job.name)
+        try:
+            bip_secrets.append((job.name, load_secrets(job)))
+        except Exception as e:
+            failed[job.name] = PreflightResult(job.name, {"config": None})
+            failed[job.name].fail("config", f"Error fetching secrets: {e}")
+
+    checks = {**failed, **run_preflight(bip_secrets, check)}
+    results = [checks[name] for name in names]
+    print(readiness_table(results))
+    return all(result.ready for result in results)
@@ -0,0 +1,107 @@
+import fcntl
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class RunLockHeld(RuntimeError):
+    """Raised when another run already holds the run lock."""
+
+
+class RunLock:
+    """
+    Exclusive, crash-safe lock that stops two runs from overlapping.
+
+    The lock is an flock on lock_path, so the operating system releases it
+    when the holding process exits for any reason, including a crash or
+    SIGKILL. The file itself is left in place and only records who held the
+    lock last; its presence never blocks a later run.
+    """
+
+    def __init__(self, lock_path: Path) -> None:
+        self.lock_path = Path(lock_path)
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        """
+        Take the lock without waiting.
+
+        Raises:
+            RunLockHeld: If another process holds the lock.
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            holder = os.pread(fd, 256, 0).decode("utf-8", "replace").strip()
+            os.close(fd)
+            raise RunLockHeld(
+                f"Run lock {self.lock_path} is held by another run ({holder or 'unknown'})"
+            )
+        os.ftruncate(fd, 0)
+        os.pwrite(
+            fd, f"pid={os.getpid()} started={datetime.now():%Y-%m-%d %H:%M:%S}\n".encode(), 0
+        )
+        self._fd = fd
+        logging.info(f"Acquired run lock {self.lock_path}")
+
+    def release(self) -> None:
+        """Release the lock if this instance holds it."""
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+        logging.info(f"Released run lock {self.lock_path}")
+
+    def __enter__(self) -> "RunLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class RunBudget:
+    """
+    Wall-clock budget shared by every BIP in one run.
+
+    Once fewer than reserve_s seconds remain, the budget is low: no new file
+    should be started, while transfers already in flight are left to finish.
+    """
+
+    def __init__(self, total_s: float, reserve_s: float = 0.0) -> None:
+        """
+        Args:
+            total_s: Seconds the run may take; 0 or less means unlimited.
+            reserve_s: Seconds kept back for in-flight transfers, remote
+                deletions, and the summary email.
+        """
+        self.total_s = total_s
+        self.reserve_s = reserve_s
+        self.started = time.monotonic()
+
+    @property
+    def limited(self) -> bool:
+        return self.total_s > 0
+
+    def remaining_s(self) -> float:
+        """Return the seconds left in the budget, or infinity when unlimited."""
+        if not self.limited:
+            return float("inf")
+        return self.total_s - (time.monotonic() - self.started)
+
+    def low(self) -> bool:
+        """Return True once no new file should be started."""
+        return self.remaining_s() <= self.reserve_s
+
+    def describe(self) -> str:
+        """Return a short description of the budget for logs."""
+        if not self.limited:
+            return "unlimited"
+        return (
+            f"{self.total_s:.0f}s total, {self.reserve_s:.0f}s reserve, "
+            f"{max(0.0, self.remaining_s()):.0f}s remaining"
+        )
@@ -0,0 +1,166 @@
+import json
+import logging
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+from .runctl import RunBudget
+
+
+class RunStatus:
+    """
+    Live view of the current run, read by the status endpoint.
+
+    Running BIPs may attach a source: a callable that returns their own
+    counters. Sources are only called when the endpoint is queried, so the
+    transfer loop does no extra work while nobody is watching.
+    """
+
+    def __init__(self, budget: RunBudget | None = None) -> None:
+        self.budget = budget
+        self.started_at = time.time()
+        self._started = time.monotonic()
+        self._running: dict[str, dict[str, Any]] = {}
+        self._finished: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def bip_started(self, bip_name: str) -> None:
+        """Record that bip_name is running."""
+        with self._lock:
+            self._running[bip_name] = {"started": time.monotonic(), "source": None}
+
+    def attach(self, bip_name: str, source: Callable[[], dict]) -> None:
+        """Report source's counters for bip_name while it runs."""
+        with self._lock:
+            entry = self._running.setdefault(
+                bip_name, {"started": time.monotonic(), "source": None}
+            )
+            entry["source"] = source
+
+    def bip_finished(self, bip_name: str, status: str) -> None:
+        """Record that bip_name ended with status."""
+        with self._lock:
+            self._running.pop(bip_name, None)
+            self._finished[bip_name] = status
+
+    def track(self, run_bip: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a run_bip callable so each BIP's start and end are recorded."""
+
+        def tracked(**kwargs) -> Any:
+            bip_name = kwargs["bip_name"]
+            self.bip_started(bip_name)
+            summary = None
+            try:
+                summary = run_bip(**kwargs)
+                return summary
+            finally:
+                self.bip_finished(bip_name, summary.status if summary else "failed")
+
+        return tracked
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the run's status as a JSON-serializable dict."""
+        now = time.monotonic()
+        with self._lock:
+            running = dict(self._running)
+            finished = dict(self._finished)
+
+        bips = []
+        for bip_name, entry in running.items():
+            bip = {"bip_name": bip_name, "elapsed_s": round(now - entry["started"], 1)}
+            if entry["source"] is not None:
+                try:
+                    bip.update(entry["source"]())
+                except Exception as e:
+                    bip["error"] = f"Status unavailable: {e}"
+            bips.append(bip)
+
+        run = {
+            "started_at": self.started_at,
+            "elapsed_s": round(now - self._started, 1),
+            "remaining_s": None,
+        }
+        if self.budget is not None and self.budget.limited:
+            run["remaining_s"] = round(self.budget.remaining_s(), 1)
+        return {"run": run, "running": bips, "finished": finished}
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    """Serves RunStatus.snapshot as JSON on GET / and GET /status."""
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/status"):
+            self.send_error(404)
+            return
+        body = json.dumps(self.server.status.snapshot()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no host address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(f"Status endpoint: {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class StatusServer:
+    """
+    JSON status endpoint on a localhost port or a Unix socket.
+
+    Requests are served on background threads. Only the loopback interface
+    is bound, so the endpoint is never reachable from other hosts.
+    """
+
+    def __init__(self, status: RunStatus, *, port: int = 0, socket_path: str = "") -> None:
+        """
+        Args:
+            status: Run status to serve.
+            port: TCP port on 127.0.0.1; used when socket_path is empty.
+            socket_path: Unix socket path; a stale socket file is replaced.
+        """
+        self.status = status
+        self.port = port
+        self.socket_path = socket_path
+        self._server: socketserver.BaseServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Bind the endpoint and serve it on a background thread."""
+        if self.socket_path:
+            Path(self.socket_path).unlink(missing_ok=True)
+            server = _UnixHTTPServer(self.socket_path, _StatusHandler)
+            where = f"unix:{self.socket_path}"
+        else:
+            server = ThreadingHTTPServer(("127.0.0.1", self.port), _StatusHandler)
+            server.daemon_threads = True
+            where = f"http://127.0.0.1:{server.server_address[1]}/status"
+        server.status = self.status
+        self._server = server
+        self._thread = threading.Thread(
+            target=server.serve_forever, name="status-endpoint", daemon=True
+        )
+        self._thread.start()
+        logging.info(f"Status endpoint listening on {where}")
+
+    def stop(self) -> None:
+        """Stop serving and remove the Unix socket file, if any."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+        if self.socket_path:
+            Path(self.socket_path).unlink(missing_ok=True)
@@ -0,0 +1,130 @@
+import logging
+import multiprocessing
+import time
+import traceback
+from typing import Any, Callable
+
+# How often a supervisor checks its worker's memory and deadline.
+WORKER_POLL_INTERVAL_S = 1.0
+
+
+class WorkerFailed(RuntimeError):
+    """
+    Raised when a worker process dies, is killed, or raises.
+
+    Attributes:
+        reason: "timeout", "memory", "crashed", or "error".
+    """
+
+    def __init__(self, message: str, reason: str) -> None:
+        super().__init__(message)
+        self.reason = reason
+
+
+def _rss_bytes(pid: int) -> int | None:
+    """Return the resident set size of pid, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fp:
+            for line in fp:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def _worker_main(conn, func: Callable[..., Any], kwargs: dict) -> None:
+    """Child entry point: run func and send its result or error to the parent."""
+    try:
+        result = func(**kwargs)
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+    else:
+        conn.send(("ok", result))
+    finally:
+        conn.close()
+
+
+def run_in_worker(
+    func: Callable[..., Any],
+    kwargs: dict,
+    *,
+    name: str,
+    rss_limit_bytes: int = 0,
+    timeout_s: float = 0,
+) -> Any:
+    """
+    Run func(**kwargs) in a fresh worker process and return its result.
+
+    The worker is started with the "spawn" method, so it shares no threads,
+    sockets, or locks with the parent. Its result comes back pickled over a
+    pipe. While it runs, the calling thread watches it and kills it with
+    SIGKILL when its resident memory exceeds rss_limit_bytes or it runs past
+    timeout_s, so a runaway or hung native call cannot take the parent down.
+
+    Args:
+        func: Module-level function to run; it and kwargs must be picklable.
+        kwargs: Keyword arguments for func.
+        name: Process name used in logs.
+        rss_limit_bytes: Memory limit; 0 disables it. Enforced through
+            /proc, so it only applies on Linux.
+        timeout_s: Hard wall-clock limit; 0 disables it.
+
+    Returns:
+        The value func returned in the worker.
+
+    Raises:
+        WorkerFailed: If the worker exceeds a limit, exits without a result,
+            or raises.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(
+        target=_worker_main, args=(child_conn, func, kwargs), name=name, daemon=True
+    )
+    proc.start()
+    child_conn.close()
+    logging.info(f"Started worker process {name} (pid {proc.pid})")
+
+    deadline = time.monotonic() + timeout_s if timeout_s > 0 else None
+    try:
+        while True:
+            if parent_conn.poll(WORKER_POLL_INTERVAL_S):
+                try:
+                    status, payload = parent_conn.recv()
+                except EOFError:
+                    status, payload = None, None
+                break
+            if not proc.is_alive() and not parent_conn.poll(0):
+                status, payload = None, None
+                break
+            if rss_limit_bytes > 0:
+                rss = _rss_bytes(proc.pid)
+                if rss is not None and rss > rss_limit_bytes:
+                    proc.kill()
+                    raise WorkerFailed(
+                        f"Worker {name} killed: resident memory {rss} bytes "
+                        f"exceeded the {rss_limit_bytes}-byte limit",
+                        reason="memory",
+                    )
+            if deadline is not None and time.monotonic() > deadline:
+                proc.kill()
+                raise WorkerFailed(
+                    f"Worker {name} killed after exceeding its {timeout_s:.0f}s timeout",
+                    reason="timeout",
+                )
+    finally:
+        parent_conn.close()
+        proc.join(timeout=30)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+
+    if status == "ok":
+        return payload
+    if status == "error":
+        raise WorkerFailed(f"Worker {name} raised {payload}", reason="error")
+    raise WorkerFailed(
+        f"Worker {name} exited with code {proc.exitcode} without a result",
+        reason="crashed",
+    )
@@ -1,7 +1,8 @@
+from .dedup import NotificationLog, normalize_error
 from .sender import Sender
 
 __version__ = "1.0.0"
 __author__ = "Bryan Olandres"
 
 # Expose main classes/functions at package level
-__all__ = ["Sender"]
+__all__ = ["NotificationLog", "Sender", "normalize_error"]
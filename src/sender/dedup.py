@@ -0,0 +1,150 @@
+import hashlib
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from models import SuppressedNotification
+
+# Schema for the notification log; columns are only ever added, never changed.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    fingerprint TEXT PRIMARY KEY,
+    bip_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    last_sent_at REAL NOT NULL,
+    suppressed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS suppressions (
+    fingerprint TEXT NOT NULL,
+    suppressed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS suppressions_by_time ON suppressions (suppressed_at);
+"""
+
+# Suppression rows older than this are pruned; they only feed run summaries.
+_KEEP_S = 7 * 24 * 60 * 60
+
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+_NUMBER = re.compile(r"0x[0-9a-f]+|\d+")
+
+
+def normalize_error(text: str) -> str:
+    """
+    Reduce an error message to the parts that stay the same across repeats.
+
+    Quoted values such as file names and paths, and numbers such as ports,
+    sizes, and errnos, are masked, so the same failure on different files or
+    at different times gives the same text.
+    """
+    text = _QUOTED.sub("'*'", text.lower())
+    text = _NUMBER.sub("#", text)
+    return " ".join(text.split())
+
+
+class NotificationLog:
+    """
+    On-disk record of sent notifications, used to suppress repeats.
+
+    A notification is identified by its BIP, kind, and normalized error
+    text. Once one is sent, identical ones are suppressed until cooldown_s
+    has passed; the next one after that is sent with the number suppressed
+    in between. The log is a SQLite file, so it is shared between runs and
+    between the worker processes of one run.
+    """
+
+    def __init__(self, db_path: Path, cooldown_s: float) -> None:
+        """
+        Args:
+            db_path: SQLite database file; created with its schema if missing.
+            cooldown_s: Seconds during which a repeat is suppressed.
+        """
+        self.db_path = Path(db_path)
+        self.cooldown_s = cooldown_s
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the log usable from any thread and
+        # picklable for worker processes.
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    @staticmethod
+    def fingerprint(bip_name: str, kind: str, body: str) -> str:
+        """Return the identity of a notification."""
+        key = f"{bip_name}\0{kind}\0{normalize_error(body)}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+    def admit(self, bip_name: str, kind: str, body: str) -> int | None:
+        """
+        Decide whether a notification is sent, and record the decision.
+
+        Returns:
+            None when the notification is suppressed. Otherwise the number
+            of repeats suppressed since it was last sent, and the
+            notification is recorded as sent now.
+        """
+        fingerprint = self.fingerprint(bip_name, kind, body)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT last_sent_at, suppressed FROM notifications WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+            if row is not None and now - row[0] < self.cooldown_s:
+                conn.execute(
+                    "UPDATE notifications SET suppressed = suppressed + 1 WHERE fingerprint = ?",
+                    (fingerprint,),
+                )
+                conn.execute(
+                    "INSERT INTO suppressions VALUES (?, ?)", (fingerprint, now)
+                )
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "INSERT OR REPLACE INTO notifications VALUES (?, ?, ?, ?, 0)",
+                (fingerprint, bip_name, kind, now),
+            )
+            conn.execute(
+                "DELETE FROM suppressions WHERE suppressed_at < ?", (now - _KEEP_S,)
+            )
+            conn.execute("COMMIT")
+            return row[1] if row is not None else 0
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def forget(self, bip_name: str, kind: str, body: str) -> None:
+        """Drop a notification's record, so a send that failed is not a repeat."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM notifications WHERE fingerprint = ?",
+                (self.fingerprint(bip_name, kind, body),),
+            )
+        finally:
+            conn.close()
+
+    def suppressed_since(self, since: float) -> list[SuppressedNotification]:
+        """Return the notifications suppressed at or after since, by BIP and kind."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """
+                SELECT n.bip_name, n.kind, COUNT(*), MAX(n.last_sent_at)
+                FROM suppressions s JOIN notifications n USING (fingerprint)
+                WHERE s.suppressed_at >= ?
+                GROUP BY n.bip_name, n.kind
+                ORDER BY n.bip_name, n.kind
+                """,
+                (since,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [SuppressedNotification(*row) for row in rows]
@@ -9,6 +9,8 @@ from typing import Iterable, Optional
 
 from models import EmailConfig
 
+from .dedup import NotificationLog
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,8 +36,17 @@ class Sender:
         Sender(cfg).send_exception(e, context={"bip": bip_name})
     """
 
-    def __init__(self, config: EmailConfig):
+    def __init__(
+        self, config: EmailConfig, notifications: Optional[NotificationLog] = None
+    ):
+        """
+        Args:
+            config: SMTP settings.
+            notifications: Log used by notify() to suppress repeated
+                notifications; None sends every one.
+        """
         self.config = config
+        self.notifications = notifications
 
     def _connect(self) -> smtplib.SMTP:
         """
@@ -57,9 +68,11 @@ class Sender:
                 "SMTP port is invalid or not set. Check your 'PORT' setting."
             )
         if self.config.use_ssl:
-            server: smtplib.SMTP = smtplib.SMTP_SSL(host, port, timeout=30)
+            server: smtplib.SMTP = smtplib.SMTP_SSL(
+                host, port, timeout=self.config.timeout_s
+            )
         else:
-            server = smtplib.SMTP(host, port, timeout=30)
+            server = smtplib.SMTP(host, port, timeout=self.config.timeout_s)
         try:
             server.ehlo()
             if not self.config.use_ssl and self.config.use_tls:
@@ -156,6 +169,57 @@ class Sender:
             logger.error(f"Failed to send email: {e}")
             raise
 
+    def notify(self, *, bip_name: str, kind: str, subject: str, body: str) -> bool:
+        """
+        Send a notification unless a repeat of it is in its cool-down.
+
+        Notifications are told apart by BIP, kind, and normalized body. When
+        earlier repeats were suppressed, their count is added to the body. A
+        notification log that cannot be read never stops the email.
+
+        Args:
+            bip_name: BIP the notification is about.
+            kind: Notification kind, such as "Connection failed".
+            subject: Email subject line.
+            body: Plain text body content.
+
+        Returns:
+            True when the email was sent, False when it was suppressed.
+
+        Raises:
+            Exception: Whatever send() raises when the email fails.
+        """
+        suppressed = 0
+        if self.notifications is not None:
+            try:
+                admitted = self.notifications.admit(bip_name, kind, body)
+            except Exception as e:
+                logger.error(f"Notification log unavailable; sending anyway: {e}")
+                admitted = 0
+            if admitted is None:
+                logger.info(
+                    f"Suppressed repeated '{kind}' notification for {bip_name} "
+                    f"(cool-down {self.notifications.cooldown_s:.0f}s)"
+                )
+                return False
+            suppressed = admitted
+        text = body
+        if suppressed:
+            text += (
+                f"\n\n{suppressed} identical notification(s) were suppressed "
+                "since this was last sent."
+            )
+        try:
+            self.send(subject=subject, body=text)
+        except Exception:
+            if self.notifications is not None:
+                try:
+                    self.notifications.forget(bip_name, kind, body)
+                except Exception as e:
+                    logger.error(f"Failed to update notification log: {e}")
+            raise
+        return True
+
     def send_exception(
         self,
         exc: BaseException,
@@ -0,0 +1,178 @@
+import importlib
+import os
+import socket
+import threading
+from pathlib import Path
+
+import paramiko
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+
+def _write_ed25519_key(path: Path) -> Path:
+    """Write a new unencrypted Ed25519 key in OpenSSH format to path."""
+    key = Ed25519PrivateKey.generate()
+    path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.OpenSSH,
+            serialization.NoEncryption(),
+        )
+    )
+    return path
+
+
+class _AllowAll(paramiko.ServerInterface):
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+
+class _Handle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class _RootedSFTP(paramiko.SFTPServerInterface):
+    """SFTP server that serves the files under root."""
+
+    root = ""
+
+    def _local(self, path: str) -> str:
+        return self.root + self.canonicalize(path)
+
+    def list_folder(self, path):
+        local = self._local(path)
+        try:
+            entries = []
+            for name in os.listdir(local):
+                attr = paramiko.SFTPAttributes.from_stat(
+                    os.stat(os.path.join(local, name))
+                )
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(self._local(path), flags, 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        handle = _Handle(flags)
+        handle.readfile = handle.writefile = os.fdopen(
+            fd, "r+b" if flags & (os.O_WRONLY | os.O_RDWR) else "rb"
+        )
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+
+@pytest.fixture
+def sftp_server(tmp_path):
+    """
+    Serve tmp_path/remote over SFTP on a local port for the test.
+
+    Yields:
+        (port, remote root directory, path to a client key the server accepts)
+    """
+    root = tmp_path / "remote"
+    root.mkdir()
+    host_key = paramiko.Ed25519Key(filename=_write_ed25519_key(tmp_path / "host_key"))
+    client_key = _write_ed25519_key(tmp_path / "client_key")
+    server_cls = type("SFTP", (_RootedSFTP,), {"root": str(root)})
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(16)
+    transports: list[paramiko.Transport] = []
+
+    def serve() -> None:
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, server_cls)
+            transport.start_server(server=_AllowAll())
+            transports.append(transport)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield sock.getsockname()[1], root, client_key
+    sock.close()
+    for transport in transports:
+        transport.close()
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str) -> None:
+        self.bucket = bucket
+        self.name = name
+        self.metadata = None
+
+    def upload_from_file(self, fp, size=None, timeout=None, **kwargs) -> None:
+        data = fp.read()
+        with self.bucket.lock:
+            self.bucket.objects[self.name] = data
+            self.bucket.uploads.append(self.name)
+
+
+class FakeBucket:
+    """In-memory bucket that records every upload it receives."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.objects: dict[str, bytes] = {}
+        self.uploads: list[str] = []
+        self.lock = threading.Lock()
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+
+@pytest.fixture
+def gcs_buckets(monkeypatch):
+    """
+    Replace the Fetcher's GCS client with an in-memory one.
+
+    Yields:
+        Buckets by name, created on first access.
+    """
+    buckets: dict[str, FakeBucket] = {}
+    lock = threading.Lock()
+
+    class FakeClient:
+        def get_bucket(self, name, **kwargs):
+            with lock:
+                return buckets.setdefault(name, FakeBucket(name))
+
+    fetcher_module = importlib.import_module("fetcher.fetcher")
+    monkeypatch.setattr(fetcher_module.storage, "Client", FakeClient)
+    # The Fetcher points this at its credentials file; restore it afterwards.
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    yield buckets
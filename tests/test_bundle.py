@@ -0,0 +1,157 @@
+import io
+import json
+import tarfile
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from fetcher import StagingArea
+from fetcher.bundle import MANIFEST_MEMBER, Bundler, decode_manifest
+from models import RemoteFile
+
+MTIME = 1792158300
+BUCKETS = [SimpleNamespace(name="primary"), SimpleNamespace(name="replica")]
+
+
+@pytest.fixture(autouse=True)
+def reservations(monkeypatch):
+    monkeypatch.setattr(StagingArea, "_held", {})
+
+
+class _FakeSFTP:
+    def __init__(self, files: dict[str, bytes]) -> None:
+        self.files = files
+
+    def open(self, path, mode):
+        return io.BytesIO(self.files[path])
+
+
+class _Uploads:
+    """Records every upload with the archive's members, failing for some buckets."""
+
+    def __init__(self, failing: tuple[str, ...] = ()) -> None:
+        self.failing = failing
+        self.calls: list[dict] = []
+
+    def __call__(self, path, buckets, blob_name, metadata, **kwargs):
+        self.calls.append(
+            {
+                "blob_name": blob_name,
+                "metadata": metadata,
+                "kwargs": kwargs,
+                "members": _members(path.read_bytes()),
+                "staged_at": path,
+            }
+        )
+        return [b.name for b in buckets if b.name in self.failing]
+
+
+def _members(archive: bytes) -> dict[str, bytes]:
+    if archive[:2] == b"PK":
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            return {name: zf.read(name) for name in zf.namelist()}
+    with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tf:
+        return {m.name: tf.extractfile(m).read() for m in tf.getmembers()}
+
+
+def _file(name: str, data: bytes) -> RemoteFile:
+    return RemoteFile(name, f"/REPORTS/{name}", name, size=len(data), mtime=MTIME)
+
+
+def _bundler(tmp_path, upload, fmt="zip", max_bytes=1000, min_free_bytes=0, **kwargs):
+    staging = StagingArea([str(tmp_path)], min_free_bytes)
+    return Bundler(
+        fmt,
+        bip_name="BIP",
+        blob_prefix="bundles/",
+        max_bytes=max_bytes,
+        staging=staging,
+        upload=upload,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("fmt", ["zip", "tar.gz"])
+def test_full_bundle_is_uploaded_before_the_next_file_joins(tmp_path, fmt):
+    files = {f"/REPORTS/{n}.csv": n.encode() * 100 for n in ("a", "b", "c")}
+    sftp = _FakeSFTP(files)
+    upload = _Uploads()
+    bundler = _bundler(tmp_path, upload, fmt=fmt, max_bytes=250)
+
+    assert bundler.add(sftp, BUCKETS, _file("a.csv", files["/REPORTS/a.csv"])) == []
+    assert bundler.add(sftp, BUCKETS, _file("b.csv", files["/REPORTS/b.csv"])) == []
+    flushed = bundler.add(sftp, BUCKETS, _file("c.csv", files["/REPORTS/c.csv"]))
+    flushed += bundler.flush(BUCKETS)
+
+    assert [(r.name, r.success, r.stage) for r, _ in flushed] == [
+        ("a.csv", True, "download"),
+        ("b.csv", True, "download"),
+        ("c.csv", True, "download"),
+    ]
+    first, second = upload.calls
+    assert first["blob_name"].startswith("bundles/BIP_")
+    assert first["blob_name"].endswith(f".{fmt}")
+    assert first["kwargs"] == {"if_generation_match": 0}
+    assert flushed[0][0].blob_name == first["blob_name"]
+    assert flushed[2][0].blob_name == second["blob_name"]
+    members = first["members"]
+    assert members["a.csv"] == files["/REPORTS/a.csv"]
+    assert members["b.csv"] == files["/REPORTS/b.csv"]
+    manifest = json.loads(members[MANIFEST_MEMBER])
+    assert [entry["name"] for entry in manifest] == ["a.csv", "b.csv"]
+    assert first["metadata"]["bundle-members"] == "2"
+    assert first["metadata"]["bundle-bytes"] == "200"
+    encoded = first["metadata"]["bundle-manifest"]
+    assert [name for name, _, _ in decode_manifest(encoded)] == ["a.csv", "b.csv"]
+    # Bundles are staged, then removed and their space released after upload.
+    assert first["staged_at"].parent == tmp_path
+    assert not list(tmp_path.iterdir())
+    assert StagingArea._held == {}
+
+
+def test_files_are_deferred_without_staging_space_for_a_bundle(tmp_path):
+    sftp = _FakeSFTP({"/REPORTS/a.csv": b"a" * 10})
+    upload = _Uploads()
+    bundler = _bundler(tmp_path, upload, min_free_bytes=10**18)
+
+    results = bundler.add(sftp, BUCKETS, _file("a.csv", b"a" * 10))
+
+    assert [(r.name, r.success, r.stage) for r, _ in results] == [
+        ("a.csv", False, "deferred")
+    ]
+    assert bundler.flush(BUCKETS) == []
+    assert upload.calls == []
+
+
+@pytest.mark.parametrize(
+    "failing, min_uploads, success",
+    [
+        (("replica",), 1, True),
+        (("replica",), 2, False),
+        (("primary", "replica"), 1, False),
+    ],
+)
+def test_members_fail_when_too_few_buckets_store_the_bundle(
+    tmp_path, failing, min_uploads, success
+):
+    sftp = _FakeSFTP({"/REPORTS/a.csv": b"a" * 10})
+    bundler = _bundler(tmp_path, _Uploads(failing), min_uploads=min_uploads)
+
+    bundler.add(sftp, BUCKETS, _file("a.csv", b"a" * 10))
+    [(result, _)] = bundler.flush(BUCKETS)
+
+    assert result.success is success
+    assert result.stage == ("download" if success else "upload")
+    if not success:
+        assert "replica" in result.error_message
+
+
+def test_unreadable_file_fails_alone(tmp_path):
+    upload = _Uploads()
+    bundler = _bundler(tmp_path, upload)
+
+    [(result, _)] = bundler.add(_FakeSFTP({}), BUCKETS, _file("gone.csv", b""))
+
+    assert (result.name, result.success, result.stage) == ("gone.csv", False, "download")
+    assert bundler.flush(BUCKETS) == []
@@ -0,0 +1,179 @@
+import io
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from fetcher.download import (
+    PART_SUFFIX,
+    RANGE_BLOCK_SIZE,
+    STATE_SUFFIX,
+    PartialDownload,
+    download_file,
+    split_ranges,
+)
+
+MB = RANGE_BLOCK_SIZE
+MTIME = 1792158300
+
+
+@pytest.mark.parametrize(
+    "size, streams, ranges",
+    [
+        (0, 4, []),
+        (10, 4, [(0, 10)]),
+        (MB - 1, 8, [(0, MB - 1)]),
+        (2 * MB, 1, [(0, 2 * MB)]),
+        (2 * MB, 8, [(0, MB), (MB, 2 * MB)]),
+        (4 * MB, 3, [(0, 1398102), (1398102, 2796204), (2796204, 4 * MB)]),
+        (3 * MB + 1, 2, [(0, 1572865), (1572865, 3 * MB + 1)]),
+    ],
+)
+def test_split_ranges(size, streams, ranges):
+    assert split_ranges(size, streams) == ranges
+
+
+@pytest.mark.parametrize("size", [1, MB, 5 * MB + 17, 64 * MB - 3])
+@pytest.mark.parametrize("streams", [1, 2, 3, 7, 16])
+def test_ranges_are_contiguous_and_cover_the_file(size, streams):
+    ranges = split_ranges(size, streams)
+
+    assert 1 <= len(ranges) <= streams
+    assert ranges[0][0] == 0 and ranges[-1][1] == size
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    assert all(start < end for start, end in ranges)
+
+
+def _interrupted(local_path: str, data: bytes, streams: int, written: int) -> None:
+    """Leave a .part file and sidecar with the first written bytes of each range."""
+    partial = PartialDownload(local_path, len(data), MTIME)
+    spans = partial.prepare(streams)
+    with open(partial.part_path, "r+b") as fp:
+        for index, (start, _, end) in enumerate(spans):
+            done = min(start + written, end)
+            fp.seek(start)
+            fp.write(data[start:done])
+            partial.advance(index, done, done - start)
+    partial.save()
+
+
+class _RemoteFile(io.BytesIO):
+    def prefetch(self, file_size=None, max_concurrent_requests=None):
+        pass
+
+
+class _FakeSFTP:
+    """Serves one in-memory file and records the offsets it was read from."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.read_from: list[int] = []
+
+    def open(self, path, mode):
+        remote = _RemoteFile(self.data)
+        original_seek = remote.seek
+
+        def seek(offset, whence=0):
+            self.read_from.append(offset)
+            return original_seek(offset, whence)
+
+        remote.seek = seek
+        return remote
+
+    def stat(self, path):
+        return SimpleNamespace(st_size=len(self.data))
+
+    def close(self):
+        pass
+
+
+def test_fresh_download_preallocates_the_part_file_and_writes_a_sidecar(tmp_path):
+    local_path = str(tmp_path / "report.csv")
+    partial = PartialDownload(local_path, 3 * MB, MTIME)
+
+    spans = partial.prepare(streams=3)
+
+    assert spans == [[0, 0, MB], [MB, MB, 2 * MB], [2 * MB, 2 * MB, 3 * MB]]
+    assert os.path.getsize(local_path + PART_SUFFIX) == 3 * MB
+    state = json.loads(Path(local_path + STATE_SUFFIX).read_text())
+    assert state == {"size": 3 * MB, "mtime": MTIME, "ranges": spans, "retries": 0}
+    assert (partial.retries, partial.resumed_bytes) == (0, 0)
+
+
+def test_unchanged_remote_file_resumes_from_the_sidecar(tmp_path):
+    local_path = str(tmp_path / "report.csv")
+    data = bytes(range(256)) * (2 * MB // 256)
+    _interrupted(local_path, data, streams=2, written=1000)
+
+    partial = PartialDownload(local_path, len(data), MTIME)
+    spans = partial.prepare(streams=2)
+
+    assert spans == [[0, 1000, MB], [MB, MB + 1000, 2 * MB]]
+    assert partial.resumed_bytes == 2000
+    assert partial.retries == 1
+
+
+@pytest.mark.parametrize("size_change, mtime_change", [(1, 0), (0, 1)])
+def test_changed_remote_file_discards_the_partial_download(
+    tmp_path, size_change, mtime_change
+):
+    local_path = str(tmp_path / "report.csv")
+    _interrupted(local_path, b"x" * 2 * MB, streams=2, written=1000)
+
+    partial = PartialDownload(local_path, 2 * MB + size_change, MTIME + mtime_change)
+    spans = partial.prepare(streams=2)
+
+    assert all(start == done for start, done, _ in spans)
+    assert partial.resumed_bytes == 0
+    assert os.path.getsize(partial.part_path) == 2 * MB + size_change
+
+
+def test_unreadable_sidecar_starts_over(tmp_path):
+    local_path = str(tmp_path / "report.csv")
+    _interrupted(local_path, b"x" * MB, streams=1, written=1000)
+    Path(local_path + STATE_SUFFIX).write_text("{not json")
+
+    partial = PartialDownload(local_path, MB, MTIME)
+
+    assert partial.prepare(streams=1) == [[0, 0, MB]]
+    assert partial.retries == 0
+
+
+def test_complete_refuses_unfinished_ranges(tmp_path):
+    local_path = str(tmp_path / "report.csv")
+    _interrupted(local_path, b"x" * MB, streams=1, written=1000)
+    partial = PartialDownload(local_path, MB, MTIME)
+    partial.prepare(streams=1)
+
+    with pytest.raises(IOError, match=f"{MB - 1000} byte"):
+        partial.complete()
+    assert not os.path.exists(local_path)
+
+
+def test_download_reads_only_the_missing_bytes_and_renames_into_place(tmp_path):
+    local_path = str(tmp_path / "report.csv")
+    data = bytes(range(256)) * (2 * MB // 256) + b"tail"
+    _interrupted(local_path, data, streams=2, written=4096)
+    sftp = _FakeSFTP(data)
+    resumed = []
+
+    download_file(
+        sftp,
+        lambda: sftp,
+        "/REPORTS/report.csv",
+        local_path,
+        size=len(data),
+        mtime=MTIME,
+        streams=2,
+        on_start=lambda partial: resumed.append(partial.resumed_bytes),
+    )
+
+    assert Path(local_path).read_bytes() == data
+    assert resumed == [2 * 4096]
+    # The second range starts halfway through the 2 MiB + 4 byte file.
+    assert sorted(sftp.read_from) == [4096, MB + 2 + 4096]
+    assert not os.path.exists(local_path + PART_SUFFIX)
+    assert not os.path.exists(local_path + STATE_SUFFIX)
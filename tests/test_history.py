@@ -0,0 +1,144 @@
+import itertools
+
+import pytest
+
+from history import RunHistory, compare_with_history, flag_regressions, trend_text
+from history import history as history_module
+from history.history import percentile
+from models import BIPStats, BIPSummary, FileResult
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """Give every recorded run a distinct, increasing timestamp."""
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(history_module.time, "time", lambda: float(next(ticks)))
+
+
+def _summary(
+    bip_name: str = "PRTPE",
+    duration_s: float = 100.0,
+    bytes_moved: int = 100 * MB,
+    files: int = 1,
+) -> BIPSummary:
+    return BIPSummary(
+        bip_name=bip_name,
+        files_found=files,
+        downloaded=[FileResult(f"f{i}.csv", True, "upload") for i in range(files)],
+        deleted=[],
+        failed_downloads=[],
+        failed_deletions=[],
+        duration_s=duration_s,
+        status="success" if files else "no_files",
+        bytes_moved=bytes_moved,
+        download_s=duration_s / 2,
+        upload_s=duration_s / 4,
+    )
+
+
+def _stats(runs: int = 5) -> BIPStats:
+    return BIPStats(
+        bip_name="PRTPE",
+        runs=runs,
+        p50_duration_s=100.0,
+        p95_duration_s=150.0,
+        p50_bytes_per_s=float(MB),
+        p95_bytes_per_s=2.0 * MB,
+    )
+
+
+@pytest.mark.parametrize(
+    "values, pct, expected",
+    [
+        ([], 50, 0.0),
+        ([7.0], 95, 7.0),
+        ([3.0, 1.0, 2.0], 50, 2.0),
+        ([1.0, 2.0, 3.0, 4.0], 50, 2.5),
+        ([10.0, 20.0], 95, 19.5),
+        ([1.0, 2.0, 3.0], 100, 3.0),
+        ([1.0, 2.0, 3.0], 0, 1.0),
+    ],
+)
+def test_percentile_interpolates_between_ranks(values, pct, expected):
+    assert percentile(values, pct) == pytest.approx(expected)
+
+
+def test_stats_use_the_last_window_runs_that_moved_files(tmp_path):
+    history = RunHistory(tmp_path / "history.sqlite3")
+    try:
+        history.record("old", [_summary(duration_s=1000.0)])
+        for i, duration in enumerate([10.0, 20.0, 30.0]):
+            history.record(f"run-{i}", [_summary(duration_s=duration), _summary("OTHER")])
+        history.record("empty", [_summary(duration_s=1.0, bytes_moved=0, files=0)])
+
+        stats = history.stats("PRTPE", window=3)
+        assert stats.runs == 3
+        assert stats.p50_duration_s == pytest.approx(20.0)
+        assert stats.p95_duration_s == pytest.approx(29.0)
+        assert stats.p50_bytes_per_s == pytest.approx(100 * MB / 20.0)
+        # Download and upload time are 3/4 of each run's duration.
+        assert history.stream_rate("PRTPE", window=3) == pytest.approx(
+            300 * MB / (60.0 * 0.75)
+        )
+        assert history.stats("MISSING", window=3) is None
+        assert history.stream_rate("MISSING", window=3) is None
+    finally:
+        history.close()
+
+
+@pytest.mark.parametrize(
+    "duration_s, bytes_moved, slower, lower_throughput",
+    [
+        (110.0, 110 * MB, False, False),
+        (130.0, 130 * MB, True, False),
+        (100.0, 70 * MB, False, True),
+        (200.0, 100 * MB, True, True),
+    ],
+)
+def test_flag_regressions_compares_with_the_median(
+    duration_s, bytes_moved, slower, lower_throughput
+):
+    stats = _stats()
+    flag_regressions(stats, _summary(duration_s=duration_s, bytes_moved=bytes_moved), 25, 3)
+
+    assert (stats.duration_regressed, stats.throughput_regressed) == (
+        slower,
+        lower_throughput,
+    )
+    assert ("REGRESSION" in trend_text(stats)) == (slower or lower_throughput)
+
+
+def test_short_history_and_empty_runs_are_never_flagged():
+    stats = _stats(runs=2)
+    flag_regressions(stats, _summary(duration_s=1000.0), 25, 3)
+    assert not stats.regressed
+
+    stats = _stats()
+    flag_regressions(stats, _summary(duration_s=1000.0, bytes_moved=0, files=0), 25, 3)
+    assert not stats.regressed
+
+
+def test_compare_with_history_flags_then_records_the_run(tmp_path):
+    db_path = tmp_path / "history.sqlite3"
+    options = {"window": 10, "threshold_pct": 25, "min_runs": 3}
+    assert compare_with_history(db_path, [_summary()], "first", **options) == {}
+    for i in range(2):
+        stats = compare_with_history(db_path, [_summary()], f"run-{i}", **options)
+        assert stats["PRTPE"].runs == i + 1
+        assert not stats["PRTPE"].regressed
+
+    stats = compare_with_history(db_path, [_summary(duration_s=300.0)], "slow", **options)
+
+    assert stats["PRTPE"].runs == 3
+    assert stats["PRTPE"].duration_regressed
+    history = RunHistory(db_path)
+    try:
+        assert history.stats("PRTPE", window=10).runs == 4
+    finally:
+        history.close()
+
+
+def test_trend_text_without_history():
+    assert trend_text(None) == "no history yet"
@@ -0,0 +1,88 @@
+import csv
+import io
+
+import pytest
+
+from fetcher.inspection import CsvInspector, schema_hash
+
+CSV_TEXT = (
+    "id,name,notes\r\n"
+    '1,alpha,"first line\nsecond line"\r\n'
+    "\r\n"
+    '2,"beta, with comma","quoted ""quote"""\r\n'
+    '3,gamma,"blank line inside\n\nstill the same field"\r\n'
+    "\n"
+    "4,delta,plain\n"
+    "5,epsilon,no trailing newline"
+)
+
+
+def _csv_module_rows(text: str) -> int:
+    """Data rows as the csv module reads them, skipping blank lines."""
+    rows = [row for row in csv.reader(io.StringIO(text, newline="")) if row]
+    return len(rows) - 1
+
+
+def _feed_in_blocks(inspector: CsvInspector, data: bytes, block_size: int) -> None:
+    for offset in range(0, len(data), block_size):
+        inspector.feed(offset, data[offset : offset + block_size])
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 7, 16, 64, 10_000])
+def test_row_count_matches_the_csv_module_for_any_block_size(block_size):
+    inspector = CsvInspector(["id", "name", "notes"])
+    _feed_in_blocks(inspector, CSV_TEXT.encode(), block_size)
+
+    inspection = inspector.result()
+    assert inspection.row_count == _csv_module_rows(CSV_TEXT) == 5
+    assert inspection.valid
+    assert inspection.header == ["id", "name", "notes"]
+    assert inspection.schema_hash == schema_hash(["id", "name", "notes"])
+
+
+@pytest.mark.parametrize("block_size", [1, 5, 4096])
+def test_quoted_newlines_in_the_header_stay_in_one_column(block_size):
+    text = 'id,"multi\nline"\n1,a\n2,"b\nc"\n'
+    inspector = CsvInspector()
+    _feed_in_blocks(inspector, text.encode(), block_size)
+
+    inspection = inspector.result()
+    assert inspection.header == ["id", "multi\nline"]
+    assert inspection.row_count == _csv_module_rows(text) == 2
+
+
+def test_header_mismatch_is_invalid_but_still_counted():
+    inspector = CsvInspector(["id", "name"])
+    inspector.feed(0, b"\xef\xbb\xbfid, title\n1,a\n2,b\n")
+
+    inspection = inspector.result()
+    assert not inspection.valid
+    assert inspection.header == ["id", "title"]
+    assert inspection.row_count == 2
+    assert "does not match" in inspection.error
+
+
+def test_empty_and_undecodable_files_are_invalid():
+    empty = CsvInspector()
+    empty.feed(0, b"\r\n\n")
+    assert not empty.result().valid
+    assert empty.result().row_count == 0
+
+    latin1 = CsvInspector()
+    latin1.feed(0, "caf\xe9,id\n1,2\n".encode("latin-1"))
+    inspection = latin1.result()
+    assert not inspection.valid
+    assert inspection.error.startswith("Unreadable header")
+
+
+def test_out_of_order_block_switches_off_until_the_file_is_scanned(tmp_path):
+    data = CSV_TEXT.encode()
+    inspector = CsvInspector()
+    inspector.feed(0, data[:10])
+    inspector.feed(20, data[20:])
+    assert not inspector.in_order
+
+    path = tmp_path / "report.csv"
+    path.write_bytes(data)
+    inspector.scan_file(str(path))
+    assert inspector.result().row_count == _csv_module_rows(CSV_TEXT)
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from runctl import JobFile, parse_jobs, schedule_matches
+from runctl.jobfile import parse_hours
+
+
+@pytest.mark.parametrize(
+    "spec, hours",
+    [
+        ("*", set(range(24))),
+        ("*/6", {0, 6, 12, 18}),
+        ("0-3", {0, 1, 2, 3}),
+        ("0-6/3, 18,23", {0, 3, 6, 18, 23}),
+        ("7", {7}),
+    ],
+)
+def test_parse_hours(spec, hours):
+    assert parse_hours(spec) == hours
+
+
+@pytest.mark.parametrize("spec", ["", "x", "*/0", "5-2", "24", "1-25", "*/-1"])
+def test_parse_hours_rejects_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_hours(spec)
+
+
+def test_schedule_matches():
+    assert schedule_matches("22-23,0-5", 23)
+    assert not schedule_matches("22-23,0-5", 12)
+
+
+def test_parse_jobs_fills_defaults_and_reads_every_field():
+    config = parse_jobs(
+        {
+            "run": {"smtp_host": "mail.example", "smtp_port": 25, "transfer_pause_s": 0},
+            "bip": [
+                {"name": "A", "secret_path": "/a"},
+                {
+                    "name": "B",
+                    "secret_path": "/b",
+                    "priority": 5,
+                    "enabled": False,
+                    "max_concurrent_transfers": 4,
+                    "bandwidth_limit_bytes_per_s": 1000,
+                    "schedule": "*/2",
+                },
+            ],
+        }
+    )
+
+    assert (config.run.smtp_host, config.run.smtp_port) == ("mail.example", 25)
+    assert config.run.transfer_pause_s == 0
+    a, b = config.bips
+    assert (a.priority, a.enabled, a.max_concurrent_transfers, a.schedule) == (
+        0,
+        True,
+        None,
+        "*",
+    )
+    assert (b.priority, b.enabled, b.max_concurrent_transfers) == (5, False, 4)
+    assert (b.bandwidth_limit_bytes_per_s, b.schedule) == (1000, "*/2")
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ({"runs": {}}, "unknown key(s) runs"),
+        ({"run": {"smtp_port": "25"}}, "smtp_port has an invalid value"),
+        ({"run": {"smtp_timeout_s": 0}}, "cannot be negative"),
+        ({"bip": [{"name": "A"}]}, "secret_path is required"),
+        ({"bip": [{"name": "A", "secret_path": "/a", "prio": 1}]}, "unknown key(s) prio"),
+        ({"bip": [{"name": "A", "secret_path": "/a", "priority": True}]}, "invalid value"),
+        ({"bip": [{"name": "A", "secret_path": "/a", "enabled": 1}]}, "invalid value"),
+        ({"bip": [{"name": "A", "secret_path": "/a", "schedule": "25"}]}, "0-23"),
+        (
+            {"bip": [{"name": "A", "secret_path": "/a", "max_concurrent_transfers": 0}]},
+            "at least 1",
+        ),
+        (
+            {"bip": [{"name": "A", "secret_path": "/a"}, {"name": "A", "secret_path": "/b"}]},
+            "duplicate BIP name",
+        ),
+    ],
+)
+def test_parse_jobs_rejects_invalid_entries(data, message):
+    with pytest.raises(ValueError) as excinfo:
+        parse_jobs(data)
+    assert message in str(excinfo.value)
+
+
+def test_job_file_reloads_changes_and_keeps_the_last_valid_version(tmp_path):
+    path = tmp_path / "jobs.toml"
+    path.write_text('[[bip]]\nname = "A"\nsecret_path = "/a"\n')
+    jobs = JobFile(path, check_interval_s=0)
+    assert jobs.job("A").max_concurrent_transfers is None
+
+    path.write_text('[[bip]]\nname = "A"\nsecret_path = "/a"\nmax_concurrent_transfers = 3\n')
+    os.utime(path, ns=(1, 1))
+    assert jobs.job("A").max_concurrent_transfers == 3
+
+    path.write_text('[[bip]]\nname = "A"\nsecret_path = "/a"\nmax_concurrent_transfers = 0\n')
+    os.utime(path, ns=(2, 2))
+    assert jobs.job("A").max_concurrent_transfers == 3
+    assert jobs.job("B") is None
@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import Counter
+
+from fetcher import Fetcher, LocalLeaseStore
+from models import SFTPConfig
+from sender import Sender
+
+
+def _race(*calls):
+    """Run calls at the same moment on their own threads and return their results."""
+    barrier = threading.Barrier(len(calls))
+    results = [None] * len(calls)
+
+    def run(index, call):
+        barrier.wait()
+        results[index] = call()
+
+    threads = [
+        threading.Thread(target=run, args=(index, call))
+        for index, call in enumerate(calls)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_only_one_of_two_competing_acquires_succeeds(tmp_path):
+    a = LocalLeaseStore(tmp_path, "runner-a", ttl_s=60)
+    b = LocalLeaseStore(tmp_path, "runner-b", ttl_s=60)
+
+    for i in range(50):
+        key = f"BIP/file-{i}.csv"
+        leases = _race(lambda: a.acquire(key), lambda: b.acquire(key))
+        won = [lease for lease in leases if lease is not None]
+        assert len(won) == 1
+        # The loser still cannot take the live lease afterwards.
+        loser = b if won[0].owner == "runner-a" else a
+        assert loser.acquire(key) is None
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    crashed = LocalLeaseStore(tmp_path, "crashed", ttl_s=0.05)
+    alive = LocalLeaseStore(tmp_path, "alive", ttl_s=60)
+    assert crashed.acquire("BIP/a.csv") is not None
+    assert alive.acquire("BIP/a.csv") is None
+
+    time.sleep(0.1)
+    lease = alive.acquire("BIP/a.csv")
+    assert lease is not None
+    assert lease.owner == "alive"
+    assert crashed.acquire("BIP/a.csv") is None
+
+
+def test_only_one_runner_takes_over_an_expired_lease(tmp_path):
+    crashed = LocalLeaseStore(tmp_path, "crashed", ttl_s=0.05)
+    a = LocalLeaseStore(tmp_path, "runner-a", ttl_s=60)
+    b = LocalLeaseStore(tmp_path, "runner-b", ttl_s=60)
+    keys = [f"BIP/file-{i}.csv" for i in range(20)]
+    for key in keys:
+        assert crashed.acquire(key) is not None
+    time.sleep(0.1)
+
+    for key in keys:
+        leases = _race(lambda: a.acquire(key), lambda: b.acquire(key))
+        assert sum(lease is not None for lease in leases) == 1
+
+
+def test_renew_and_release_fail_after_the_lease_is_lost(tmp_path):
+    slow = LocalLeaseStore(tmp_path, "slow", ttl_s=0.05)
+    other = LocalLeaseStore(tmp_path, "other", ttl_s=60)
+    lost = slow.acquire("BIP/a.csv")
+    time.sleep(0.1)
+    taken = other.acquire("BIP/a.csv")
+    assert taken is not None
+
+    assert slow.renew(lost) is None
+    slow.release(lost)
+    # The release of the lost lease must not free the new owner's lease.
+    assert slow.acquire("BIP/a.csv") is None
+    renewed = other.renew(taken)
+    assert renewed is not None
+    assert renewed.expires_at >= taken.expires_at
+
+    other.release(renewed)
+    assert not list(tmp_path.glob("*.lease"))
+    assert slow.acquire("BIP/a.csv") is not None
+
+
+def test_fetchers_sharing_a_store_never_transfer_the_same_file(
+    tmp_path, sftp_server, gcs_buckets
+):
+    port, remote_root, client_key = sftp_server
+    remote = remote_root / "REPORTS"
+    remote.mkdir()
+    names = [f"f{i:02}.csv" for i in range(40)]
+    for name in names:
+        (remote / name).write_bytes(name.encode() * 500)
+    lease_dir = tmp_path / "leases"
+
+    summaries = {}
+
+    def run(owner):
+        local = tmp_path / owner
+        local.mkdir()
+        config = SFTPConfig(
+            hostname="127.0.0.1",
+            username="runner",
+            port=port,
+            path_to_key=str(client_key),
+            key_passphrase="",
+            local_path=str(local),
+            bucket_name="archive",
+            path_to_gcs_credentials=str(tmp_path / "unused.json"),
+            max_concurrent_transfers=2,
+            transfer_pause_s=0,
+        )
+        fetcher = Fetcher(
+            config=config,
+            email_sender=Sender(None),
+            bip_name="BIP",
+            notify=False,
+            leases=LocalLeaseStore(lease_dir, owner, ttl_s=60),
+        )
+        summaries[owner] = fetcher.fetch_files()
+
+    _race(lambda: run("runner-a"), lambda: run("runner-b"))
+
+    uploads = Counter(gcs_buckets["archive"].uploads)
+    assert set(uploads.values()) == {1}
+    assert sorted(blob.rsplit("-", 1)[1] for blob in uploads) == names
+    downloaded = [r.name for s in summaries.values() for r in s.downloaded]
+    assert sorted(downloaded) == names
+    assert not list(remote.iterdir())
+    assert not list(lease_dir.glob("*.lease"))
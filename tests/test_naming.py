@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from fetcher.naming import BlobNamer
+from models import RemoteFile, SFTPConfig
+
+# 2026-10-16 13:45:00 UTC
+MTIME = 1792158300
+
+
+def _file(relative_path: str, size: int = 100, mtime: int | None = MTIME) -> RemoteFile:
+    return RemoteFile(
+        name=relative_path.rsplit("/", 1)[-1],
+        remote_path=f"/REPORTS/{relative_path}",
+        relative_path=relative_path,
+        size=size,
+        mtime=mtime,
+    )
+
+
+def test_default_template_partitions_by_date_and_prefixes_a_hash():
+    namer = BlobNamer(SFTPConfig.blob_name_template, "PRTPE")
+    remote_file = _file("2026/report.csv")
+
+    name = namer.blob_name(remote_file)
+
+    digest = namer.file_hash(remote_file)
+    assert name == f"PRTPE/dt=2026-10-16/{digest[:6]}-2026/report.csv"
+    assert len(digest) == 16
+
+
+def test_every_field_renders_from_the_path_and_utc_mtime():
+    template = "{bip}/{yyyy}/{mm}/{dd}/{hh}/{dir}/{stem}.{ext}|{basename}|{date}"
+    namer = BlobNamer(template, "BIP")
+
+    assert namer.blob_name(_file("in/sub/data.tar.gz")) == (
+        "BIP/2026/10/16/13/in/sub/data.tar.gz|data.tar.gz|2026-10-16"
+    )
+
+
+def test_empty_dir_field_leaves_no_double_or_leading_slash():
+    namer = BlobNamer("{dir}/{basename}", "BIP")
+    assert namer.blob_name(_file("report.csv")) == "report.csv"
+
+
+def test_hash_is_stable_and_changes_with_size_or_mtime():
+    namer = BlobNamer("{hash}-{name}", "BIP")
+    original = namer.blob_name(_file("a.csv"))
+
+    assert namer.blob_name(_file("a.csv")) == original
+    assert namer.blob_name(_file("a.csv", size=101)) != original
+    assert namer.blob_name(_file("a.csv", mtime=MTIME + 1)) != original
+    assert BlobNamer("{hash}-{name}", "OTHER").blob_name(_file("a.csv")) != original
+
+
+@pytest.mark.parametrize(
+    "template, message",
+    [
+        ("{bip}/{date}", "tell files apart"),
+        ("{bip}/{nope}-{name}", "Unknown field(s) nope"),
+        ("{name", "Invalid blob name template"),
+        ("{hash:d}", "Invalid blob name template"),
+    ],
+)
+def test_invalid_templates_are_rejected_up_front(template, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        BlobNamer(template, "BIP")
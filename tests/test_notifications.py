@@ -0,0 +1,77 @@
+import pytest
+
+from models import SuppressedNotification
+from sender import NotificationLog, normalize_error
+from sender import dedup as dedup_module
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(dedup_module.time, "time", lambda: clock[0])
+    return clock
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        (
+            "Failed to download '/REPORTS/a.csv': Errno 104",
+            "failed to download '/REPORTS/b.csv': errno 32",
+        ),
+        ("Timeout after 30s on port 22", "Timeout after 45s  on port 2222"),
+        ('Bad header in "x.csv"', "Bad header in 'y.csv'"),
+    ],
+)
+def test_normalize_error_masks_values_that_change_between_repeats(a, b):
+    assert normalize_error(a) == normalize_error(b)
+
+
+def test_repeats_are_suppressed_until_the_cooldown_passes(tmp_path, now):
+    log = NotificationLog(tmp_path / "notifications.sqlite3", cooldown_s=3600)
+
+    assert log.admit("PRTPE", "Connection failed", "Timeout after 30s") == 0
+    now[0] += 60
+    assert log.admit("PRTPE", "Connection failed", "Timeout after 31s") is None
+    now[0] += 60
+    assert log.admit("PRTPE", "Connection failed", "Timeout after 32s") is None
+    # A different BIP, kind, or error is its own notification.
+    assert log.admit("OTHER", "Connection failed", "Timeout after 30s") == 0
+    assert log.admit("PRTPE", "Upload failed", "Timeout after 30s") == 0
+    assert log.admit("PRTPE", "Connection failed", "Auth failed") == 0
+
+    now[0] += 3600
+    assert log.admit("PRTPE", "Connection failed", "Timeout after 30s") == 2
+    assert log.admit("PRTPE", "Connection failed", "Timeout after 30s") is None
+
+
+def test_cooldown_is_shared_through_the_database(tmp_path, now):
+    db_path = tmp_path / "notifications.sqlite3"
+    assert NotificationLog(db_path, cooldown_s=3600).admit("A", "k", "e") == 0
+    assert NotificationLog(db_path, cooldown_s=3600).admit("A", "k", "e") is None
+
+
+def test_forgotten_notification_is_sent_again(tmp_path, now):
+    log = NotificationLog(tmp_path / "notifications.sqlite3", cooldown_s=3600)
+    log.admit("A", "k", "e")
+    log.forget("A", "k", "e")
+    assert log.admit("A", "k", "e") == 0
+
+
+def test_suppressed_since_counts_repeats_by_bip_and_kind(tmp_path, now):
+    log = NotificationLog(tmp_path / "notifications.sqlite3", cooldown_s=3600)
+    sent_at = now[0]
+    log.admit("B", "Upload failed", "quota")
+    log.admit("A", "Connection failed", "refused")
+    log.admit("A", "Connection failed", "refused")
+    run_start = now[0] + 1
+    now[0] = run_start
+    for _ in range(3):
+        log.admit("A", "Connection failed", "refused")
+    log.admit("B", "Upload failed", "quota")
+
+    assert log.suppressed_since(run_start) == [
+        SuppressedNotification("A", "Connection failed", 3, sent_at),
+        SuppressedNotification("B", "Upload failed", 1, sent_at),
+    ]
+    assert log.suppressed_since(now[0] + 1) == []
@@ -0,0 +1,120 @@
+import pytest
+
+from history import (
+    RunHistory,
+    estimate_duration_s,
+    format_bytes,
+    format_duration,
+    plan_report,
+)
+from models import BIPSummary, FileResult, RemoteFile
+
+MB = 1024 * 1024
+
+
+@pytest.mark.parametrize(
+    "sizes, concurrency, expected",
+    [
+        ([], 4, 0.0),
+        ([100, 100, 100, 100], 1, 400.0),
+        ([100, 100, 100, 100], 2, 200.0),
+        ([100, 100, 100, 100], 8, 100.0),
+        # Slots pick up the next file as they free up: 300 | 100+100+50.
+        ([300, 100, 100, 50], 2, 300.0),
+        # A large file at the end finishes last.
+        ([50, 50, 50, 400], 3, 450.0),
+        ([100], 0, 100.0),
+    ],
+)
+def test_estimate_duration_hands_files_to_the_first_free_slot(
+    sizes, concurrency, expected
+):
+    assert estimate_duration_s(sizes, 1.0, concurrency) == pytest.approx(expected)
+
+
+def test_estimate_scales_with_throughput():
+    assert estimate_duration_s([10 * MB], 2 * MB, 1) == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize(
+    "seconds, text",
+    [(0, "0m00s"), (59.6, "1m00s"), (754, "12m34s"), (3600, "1h00m"), (7380, "2h03m")],
+)
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
+
+
+@pytest.mark.parametrize(
+    "nbytes, text",
+    [
+        (0, "0 B"),
+        (1023, "1023 B"),
+        (1536, "1.5 KiB"),
+        (5 * MB, "5.0 MiB"),
+        (3 * 1024**4, "3.0 TiB"),
+    ],
+)
+def test_format_bytes(nbytes, text):
+    assert format_bytes(nbytes) == text
+
+
+def _record(history_path, bip_name: str, bytes_moved: int, transfer_s: float) -> None:
+    history = RunHistory(history_path)
+    try:
+        history.record(
+            f"run-{bip_name}",
+            [
+                BIPSummary(
+                    bip_name=bip_name,
+                    files_found=1,
+                    downloaded=[FileResult("a.csv", True, "upload")],
+                    deleted=[],
+                    failed_downloads=[],
+                    failed_deletions=[],
+                    duration_s=transfer_s,
+                    status="success",
+                    bytes_moved=bytes_moved,
+                    download_s=transfer_s,
+                ),
+            ],
+        )
+    finally:
+        history.close()
+
+
+def test_plan_report_estimates_bips_with_history(tmp_path):
+    history_path = tmp_path / "history.sqlite3"
+    _record(history_path, "FAST", 60 * MB, 60.0)
+
+    def survey(bip_name):
+        if bip_name == "BROKEN":
+            raise OSError("connection refused")
+        return [RemoteFile(f"{i}.csv", "", f"{i}.csv", size=60 * MB) for i in range(4)]
+
+    report = plan_report(
+        {"FAST": 2, "NEW": 1, "BROKEN": 1},
+        survey,
+        history_path=history_path,
+        window=10,
+        concurrencies=[1, 2, 4],
+        max_parallel_bips=2,
+    )
+
+    lines = report.splitlines()
+    fast = next(line for line in lines if line.startswith("FAST"))
+    # 1 MiB/s per transfer; the current concurrency of 2 is marked.
+    assert fast.split()[1:] == [
+        "4",
+        "240.0",
+        "MiB",
+        "1.0",
+        "MiB/s",
+        "4m00s",
+        "2m00s*",
+        "1m00s",
+    ]
+    new = next(line for line in lines if line.startswith("NEW"))
+    assert new.split()[-4:] == ["history", "-", "-", "-"]
+    assert any(line.startswith("BROKEN") and "listing failed" in line for line in lines)
+    run = next(line for line in lines if line.startswith("Run"))
+    assert run.split()[-3:] == ["4m00s", "2m00s", "1m00s"]
@@ -0,0 +1,132 @@
+import paramiko
+import pytest
+
+from fetcher.remover import BatchRemover
+
+
+@pytest.fixture
+def open_channel(sftp_server):
+    """Open SFTP channels on one connection to the test server, counting them."""
+    port, _, client_key = sftp_server
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        "127.0.0.1",
+        port=port,
+        username="runner",
+        key_filename=str(client_key),
+        look_for_keys=False,
+        allow_agent=False,
+    )
+    opened: list[paramiko.SFTPClient] = []
+
+    def open_channel() -> paramiko.SFTPClient:
+        sftp = client.open_sftp()
+        opened.append(sftp)
+        return sftp
+
+    open_channel.opened = opened
+    yield open_channel
+    client.close()
+
+
+def _remote_files(sftp_server, names):
+    root = sftp_server[1]
+    for name in names:
+        (root / name).write_bytes(b"x")
+    return root
+
+
+def test_flush_deletes_every_file_and_reports_in_queue_order(
+    sftp_server, open_channel
+):
+    names = [f"f{i:02}.csv" for i in range(25)]
+    root = _remote_files(sftp_server, names)
+    traced = []
+    remover = BatchRemover(
+        open_channel, batch_size=10, on_result=lambda *args: traced.append(args)
+    )
+
+    results = []
+    for name in names:
+        results += remover.add(f"/{name}", name)
+    assert len(remover) == 5
+    results += remover.flush()
+    remover.close()
+
+    assert [r.name for r in results] == names
+    assert all(r.success and r.stage == "delete" for r in results)
+    assert not list(root.iterdir())
+    assert [args[3] for args in traced] == [10] * 20 + [5] * 5
+    assert all(args[2] >= 0 for args in traced)
+    assert len(open_channel.opened) == 1
+
+
+def test_every_request_is_sent_before_any_reply_is_read(sftp_server, open_channel):
+    names = [f"f{i}.csv" for i in range(20)]
+    _remote_files(sftp_server, names)
+    events = []
+
+    def traced_channel():
+        sftp = open_channel()
+        send, read = sftp._async_request, sftp._read_response
+
+        def async_request(*args):
+            events.append("send")
+            return send(*args)
+
+        def read_response(*args):
+            events.append("read")
+            return read(*args)
+
+        sftp._async_request = async_request
+        sftp._read_response = read_response
+        return sftp
+
+    remover = BatchRemover(traced_channel, batch_size=len(names))
+    for name in names:
+        remover.add(f"/{name}", name)
+    remover.close()
+
+    assert events[: len(names)] == ["send"] * len(names)
+    assert set(events[len(names) :]) == {"read"}
+
+
+def test_failure_status_fails_only_its_file_and_keeps_the_channel(
+    sftp_server, open_channel
+):
+    root = _remote_files(sftp_server, ["a.csv", "c.csv"])
+    (root / "b.csv").mkdir()  # removing a directory is a plain SFTP_FAILURE
+    remover = BatchRemover(open_channel)
+    for name in ("a.csv", "missing.csv", "b.csv", "c.csv"):
+        remover.add(f"/{name}", name)
+
+    results = remover.flush()
+
+    assert [r.success for r in results] == [True, False, False, True]
+    assert "No such file" in results[1].error_message
+    assert results[2].error_message
+    # Both failures were replies on a healthy channel, so it is reused.
+    _remote_files(sftp_server, ["d.csv"])
+    remover.add("/d.csv", "d.csv")
+    assert remover.flush()[0].success
+    assert len(open_channel.opened) == 1
+    remover.close()
+
+
+def test_broken_channel_fails_the_batch_and_is_reopened(sftp_server, open_channel):
+    root = _remote_files(sftp_server, ["a.csv", "b.csv"])
+    remover = BatchRemover(open_channel)
+    remover.add("/a.csv", "a.csv")
+    assert remover.flush()[0].success
+
+    open_channel.opened[0].get_channel().close()
+    remover.add("/b.csv", "b.csv")
+    failed = remover.flush()
+    assert not failed[0].success
+    assert (root / "b.csv").exists()
+
+    remover.add("/b.csv", "b.csv")
+    assert remover.flush()[0].success
+    assert len(open_channel.opened) == 2
+    remover.close()
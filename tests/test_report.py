@@ -0,0 +1,71 @@
+import csv
+import gzip
+
+import main
+from models import BIPSummary, FileResult
+from report import write_results_report
+from report.report import REPORT_COLUMNS
+
+
+def _summary(failures: int, bip_name: str = "PRTPE") -> BIPSummary:
+    return BIPSummary(
+        bip_name=bip_name,
+        files_found=failures + 1,
+        downloaded=[FileResult("ok.csv", True, "upload", row_count=3, blob_name="b/ok.csv")],
+        deleted=[],
+        failed_downloads=[
+            FileResult(f"bad-{i}.csv", False, "download", "Connection reset")
+            for i in range(failures)
+        ],
+        failed_deletions=[],
+        duration_s=12.5,
+        status="partial" if failures else "success",
+    )
+
+
+def _rows(path) -> list[list[str]]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", newline="", encoding="utf-8") as fp:
+        return list(csv.reader(fp))
+
+
+def test_summary_text_lists_at_most_max_failures_per_bip():
+    text = main._build_summary_text([_summary(25), _summary(2, "OTHER")], max_failures=10)
+
+    assert text.count("    - bad-") == 12
+    assert "    - bad-9.csv (download): Connection reset" in text
+    assert "bad-10.csv" not in text
+    assert "... and 15 more (see attached results report)" in text
+    assert text.count("... and") == 1
+
+
+def test_summary_text_without_failures_has_no_failure_section():
+    text = main._build_summary_text([_summary(0)])
+    assert "Failed files:" not in text
+    assert "  Status: success" in text
+
+
+def test_small_results_report_stays_plain_csv(tmp_path):
+    path = write_results_report([_summary(2)], tmp_path, gzip_threshold_bytes=1024 * 1024)
+
+    assert path == tmp_path / "results.csv"
+    rows = _rows(path)
+    assert rows[0] == REPORT_COLUMNS
+    assert rows[1] == ["PRTPE", "ok.csv", "upload", "True", "", "3", "", "False", "b/ok.csv"]
+    assert [row[1] for row in rows[2:]] == ["bad-0.csv", "bad-1.csv"]
+
+
+def test_results_report_over_the_threshold_is_gzipped(tmp_path):
+    summaries = [_summary(500), _summary(500, "OTHER")]
+    size = write_results_report(summaries, tmp_path).stat().st_size
+    assert size < 256 * 1024
+
+    at_threshold = write_results_report(summaries, tmp_path, gzip_threshold_bytes=size)
+    assert at_threshold == tmp_path / "results.csv"
+    path = write_results_report(summaries, tmp_path, gzip_threshold_bytes=size - 1)
+
+    assert path == tmp_path / "results.csv.gz"
+    assert not (tmp_path / "results.csv").exists()
+    rows = _rows(path)
+    assert len(rows) == 1 + 2 * 501
+    assert rows[-1][:2] == ["OTHER", "bad-499.csv"]
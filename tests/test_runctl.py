@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from runctl import RunBudget, RunLock, RunLockHeld
+from runctl import runctl as runctl_module
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def test_second_lock_fails_while_the_first_is_held(tmp_path):
+    path = tmp_path / "run.lock"
+    with RunLock(path):
+        with pytest.raises(RunLockHeld, match=r"pid=\d+"):
+            RunLock(path).acquire()
+    # Released on exit, and the stale file does not block the next run.
+    with RunLock(path):
+        assert path.exists()
+
+
+def test_lock_of_a_killed_process_is_released(tmp_path):
+    path = tmp_path / "run.lock"
+    holder = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import time\n"
+            "from runctl import RunLock\n"
+            f"RunLock({str(path)!r}).acquire()\n"
+            "print('held', flush=True)\n"
+            "time.sleep(60)\n",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+    )
+    try:
+        assert holder.stdout.readline().strip() == "held"
+        with pytest.raises(RunLockHeld):
+            RunLock(path).acquire()
+    finally:
+        holder.kill()
+        holder.wait()
+
+    lock = RunLock(path)
+    lock.acquire()
+    lock.release()
+
+
+def test_budget_turns_low_once_only_the_reserve_is_left(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(runctl_module.time, "monotonic", lambda: now[0])
+    budget = RunBudget(total_s=600, reserve_s=60)
+
+    assert not budget.low()
+    now[0] += 539
+    assert budget.remaining_s() == 61
+    assert not budget.low()
+    now[0] += 1
+    assert budget.low()
+    assert budget.describe() == "600s total, 60s reserve, 60s remaining"
+    now[0] += 1000
+    assert budget.describe().endswith(" 0s remaining")
+
+
+def test_unlimited_budget_is_never_low():
+    budget = RunBudget(total_s=0, reserve_s=60)
+    assert not budget.limited
+    assert budget.remaining_s() == float("inf")
+    assert not budget.low()
+    assert budget.describe() == "unlimited"
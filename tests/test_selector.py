@@ -0,0 +1,66 @@
+import pytest
+
+from fetcher import FileSelector
+from models import SFTPConfig
+
+
+def _config(**selection) -> SFTPConfig:
+    return SFTPConfig(
+        hostname="sftp.example",
+        username="user",
+        port=22,
+        key_passphrase="",
+        path_to_key="key",
+        local_path="/tmp",
+        bucket_name="bucket",
+        path_to_gcs_credentials="creds.json",
+        **selection,
+    )
+
+
+@pytest.mark.parametrize(
+    "name, selected",
+    [
+        ("report.csv", True),
+        ("report.CSV", False),
+        ("archive.csv.gz", True),
+        ("export_2026-10-16.dat", True),
+        ("export_.dat", False),
+        ("README.txt", False),
+        ("orders-123.json", True),
+        ("orders-.json", False),
+    ],
+)
+def test_a_name_is_selected_when_any_rule_matches(name, selected):
+    selector = FileSelector.from_config(
+        _config(
+            target_file_type=" .csv, .csv.gz ,",
+            target_file_glob="export_?*.dat",
+            target_file_regex=r"^orders-\d+\.json$",
+        )
+    )
+    assert selector.matches(name) is selected
+
+
+def test_default_config_selects_csv_files():
+    selector = FileSelector.from_config(_config())
+    assert selector.describe() == ".csv"
+    assert selector.matches("a.csv") and not selector.matches("a.txt")
+
+
+def test_describe_lists_every_rule():
+    selector = FileSelector([".csv"], ["*.dat"], r"\.json$")
+    assert selector.describe() == r".csv, *.dat, /\.json$/"
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({}, "No file suffix"),
+        ({"suffixes": ["", ""], "globs": [""]}, "No file suffix"),
+        ({"regex": "("}, "Invalid file regex"),
+    ],
+)
+def test_invalid_selection_is_rejected(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        FileSelector(**kwargs)
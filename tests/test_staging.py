@@ -0,0 +1,129 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from fetcher import StagingArea, clean_staging
+from fetcher import staging as staging_module
+from fetcher.download import PART_SUFFIX, STATE_SUFFIX
+from models import RemoteFile
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def free_space(monkeypatch):
+    """Fake free bytes per directory, and a fresh process-wide reservation table."""
+    free: dict[str, int] = {}
+    monkeypatch.setattr(StagingArea, "_held", {})
+    monkeypatch.setattr(
+        staging_module.shutil,
+        "disk_usage",
+        lambda directory: SimpleNamespace(free=free[str(directory)]),
+    )
+    return free
+
+
+def _dirs(tmp_path, *names: str) -> list[str]:
+    dirs = [str(tmp_path / name) for name in names]
+    for d in dirs:
+        os.makedirs(d)
+    return dirs
+
+
+def _file(relative_path: str, size: int) -> RemoteFile:
+    return RemoteFile(
+        name=relative_path.rsplit("/", 1)[-1],
+        remote_path=f"/REPORTS/{relative_path}",
+        relative_path=relative_path,
+        size=size,
+    )
+
+
+def test_files_are_admitted_until_only_min_free_bytes_would_be_left(tmp_path, free_space):
+    (d,) = _dirs(tmp_path, "a")
+    free_space[d] = 10 * MB
+    staging = StagingArea([d], min_free_bytes=2 * MB)
+
+    assert staging.reserve(_file("one.csv", 5 * MB))
+    assert staging.available(d) == 3 * MB
+    assert staging.reserve(_file("two.csv", 3 * MB))
+    assert not staging.reserve(_file("three.csv", 1))
+
+    staging.release(_file("one.csv", 5 * MB))
+    assert staging.available(d) == 5 * MB
+    assert staging.reserve(_file("three.csv", 1))
+
+    staging.release_all()
+    assert staging.available(d) == 8 * MB
+
+
+def test_reservations_are_shared_by_staging_areas_on_the_same_volume(
+    tmp_path, free_space
+):
+    a, b = _dirs(tmp_path, "a", "b")
+    free_space[a] = free_space[b] = 10 * MB
+    first = StagingArea([a], min_free_bytes=0)
+    second = StagingArea([b], min_free_bytes=0)
+
+    assert first.reserve(_file("big.csv", 8 * MB))
+    assert second.available(b) == 2 * MB
+    assert not second.reserve(_file("other.csv", 3 * MB))
+
+    # Releasing a file that this area never reserved leaves the other's hold.
+    second.release(_file("big.csv", 8 * MB))
+    assert second.available(b) == 2 * MB
+
+
+def test_new_files_go_to_the_roomiest_directory_and_partials_stay_put(
+    tmp_path, free_space
+):
+    a, b = _dirs(tmp_path, "a", "b")
+    free_space[a], free_space[b] = 20 * MB, 3 * MB
+    staging = StagingArea([a, b], min_free_bytes=0)
+    partial_path = os.path.join(b, "resume.csv") + PART_SUFFIX
+    with open(partial_path, "wb") as fp:
+        fp.write(b"x" * MB)
+
+    fresh = _file("fresh.csv", MB)
+    assert staging.reserve(fresh)
+    assert staging.path_for(fresh) == os.path.join(a, "fresh.csv")
+
+    # b has 2 MiB left after fresh.csv's hold on the shared volume, which is
+    # enough because the first 1 MiB of resume.csv is already on disk.
+    resume = _file("resume.csv", 3 * MB)
+    assert staging.reserve(resume)
+    assert staging.path_for(resume) == os.path.join(b, "resume.csv")
+
+
+def test_clean_staging_removes_only_partials_that_cannot_resume(tmp_path):
+    root = tmp_path / "staging"
+    sub = root / "2026" / "10"
+    sub.mkdir(parents=True)
+    empty = root / "empty"
+    empty.mkdir()
+    keep = [
+        sub / "done.csv",
+        sub / ("fresh.csv" + PART_SUFFIX),
+        sub / ("fresh.csv" + STATE_SUFFIX),
+    ]
+    remove = [
+        sub / ("no_state.csv" + PART_SUFFIX),
+        sub / ("no_part.csv" + STATE_SUFFIX),
+        sub / ("half.csv" + STATE_SUFFIX + ".tmp"),
+        sub / ("stale.csv" + PART_SUFFIX),
+        sub / ("stale.csv" + STATE_SUFFIX),
+    ]
+    for path in keep + remove:
+        path.write_bytes(b"x" * 100)
+    old = time.time() - 7200
+    os.utime(sub / ("stale.csv" + STATE_SUFFIX), (old, old))
+
+    removed, _ = clean_staging([str(root), str(tmp_path / "missing")], max_age_s=3600)
+
+    assert removed == len(remove)
+    assert all(path.exists() for path in keep)
+    assert not any(path.exists() for path in remove)
+    assert not empty.exists()
+    assert root.exists()
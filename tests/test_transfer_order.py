@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from fetcher import Fetcher
+from models import SFTPConfig
+from sender import Sender
+
+# name -> (size, mtime); listing order follows the directory, not these.
+FILES = {
+    "mid.csv": (300, 2_000_000_000),
+    "big.csv": (900, 1_900_000_000),
+    "small.csv": (100, 2_100_000_000),
+}
+
+
+def _config(tmp_path, sftp_server, **settings) -> SFTPConfig:
+    port, _, client_key = sftp_server
+    local = tmp_path / "staging"
+    local.mkdir(exist_ok=True)
+    return SFTPConfig(
+        hostname="127.0.0.1",
+        username="runner",
+        port=port,
+        path_to_key=str(client_key),
+        key_passphrase="",
+        local_path=str(local),
+        bucket_name="archive",
+        path_to_gcs_credentials=str(tmp_path / "unused.json"),
+        blob_name_template="{name}",
+        max_concurrent_transfers=1,
+        transfer_pause_s=0,
+        **settings,
+    )
+
+
+@pytest.mark.parametrize(
+    "order, expected",
+    [
+        ("largest_first", ["big.csv", "mid.csv", "small.csv"]),
+        ("smallest_first", ["small.csv", "mid.csv", "big.csv"]),
+        ("oldest_first", ["big.csv", "mid.csv", "small.csv"]),
+    ],
+)
+def test_files_are_transferred_in_the_configured_order(
+    tmp_path, sftp_server, gcs_buckets, order, expected
+):
+    _, remote_root, _ = sftp_server
+    remote = remote_root / "REPORTS"
+    remote.mkdir()
+    for name, (size, mtime) in FILES.items():
+        (remote / name).write_bytes(b"x" * size)
+        os.utime(remote / name, (mtime, mtime))
+
+    fetcher = Fetcher(
+        config=_config(tmp_path, sftp_server, transfer_order=order),
+        email_sender=Sender(None),
+        bip_name="BIP",
+        notify=False,
+    )
+    summary = fetcher.fetch_files()
+
+    assert [r.name for r in summary.downloaded] == expected
+    assert gcs_buckets["archive"].uploads == expected
+
+
+def test_unknown_order_is_rejected(tmp_path, sftp_server):
+    with pytest.raises(RuntimeError, match="Invalid transfer order"):
+        Fetcher(
+            config=_config(tmp_path, sftp_server, transfer_order="newest_first"),
+            email_sender=Sender(None),
+            bip_name="BIP",
+            notify=False,
+        )
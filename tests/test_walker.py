@@ -0,0 +1,66 @@
+import pytest
+
+from fetcher import Fetcher
+from models import SFTPConfig
+from sender import Sender
+
+
+def _fetcher(tmp_path, sftp_server, **settings) -> Fetcher:
+    port, _, client_key = sftp_server
+    config = SFTPConfig(
+        hostname="127.0.0.1",
+        username="runner",
+        port=port,
+        path_to_key=str(client_key),
+        key_passphrase="",
+        local_path=str(tmp_path),
+        bucket_name="archive",
+        path_to_gcs_credentials=str(tmp_path / "unused.json"),
+        transfer_pause_s=0,
+        **settings,
+    )
+    return Fetcher(config=config, email_sender=Sender(None), bip_name="BIP", notify=False)
+
+
+@pytest.fixture
+def tree(sftp_server):
+    """REPORTS with CSVs at depths 0 to 2, a non-matching file, and an empty directory."""
+    _, remote_root, _ = sftp_server
+    reports = remote_root / "REPORTS"
+    (reports / "d1" / "d2").mkdir(parents=True)
+    (reports / "empty").mkdir()
+    for relative_path in ["a.csv", "skip.txt", "d1/b.csv", "d1/d2/c.csv"]:
+        (reports / relative_path).write_bytes(b"x" * len(relative_path))
+    return reports
+
+
+@pytest.mark.usefixtures("gcs_buckets")
+@pytest.mark.parametrize(
+    "settings, expected",
+    [
+        ({}, ["a.csv"]),
+        ({"recursive": True, "max_depth": 0}, ["a.csv"]),
+        ({"recursive": True, "max_depth": 1}, ["a.csv", "d1/b.csv"]),
+        (
+            {"recursive": True, "max_depth": 5, "listing_concurrency": 3},
+            ["a.csv", "d1/b.csv", "d1/d2/c.csv"],
+        ),
+    ],
+)
+def test_walk_descends_only_as_deep_as_configured(
+    tmp_path, sftp_server, tree, settings, expected
+):
+    files = _fetcher(tmp_path, sftp_server, **settings).survey()
+
+    assert sorted(f.relative_path for f in files) == expected
+    by_path = {f.relative_path: f for f in files}
+    assert by_path["a.csv"].remote_path == "/REPORTS/a.csv"
+    assert by_path["a.csv"].size == len("a.csv")
+    assert by_path["a.csv"].mtime == int((tree / "a.csv").stat().st_mtime)
+
+
+@pytest.mark.usefixtures("gcs_buckets")
+def test_missing_root_is_raised(tmp_path, sftp_server):
+    fetcher = _fetcher(tmp_path, sftp_server, remote_path="/MISSING", recursive=True)
+    with pytest.raises(FileNotFoundError):
+        fetcher.survey()